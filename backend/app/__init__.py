@@ -9,12 +9,31 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object('app.config.Config')
     
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    # ETag and Last-Modified are exposed so the admin UI can send If-Match
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=["ETag", "Last-Modified"])
     
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     
+    # First before_request hook, so shed requests do no other work
+    from app.utils.admission import init_admission_control
+    init_admission_control(app)
+    from app.utils.contact_spool import init_contact_spool
+    init_contact_spool(app)
+    from app.utils.status_history import init_status_history
+    init_status_history(app)
+    from app.utils.slow_query_log import init_slow_query_log
+    init_slow_query_log(app)
+    from app.utils.query_budget import init_query_budgets
+    init_query_budgets(app)
+    from app.utils.request_profiler import init_request_profiler
+    init_request_profiler(app)
+    from app.utils.cache_bus import cache_bus
+    cache_bus.init_app(app)
+    from app.utils.token_revocation import init_token_revocation
+    init_token_revocation(app)
+    
     logging.basicConfig(level=logging.DEBUG)
     logger = logging.getLogger(__name__)
     
@@ -30,6 +49,10 @@ def create_app():
     from app.controllers.service_controller import service_bp
     from app.controllers.gallery_controller import gallery_bp
     from app.controllers.contact_controller import contact_bp
+    from app.controllers.batch_controller import batch_bp
+    from app.controllers.sync_controller import sync_bp
+    from app.controllers.report_controller import report_bp
+    from app.controllers.payment_controller import payment_bp, create_payment
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(user_bp)
@@ -42,6 +65,34 @@ def create_app():
     app.register_blueprint(service_bp)
     app.register_blueprint(gallery_bp)
     app.register_blueprint(contact_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(report_bp)
+    app.register_blueprint(payment_bp)
+    # The checkout page posts to /api/payments
+    app.add_url_rule('/api/payments', 'create_payment', create_payment, methods=['POST'])
+    
+    # CLI commands
+    from app.utils.archival import archive_orders_command
+    app.cli.add_command(archive_orders_command)
+    from app.utils.contact_spool import flush_contacts_command
+    app.cli.add_command(flush_contacts_command)
+    from app.utils.contact_search import reindex_contacts_command
+    app.cli.add_command(reindex_contacts_command)
+    from app.utils.sync import purge_tombstones_command
+    app.cli.add_command(purge_tombstones_command)
+    from app.utils.rfm_segmentation import compute_segments_command
+    app.cli.add_command(compute_segments_command)
+    from app.utils.index_advisor import suggest_indexes_command
+    app.cli.add_command(suggest_indexes_command)
+    from app.utils.token_revocation import purge_revocations_command
+    app.cli.add_command(purge_revocations_command)
+    from app.utils.delivery_zones import load_delivery_zones_command
+    app.cli.add_command(load_delivery_zones_command)
+    from app.utils.request_profiler import profile_summary_command
+    app.cli.add_command(profile_summary_command)
+    from app.utils.production_planner import normalize_event_menus_command
+    app.cli.add_command(normalize_event_menus_command)
     
     # Serve static files including services images
     @app.route('/static/<path:filename>')
@@ -71,4 +122,8 @@ def create_app():
         except Exception as e:
             logger.error(f"Error creating database tables: {str(e)}", exc_info=True)
     
+    # Each worker builds its app, so this runs once per worker at boot
+    from app.utils.hot_statements import prewarm
+    prewarm(app)
+    
     return app
\ No newline at end of file
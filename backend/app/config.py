@@ -5,4 +5,117 @@ class Config:
     SQLALCHEMY_DATABASE_URI = "mysql+pymysql://root:@localhost/project_db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
-    
\ No newline at end of file
+
+    # Orders older than this are moved to the *_archive tables by `flask archive-orders`
+    ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', 365))
+    ORDER_ARCHIVE_BATCH_SIZE = int(os.environ.get('ORDER_ARCHIVE_BATCH_SIZE', 500))
+
+    # Contact form write-behind spool (defaults to <instance>/contact_spool)
+    CONTACT_SPOOL_DIR = os.environ.get('CONTACT_SPOOL_DIR')
+    CONTACT_SPOOL_BATCH_SIZE = int(os.environ.get('CONTACT_SPOOL_BATCH_SIZE', 200))
+    CONTACT_SPOOL_FLUSH_SECONDS = float(os.environ.get('CONTACT_SPOOL_FLUSH_SECONDS', 5))
+    CONTACT_SPOOL_FSYNC = os.environ.get('CONTACT_SPOOL_FSYNC', 'true').lower() == 'true'
+    # A spool file that fails to insert this many flushes in a row is renamed to .bad
+    CONTACT_SPOOL_MAX_ATTEMPTS = int(os.environ.get('CONTACT_SPOOL_MAX_ATTEMPTS', 5))
+
+    # POST /api/v1/batch limits
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+    BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
+    # Delta sync: rows newer than now - lag wait for the next sync so in-flight
+    # transactions are not skipped; older cursors fall back to a full snapshot
+    SYNC_SAFETY_LAG_SECONDS = int(os.environ.get('SYNC_SAFETY_LAG_SECONDS', 2))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+    # Sales analytics reports (/api/v1/reports)
+    ANALYTICS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', 300))
+    ANALYTICS_CHUNK_SIZE = int(os.environ.get('ANALYTICS_CHUNK_SIZE', 10000))
+
+    # Max ids per POST /orders/bulk-status or /deliveries/bulk-status
+    BULK_STATUS_MAX_IDS = int(os.environ.get('BULK_STATUS_MAX_IDS', 200))
+
+    # Order/delivery status history is buffered per worker and inserted in batches
+    STATUS_HISTORY_BATCH_SIZE = int(os.environ.get('STATUS_HISTORY_BATCH_SIZE', 500))
+    STATUS_HISTORY_FLUSH_SECONDS = float(os.environ.get('STATUS_HISTORY_FLUSH_SECONDS', 2))
+    STATUS_HISTORY_MAX_BUFFER = int(os.environ.get('STATUS_HISTORY_MAX_BUFFER', 50000))
+
+    # Statements slower than this are logged (with EXPLAIN) for `flask suggest-indexes`;
+    # 0 disables capture. The log defaults to <instance>/slow_queries.jsonl
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    # Past this size the log is moved to <log>.1 and a new one started; 0 never rotates
+    SLOW_QUERY_LOG_MAX_MB = float(os.environ.get('SLOW_QUERY_LOG_MAX_MB', 20))
+
+    # Cross-worker cache invalidation: file://<dir> (default <instance>/cache_bus)
+    # for workers on one host, or redis://... (needs the redis package) for several
+    CACHE_BUS_URL = os.environ.get('CACHE_BUS_URL')
+    CACHE_BUS_TTL_SECONDS = int(os.environ.get('CACHE_BUS_TTL_SECONDS', 300))
+
+    # JWT revocation: per-worker Bloom filter over the token_revocations table
+    REVOCATION_REFRESH_SECONDS = int(os.environ.get('REVOCATION_REFRESH_SECONDS', 30))
+    REVOCATION_REBUILD_SECONDS = int(os.environ.get('REVOCATION_REBUILD_SECONDS', 3600))
+    REVOCATION_BLOOM_CAPACITY = int(os.environ.get('REVOCATION_BLOOM_CAPACITY', 100000))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.environ.get('REVOCATION_BLOOM_ERROR_RATE', 0.001))
+
+    # Payment statement reconciliation. Statement times are local
+    # (UTC+3 by default) and matched to orders within the window by phone and amount
+    PAYMENT_MATCH_WINDOW_MINUTES = int(os.environ.get('PAYMENT_MATCH_WINDOW_MINUTES', 120))
+    PAYMENT_MATCH_LOOKBACK_DAYS = int(os.environ.get('PAYMENT_MATCH_LOOKBACK_DAYS', 30))
+    PAYMENT_PHONE_MATCH_DIGITS = int(os.environ.get('PAYMENT_PHONE_MATCH_DIGITS', 9))
+    PAYMENT_STATEMENT_UTC_OFFSET_MINUTES = int(os.environ.get('PAYMENT_STATEMENT_UTC_OFFSET_MINUTES', 180))
+    PAYMENT_INGEST_CHUNK_SIZE = int(os.environ.get('PAYMENT_INGEST_CHUNK_SIZE', 1000))
+
+    # Delivery zones and fees. GEOCODER is "local" (built-in place list, or the
+    # GEOCODER_GAZETTEER JSON file) or "package.module:Class" for a real geocoder
+    GEOCODER = os.environ.get('GEOCODER', 'local')
+    GEOCODER_GAZETTEER = os.environ.get('GEOCODER_GAZETTEER')
+    DELIVERY_ORIGIN_LATITUDE = float(os.environ.get('DELIVERY_ORIGIN_LATITUDE', 0.3136))
+    DELIVERY_ORIGIN_LONGITUDE = float(os.environ.get('DELIVERY_ORIGIN_LONGITUDE', 32.5811))
+    DELIVERY_ZONE_GRID_DEGREES = float(os.environ.get('DELIVERY_ZONE_GRID_DEGREES', 0.01))
+    DELIVERY_FEE_ROUNDING = int(os.environ.get('DELIVERY_FEE_ROUNDING', 500))
+    DELIVERY_QUOTE_MAX_ADDRESSES = int(os.environ.get('DELIVERY_QUOTE_MAX_ADDRESSES', 500))
+
+    # Compiled statement cache per engine (SQLAlchemy query_cache_size); hot
+    # statements are compiled into it at worker boot unless SQL_PREWARM=false
+    SQL_STATEMENT_CACHE_SIZE = int(os.environ.get('SQL_STATEMENT_CACHE_SIZE', 1200))
+    # Seconds a request waits for a pooled connection before giving up (503)
+    DB_POOL_TIMEOUT_SECONDS = int(os.environ.get('DB_POOL_TIMEOUT_SECONDS', 5))
+    SQLALCHEMY_ENGINE_OPTIONS = {"query_cache_size": SQL_STATEMENT_CACHE_SIZE, "pool_timeout": DB_POOL_TIMEOUT_SECONDS}
+    SQL_PREWARM = os.environ.get('SQL_PREWARM', 'true').lower() == 'true'
+
+    # Admission control per worker: "class=limit:queue:timeout_seconds" for the
+    # checkout, auth, export, write and read route classes. MAX_CONCURRENT is
+    # shared by all classes (keep it within the DB pool and worker threads);
+    # RESERVED_CHECKOUT of it is held back for order taking
+    ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true'
+    ADMISSION_CLASSES = os.environ.get(
+        'ADMISSION_CLASSES',
+        'checkout=8:16:5,auth=3:6:1,export=2:2:0.5,write=6:12:2,read=8:16:1'
+    )
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', 12))
+    ADMISSION_RESERVED_CHECKOUT = int(os.environ.get('ADMISSION_RESERVED_CHECKOUT', 4))
+
+    # Per-statement time limit for requests (MySQL MAX_EXECUTION_TIME); routes
+    # set their own, and row caps, with @query_budget. 0 turns the default off
+    QUERY_BUDGETS = os.environ.get('QUERY_BUDGETS', 'true').lower() == 'true'
+    QUERY_TIMEOUT_MS = int(os.environ.get('QUERY_TIMEOUT_MS', 5000))
+
+    # Request profiling: admins send "X-Profile: 1" (or sample / cprofile), and
+    # PROFILE_SAMPLE_RATE of all requests is profiled at random. Profiles go to
+    # PROFILE_DIR (instance/profiles by default), capped at PROFILE_DIR_MAX_MB;
+    # `flask profile-summary` reads them
+    PROFILING = os.environ.get('PROFILING', 'true').lower() == 'true'
+    PROFILE_MODE = os.environ.get('PROFILE_MODE', 'sample')
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    PROFILE_DIR_MAX_MB = float(os.environ.get('PROFILE_DIR_MAX_MB', 50))
+
+    # Image uploads to the gallery and services: largest accepted file and the
+    # accepted types (checked against the file's own first bytes)
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 5 * 1024 * 1024))
+    UPLOAD_IMAGE_TYPES = os.environ.get('UPLOAD_IMAGE_TYPES', 'image/jpeg,image/png,image/webp,image/gif')
+
+    # Longest date range, in days, one production plan request may cover
+    PRODUCTION_PLAN_MAX_DAYS = int(os.environ.get('PRODUCTION_PLAN_MAX_DAYS', 31))
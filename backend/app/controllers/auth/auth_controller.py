@@ -8,7 +8,7 @@ from app.status_codes import (
 )
 import re
 from flask_jwt_extended import (
-    create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+    create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, decode_token
 )
 
 from flask import Blueprint, request, jsonify
@@ -16,9 +16,13 @@ from werkzeug.security import check_password_hash
 from app.models.admin_user_model import AdminUser
 from app.models.customer_model import Customer
 from app.extensions import db, bcrypt
+from app.utils import hot_statements
 from app.status_codes import (
     HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT, HTTP_500_INTERNAL_SERVER_ERROR,
-    HTTP_201_CREATED, HTTP_200_OK, HTTP_401_UNAUTHORIZED
+    HTTP_201_CREATED, HTTP_200_OK, HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+)
+from app.utils.token_revocation import (
+    revocation_list, revoke_token, revoke_subjects, announce_revocations, subject_key
 )
 import validators
 import logging
@@ -53,7 +57,7 @@ def register_user():
     if not is_valid_email(email):
         return jsonify({'error': 'Invalid email format'}), HTTP_400_BAD_REQUEST
     
-    if AdminUser.query.filter_by(email=email).first():
+    if hot_statements.first("admin_users.by_email", email=email):
         return jsonify({'error': 'Email already registered'}), HTTP_409_CONFLICT
     
     if AdminUser.query.filter_by(contact=contact).first():
@@ -101,7 +105,7 @@ def login_user():
     if not email or not password:
         return jsonify({'error': 'Email and password are required'}), HTTP_400_BAD_REQUEST
     
-    user = AdminUser.query.filter_by(email=email).first()
+    user = hot_statements.first("admin_users.by_email", email=email)
     
     if not user or not bcrypt.check_password_hash(user.password, password):
         return jsonify({'error': 'Invalid email or password'}), HTTP_401_UNAUTHORIZED
@@ -132,7 +136,7 @@ def login_customer():
     if not email or not password:
         return jsonify({'error': 'Email and password are required'}), HTTP_400_BAD_REQUEST
     
-    customer = Customer.query.filter_by(email=email).first()
+    customer = hot_statements.first("customers.by_email", email=email)
     
     if not customer or not bcrypt.check_password_hash(customer.password, password):
         return jsonify({'error': 'Invalid email or password'}), HTTP_401_UNAUTHORIZED
@@ -158,4 +162,103 @@ def login_customer():
 def refresh_token():
     current_user = get_jwt_identity()
     new_access_token = create_access_token(identity=current_user)
-    return jsonify({'access_token': new_access_token}), HTTP_200_OK
\ No newline at end of file
+    return jsonify({'access_token': new_access_token}), HTTP_200_OK
+
+# Helper: the account behind a JWT identity ({'role', 'id'} or a bare admin id)
+def account_for_identity(identity):
+    if isinstance(identity, dict):
+        model = Customer if identity.get('role') == 'customer' else AdminUser
+        return model.query.get(identity.get('id'))
+    return AdminUser.query.get(identity)
+
+# Helper: every subject an account's tokens may have been issued under
+def subjects_for_account(account):
+    if isinstance(account, Customer):
+        return [f'customer:{account.id}']
+    return list(dict.fromkeys([f'{account.role}:{account.id}', f'admin:{account.id}', f'staff:{account.id}', str(account.id)]))
+
+# Revokes the presented token, and the refresh token too when it is posted
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    current = get_jwt()
+    tokens = [current]
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            refresh_payload = decode_token(data['refresh_token'])
+        except Exception:
+            return jsonify({'error': 'Invalid refresh token'}), HTTP_400_BAD_REQUEST
+        if subject_key(refresh_payload.get('sub')) != subject_key(current.get('sub')):
+            return jsonify({'error': 'Refresh token belongs to another user'}), HTTP_400_BAD_REQUEST
+        if refresh_payload['jti'] != current['jti'] and not revocation_list.is_revoked(refresh_payload):
+            tokens.append(refresh_payload)
+    
+    try:
+        revocations = [revoke_token(payload, 'logout') for payload in tokens]
+        db.session.commit()
+        announce_revocations(revocations)
+        return jsonify({'message': 'Logged out successfully'}), HTTP_200_OK
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error revoking tokens on logout: {str(e)}")
+        return jsonify({'error': 'Logout failed'}), HTTP_500_INTERNAL_SERVER_ERROR
+
+# Changing the password signs out every other session of the account
+@auth_bp.route('/change-password', methods=['POST'])
+@jwt_required()
+def change_password():
+    identity = get_jwt_identity()
+    data = request.get_json() or {}
+    current_password = data.get('current_password')
+    new_password = data.get('new_password')
+    
+    if not current_password or not new_password:
+        return jsonify({'error': 'current_password and new_password are required'}), HTTP_400_BAD_REQUEST
+    if len(new_password) < 8:
+        return jsonify({'error': 'Password must be at least 8 characters'}), HTTP_400_BAD_REQUEST
+    
+    account = account_for_identity(identity)
+    if not account or not bcrypt.check_password_hash(account.password, current_password):
+        return jsonify({'error': 'Current password is incorrect'}), HTTP_401_UNAUTHORIZED
+    
+    try:
+        account.password = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        revocations = revoke_subjects(subjects_for_account(account), 'password_change')
+        db.session.commit()
+        announce_revocations(revocations)
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error changing password: {str(e)}")
+        return jsonify({'error': 'Password change failed'}), HTTP_500_INTERNAL_SERVER_ERROR
+    
+    # Issued after the cut-off, so this session stays signed in
+    return jsonify({
+        'message': 'Password changed successfully',
+        'access_token': create_access_token(identity=identity),
+        'refresh_token': create_refresh_token(identity=identity)
+    }), HTTP_200_OK
+
+# Offboarding: an admin revokes every token of a staff member
+@auth_bp.route('/revoke-user/<int:user_id>', methods=['POST'])
+@jwt_required()
+def revoke_user_tokens(user_id):
+    identity = get_jwt_identity()
+    caller = account_for_identity(identity)
+    role = identity.get('role') if isinstance(identity, dict) else getattr(caller, 'role', None)
+    if not isinstance(caller, AdminUser) or role != 'admin':
+        return jsonify({'error': 'Only admins can revoke staff sessions'}), HTTP_403_FORBIDDEN
+    
+    user = AdminUser.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), HTTP_404_NOT_FOUND
+    
+    try:
+        revocations = revoke_subjects(subjects_for_account(user), 'offboarding')
+        db.session.commit()
+        announce_revocations(revocations)
+        return jsonify({'message': f'All sessions of {user.full_name} have been revoked'}), HTTP_200_OK
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error revoking tokens of user {user_id}: {str(e)}")
+        return jsonify({'error': 'Revocation failed'}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -0,0 +1,116 @@
+# app/controllers/batch_controller.py
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.test import EnvironBuilder
+from app.status_codes import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from app.utils.admission import BATCH_SUB_REQUEST
+import logging
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/v1/batch')
+
+SAFE_METHODS = ('GET', 'HEAD')
+METHODS = SAFE_METHODS + ('POST', 'PUT', 'PATCH', 'DELETE')
+# Headers worth passing back to the client for each sub-response
+FORWARDED_RESPONSE_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Location', 'Retry-After')
+
+
+def build_environ(sub_request):
+    headers = {}
+    # Sub-requests act on behalf of the caller unless they say otherwise
+    if 'Authorization' in request.headers:
+        headers['Authorization'] = request.headers['Authorization']
+    headers.update(sub_request.get('headers') or {})
+
+    environ = EnvironBuilder(
+        path=sub_request['path'],
+        method=sub_request.get('method', 'GET').upper(),
+        json=sub_request.get('body'),
+        headers=headers,
+        base_url=request.host_url
+    ).get_environ()
+    # Admitted as part of the batch, not on their own
+    environ[BATCH_SUB_REQUEST] = True
+    return environ
+
+
+# Runs one sub-request through the normal Flask dispatch (blueprints, error
+# handlers, before/after request hooks), without going back over the network
+def dispatch(app, environ):
+    with app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            logging.error(f"Error dispatching batch sub-request: {str(e)}", exc_info=True)
+            response = app.make_response((jsonify({"message": "Internal server error"}), 500))
+
+        body = response.get_json(silent=True)
+        if body is None and response.status_code != 304:
+            body = response.get_data(as_text=True)
+
+        return {
+            "status": response.status_code,
+            "headers": {
+                name: response.headers[name]
+                for name in FORWARDED_RESPONSE_HEADERS if name in response.headers
+            },
+            "body": body
+        }
+
+
+def validate(sub_request):
+    if not isinstance(sub_request, dict) or not isinstance(sub_request.get('path'), str):
+        return "Each request needs a path"
+    if not sub_request['path'].startswith('/api/'):
+        return "Only /api/ paths can be batched"
+    if sub_request['path'].startswith(batch_bp.url_prefix):
+        return "Batch requests cannot be nested"
+    method = sub_request.get('method', 'GET')
+    if not isinstance(method, str) or method.upper() not in METHODS:
+        return f"method must be one of {', '.join(METHODS)}"
+    if not isinstance(sub_request.get('headers') or {}, dict):
+        return "headers must be an object"
+    return None
+
+
+# POST {"requests": [{"method": "GET", "path": "/api/v1/menu-items", "body": {...}}, ...]}
+#
+# Consecutive reads run concurrently, each in its own app context and DB
+# session; writes run one at a time, in order, and act as barriers so a read
+# listed after a write sees its result.
+@batch_bp.route('', methods=['POST'], strict_slashes=False)
+def batch():
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('requests'), list):
+        return jsonify({"message": "requests must be a list"}), HTTP_400_BAD_REQUEST
+
+    sub_requests = data['requests']
+    max_requests = current_app.config['BATCH_MAX_REQUESTS']
+    if len(sub_requests) > max_requests:
+        return jsonify({"message": f"At most {max_requests} requests per batch"}), HTTP_400_BAD_REQUEST
+
+    for index, sub_request in enumerate(sub_requests):
+        error = validate(sub_request)
+        if error:
+            return jsonify({"message": f"Request {index}: {error}"}), HTTP_400_BAD_REQUEST
+
+    app = current_app._get_current_object()
+    environs = [build_environ(sub_request) for sub_request in sub_requests]
+    responses = [None] * len(environs)
+
+    with ThreadPoolExecutor(max_workers=current_app.config['BATCH_MAX_WORKERS']) as executor:
+        pending_reads = []
+
+        def drain_reads():
+            for index, future in pending_reads:
+                responses[index] = future.result()
+            pending_reads.clear()
+
+        for index, environ in enumerate(environs):
+            if environ['REQUEST_METHOD'] in SAFE_METHODS:
+                pending_reads.append((index, executor.submit(dispatch, app, environ)))
+            else:
+                drain_reads()
+                responses[index] = executor.submit(dispatch, app, environ).result()
+        drain_reads()
+
+    return jsonify({"responses": responses}), HTTP_200_OK
@@ -1,23 +1,63 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from app.models.catering_event_model import CateringEvent
 from app.extensions import db
-from app.status_codes import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_201_CREATED, HTTP_200_OK, HTTP_500_INTERNAL_SERVER_ERROR
-from datetime import datetime
+from app.utils.http_cache import add_version_etag, check_if_match
+from app.utils.query_budget import query_budget
+from app.utils.cache_bus import cache_bus, CATERING_EVENTS
+from app.utils.production_planner import validate_menu_lines, set_event_lines, menu_summary, get_production_plan
+from sqlalchemy.orm import selectinload
+from app.status_codes import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_201_CREATED, HTTP_200_OK, HTTP_409_CONFLICT, HTTP_500_INTERNAL_SERVER_ERROR
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import datetime, timedelta
 
 
 catering_event_bp = Blueprint('catering_event', __name__, url_prefix="/api/v1/catering-events")
 
+def serialize_event(e):
+    return {
+        "id": e.id,
+        "customer_id": e.customer_id,
+        "event_name": e.event_name,
+        "event_date": e.event_date.isoformat(),
+        "location": e.location,
+        "number_of_guests": e.number_of_guests,
+        "menu": e.menu,
+        "menu_lines": [line.to_dict() for line in e.lines],
+        "status": e.status,
+        "description": e.description,
+        "version": e.version
+    }
+
+def event_conflict(event, status):
+    response = jsonify({
+        "message": "Catering event was modified by someone else" if status == HTTP_409_CONFLICT
+        else "If-Match header with the event's ETag is required",
+        "current": serialize_event(event)
+    })
+    return add_version_etag(response, event.version), status
+
 @catering_event_bp.route('/create', methods=['POST'])
 def create_event():
     data = request.get_json()
-    required_fields = ['customer_id', 'event_name', 'event_date', 'location', 'number_of_guests', 'menu']
+    required_fields = ['customer_id', 'event_name', 'event_date', 'location', 'number_of_guests']
     if not data:
         return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
     
     missing_fields = [field for field in required_fields if field not in data]
+    # The menu can be given as text, as menu_lines, or both
+    if 'menu' not in data and 'menu_lines' not in data:
+        missing_fields.append('menu')
     if missing_fields:
         return jsonify({"message": f"Missing required fields: {', '.join(missing_fields)}"}), HTTP_400_BAD_REQUEST
     
+    lines, names = None, {}
+    if 'menu_lines' in data:
+        try:
+            lines, names = validate_menu_lines(data['menu_lines'])
+        except ValueError as e:
+            return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+    
     try:
         event_date = datetime.fromisoformat(data['event_date'])
     except ValueError:
@@ -30,73 +70,62 @@ def create_event():
             event_date=event_date,
             location=data['location'],
             number_of_guests=int(data['number_of_guests']),
-            menu=data['menu'],
+            menu=data['menu'] if 'menu' in data else menu_summary(lines, names),
             status=data.get('status', 'pending'),
             description=data.get('description')
         )
+        if lines:
+            set_event_lines(new_event, lines)
         db.session.add(new_event)
         db.session.commit()
+        cache_bus.publish(CATERING_EVENTS)
         
-        return jsonify({
+        return add_version_etag(jsonify({
             "message": "Catering event created successfully",
-            "event": {
-                "id": new_event.id,
-                "customer_id": new_event.customer_id,
-                "event_name": new_event.event_name,
-                "event_date": new_event.event_date.isoformat(),
-                "location": new_event.location,
-                "number_of_guests": new_event.number_of_guests,
-                "menu": new_event.menu,
-                "status": new_event.status,
-                "description": new_event.description
-            }
-        }), HTTP_201_CREATED
+            "event": serialize_event(new_event)
+        }), new_event.version), HTTP_201_CREATED
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Error creating event", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
 @catering_event_bp.route('/', methods=['GET'])
+@query_budget(timeout_ms=2000, max_rows=1000)
 def get_all_events():
-    events = CateringEvent.query.all()
-    return jsonify([{
-        "id": e.id,
-        "customer_id": e.customer_id,
-        "event_name": e.event_name,
-        "event_date": e.event_date.isoformat(),
-        "location": e.location,
-        "number_of_guests": e.number_of_guests,
-        "menu": e.menu,
-        "status": e.status,
-        "description": e.description
-    } for e in events]), HTTP_200_OK
+    events = CateringEvent.query.options(selectinload(CateringEvent.lines)).all()
+    return jsonify([serialize_event(e) for e in events]), HTTP_200_OK
 
 @catering_event_bp.route('/<int:id>', methods=['GET'])
 def get_event_by_id(id):
     event = CateringEvent.query.get(id)
     if not event:
         return jsonify({"message": "Catering event not found"}), HTTP_404_NOT_FOUND
-    return jsonify({
-        "id": event.id,
-        "customer_id": event.customer_id,
-        "event_name": event.event_name,
-        "event_date": event.event_date.isoformat(),
-        "location": event.location,
-        "number_of_guests": event.number_of_guests,
-        "menu": event.menu,
-        "status": event.status,
-        "description": event.description
-    }), HTTP_200_OK
+    return add_version_etag(jsonify(serialize_event(event)), event.version), HTTP_200_OK
 
+# Requires If-Match with the ETag from GET; a stale version gets 409 and the current state
 @catering_event_bp.route('/<int:id>', methods=['PUT'])
 def update_event(id):
     event = CateringEvent.query.get(id)
     if not event:
         return jsonify({"message": "Catering event not found"}), HTTP_404_NOT_FOUND
     
+    precondition = check_if_match(event.version)
+    if precondition:
+        return event_conflict(event, precondition)
+    
     data = request.get_json()
     if not data:
         return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
     
+    lines, names = None, {}
+    # An empty list clears the lines (the event falls back to its menu text)
+    if data.get('menu_lines') == []:
+        lines = []
+    elif 'menu_lines' in data:
+        try:
+            lines, names = validate_menu_lines(data['menu_lines'])
+        except ValueError as e:
+            return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+    
     try:
         event.customer_id = data.get('customer_id', event.customer_id)
         event.event_name = data.get('event_name', event.event_name)
@@ -107,11 +136,23 @@ def update_event(id):
         event.location = data.get('location', event.location)
         event.number_of_guests = int(data.get('number_of_guests', event.number_of_guests))
         event.menu = data.get('menu', event.menu)
+        if lines is not None:
+            set_event_lines(event, lines)
+        if lines and 'menu' not in data:
+            event.menu = menu_summary(lines, names)
         event.status = data.get('status', event.status)
         event.description = data.get('description', event.description)
         
         db.session.commit()
-        return jsonify({"message": "Catering event updated successfully"}), HTTP_200_OK
+        cache_bus.publish(CATERING_EVENTS)
+        return add_version_etag(jsonify({
+            "message": "Catering event updated successfully",
+            "event": serialize_event(event)
+        }), event.version), HTTP_200_OK
+    except StaleDataError:
+        # Another writer committed between our read and our UPDATE
+        db.session.rollback()
+        return event_conflict(CateringEvent.query.get(id), HTTP_409_CONFLICT)
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to update event", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -125,7 +166,31 @@ def delete_event(id):
     try:
         db.session.delete(event)
         db.session.commit()
+        cache_bus.publish(CATERING_EVENTS)
         return jsonify({"message": "Catering event deleted successfully"}), HTTP_200_OK
     except Exception as e:
         db.session.rollback()
-        return jsonify({"message": "Failed to delete event", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
\ No newline at end of file
+        return jsonify({"message": "Failed to delete event", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+# Prep list for the kitchen: portions per day and menu item across all events
+# in ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive, a week from start by
+# default) plus the regular orders already taken for those days
+@catering_event_bp.route('/production-plan', methods=['GET'])
+@jwt_required()
+def get_production_plan_report():
+    try:
+        start = datetime.fromisoformat(request.args['start']) if 'start' in request.args else datetime.utcnow()
+        start = datetime(start.year, start.month, start.day)
+        end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else start + timedelta(days=6)
+        end = datetime(end.year, end.month, end.day) + timedelta(days=1)
+    except ValueError:
+        return jsonify({"message": "Invalid date format, use YYYY-MM-DD"}), HTTP_400_BAD_REQUEST
+    if not start < end <= start + timedelta(days=current_app.config['PRODUCTION_PLAN_MAX_DAYS']):
+        return jsonify({
+            "message": f"end must be on or after start and at most {current_app.config['PRODUCTION_PLAN_MAX_DAYS']} days later"
+        }), HTTP_400_BAD_REQUEST
+
+    try:
+        return jsonify(get_production_plan(start, end)), HTTP_200_OK
+    except Exception as e:
+        return jsonify({"message": "Failed to build production plan", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -1,16 +1,52 @@
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import or_, and_
+from datetime import datetime
 from app.models.contact_model import Contact
-from app.extensions import db
-from app.status_codes import HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
+from app.utils.contact_spool import get_contact_spool
+from app.utils.contact_search import apply_search
+from app.status_codes import (
+    HTTP_200_OK, HTTP_202_ACCEPTED, HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+)
 import logging
 
 contact_bp = Blueprint("contact_bp", __name__, url_prefix="/api/v1/contact")
 
+# field -> (max length, required); lengths follow the contacts columns
+CONTACT_FIELDS = {
+    "name": (120, True),
+    "email": (120, True),
+    "phone": (50, False),
+    "service_type": (50, False),
+    "message": (5000, True),
+}
+
+
+# Submissions are only written to the table later, in batches, so anything
+# the insert would refuse has to be turned away here
+def validate_contact(data):
+    for field, (max_length, required) in CONTACT_FIELDS.items():
+        value = data.get(field)
+        if value is None or value == "":
+            if required:
+                return "Name, email, and message are required"
+            continue
+        if not isinstance(value, str):
+            return f"{field} must be a string"
+        if len(value) > max_length:
+            return f"{field} must be at most {max_length} characters"
+    return None
+
 @contact_bp.route("/", methods=["POST"])
 def submit_contact():
     data = request.get_json()
-    if not data:
+    if not data or not isinstance(data, dict):
         return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
+
+    error = validate_contact(data)
+    if error:
+        return jsonify({"message": error}), HTTP_400_BAD_REQUEST
     
     name = data.get("name")
     email = data.get("email")
@@ -18,23 +54,91 @@ def submit_contact():
     service_type = data.get("service_type")
     message = data.get("message")
     
-    if not name or not email or not message:
-        return jsonify({"message": "Name, email, and message are required"}), HTTP_400_BAD_REQUEST
-    
+    # Spooled to disk and inserted in batches by the flusher, so a burst of
+    # submissions does not take a DB connection per request
     try:
-        contact = Contact(
+        get_contact_spool().append(
             name=name,
             email=email,
             phone=phone,
             service_type=service_type,
             message=message
         )
-        db.session.add(contact)
-        db.session.commit()
         
         logging.info(f"New contact submitted by {name} ({email})")
-        return jsonify({"message": "Contact message submitted successfully"}), HTTP_201_CREATED
+        return jsonify({"message": "Contact message submitted successfully"}), HTTP_202_ACCEPTED
     except Exception as e:
-        db.session.rollback()
         logging.error(f"Error saving contact: {str(e)}")
-        return jsonify({"message": "Failed to submit contact message", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
\ No newline at end of file
+        return jsonify({"message": "Failed to submit contact message", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+
+INBOX_DEFAULT_LIMIT = 50
+INBOX_MAX_LIMIT = 200
+
+
+# Cursors are "<created_at ISO>_<id>" of the last row on the previous page
+def parse_cursor(cursor):
+    created_at, _, contact_id = cursor.rpartition("_")
+    return datetime.fromisoformat(created_at), int(contact_id)
+
+
+def make_cursor(contact):
+    return f"{contact.created_at.isoformat()}_{contact.id}"
+
+
+# Admin inbox, newest first, with keyset pagination and optional filters:
+# ?service_type=, ?email=, ?q= (full-text over name and message), ?cursor=, ?limit=
+@contact_bp.route("/", methods=["GET"])
+@jwt_required()
+def get_contacts():
+    try:
+        limit = max(1, min(int(request.args.get("limit", INBOX_DEFAULT_LIMIT)), INBOX_MAX_LIMIT))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), HTTP_400_BAD_REQUEST
+
+    query = Contact.query
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            created_at, contact_id = parse_cursor(cursor)
+        except ValueError:
+            return jsonify({"message": "Invalid cursor"}), HTTP_400_BAD_REQUEST
+        query = query.filter(or_(
+            Contact.created_at < created_at,
+            and_(Contact.created_at == created_at, Contact.id < contact_id)
+        ))
+
+    service_type = request.args.get("service_type")
+    if service_type:
+        query = query.filter(Contact.service_type == service_type)
+
+    email = request.args.get("email")
+    if email:
+        query = query.filter(Contact.email == email)
+
+    q = request.args.get("q")
+    if q:
+        query = apply_search(query, q)
+
+    try:
+        contacts = query.order_by(Contact.created_at.desc(), Contact.id.desc()).limit(limit + 1).all()
+    except Exception as e:
+        logging.error(f"Error fetching contacts: {str(e)}")
+        return jsonify({"message": "Failed to fetch contact messages", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+    return jsonify({
+        "contacts": [contact.to_dict() for contact in contacts],
+        "next_cursor": make_cursor(contacts[-1]) if has_more else None
+    }), HTTP_200_OK
+
+
+@contact_bp.route("/<int:id>", methods=["GET"])
+@jwt_required()
+def get_contact(id):
+    contact = Contact.query.get(id)
+    if not contact:
+        return jsonify({"message": "Contact message not found"}), HTTP_404_NOT_FOUND
+    return jsonify(contact.to_dict()), HTTP_200_OK
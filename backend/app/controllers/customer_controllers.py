@@ -1,12 +1,20 @@
 from flask import Blueprint, request, jsonify
 from app.models.customer_model import Customer
+from app.models.customer_segment_model import CustomerSegment
 from app.extensions import db, bcrypt
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
 from app.status_codes import (
     HTTP_400_BAD_REQUEST,
     HTTP_409_CONFLICT,
     HTTP_500_INTERNAL_SERVER_ERROR,
     HTTP_201_CREATED, HTTP_200_OK, HTTP_404_NOT_FOUND
 )
+from app.utils.http_cache import collection_validators, not_modified_response, add_validators
+from app.utils.customer_index import customer_index
+from app.utils.cache_bus import cache_bus, CUSTOMERS
+from app.utils import hot_statements
+from app.utils.query_budget import query_budget
 import re
 
 
@@ -40,7 +48,7 @@ def register_user():
     if not is_valid_email(email):
         return jsonify({'error': 'Invalid email address'}), HTTP_400_BAD_REQUEST
     
-    if Customer.query.filter_by(email=email).first():
+    if hot_statements.first("customers.by_email", email=email):
         return jsonify({'error': 'Email already in use'}), HTTP_409_CONFLICT
     
     if Customer.query.filter_by(contact=contact).first():
@@ -59,6 +67,8 @@ def register_user():
         )
         db.session.add(customer)
         db.session.commit()
+        customer_index.upsert(customer)
+        cache_bus.publish(CUSTOMERS)
         
         return jsonify({
             'message': f'{full_name} has been registered successfully',
@@ -77,7 +87,13 @@ def register_user():
         return jsonify({'error': str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
 @customer_bp.route('/', methods=['GET'])
+@query_budget(timeout_ms=2000, max_rows=1000)
 def get_customers():
+    etag, last_modified = collection_validators(Customer)
+    cached = not_modified_response(etag, last_modified)
+    if cached:
+        return cached
+
     customers = Customer.query.all()
     customer_data = [
         {
@@ -90,14 +106,68 @@ def get_customers():
             "biography": customer.biography
         } for customer in customers
     ]
-    return jsonify(customer_data), HTTP_200_OK
+    return add_validators(jsonify(customer_data), etag, last_modified), HTTP_200_OK
+
+# Typeahead for the order-taking screen: prefix match on name, email or phone
+@customer_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_customers():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"message": "Query parameter q is required"}), HTTP_400_BAD_REQUEST
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 25))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), HTTP_400_BAD_REQUEST
+
+    return jsonify(customer_index.search(q, limit)), HTTP_200_OK
+
+# RFM segments from the last `flask compute-segments` run, paginated by customer id
+@customer_bp.route('/segments', methods=['GET'])
+@jwt_required()
+def get_customer_segments():
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), 500))
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({"message": "limit and after must be integers"}), HTTP_400_BAD_REQUEST
+
+    query = CustomerSegment.query.filter(CustomerSegment.customer_id > after)
+    segment = request.args.get('segment')
+    if segment:
+        query = query.filter(CustomerSegment.segment == segment)
+
+    segments = query.order_by(CustomerSegment.customer_id).limit(limit).all()
+    return jsonify({
+        "segments": [s.to_dict() for s in segments],
+        "next_after": segments[-1].customer_id if len(segments) == limit else None
+    }), HTTP_200_OK
+
+@customer_bp.route('/segments/summary', methods=['GET'])
+@jwt_required()
+def get_customer_segment_summary():
+    rows = CustomerSegment.query.with_entities(
+        CustomerSegment.segment, func.count(), func.sum(CustomerSegment.monetary), func.max(CustomerSegment.computed_at)
+    ).group_by(CustomerSegment.segment).all()
+    return jsonify([{
+        "segment": segment,
+        "customers": count,
+        "monetary": float(monetary or 0),
+        "computed_at": computed_at.isoformat() if computed_at else None
+    } for segment, count, monetary, computed_at in rows]), HTTP_200_OK
 
 @customer_bp.route('/<int:id>', methods=['GET'])
 def get_customer(id):
     customer = Customer.query.get(id)
     if customer is None:
         return jsonify({"message": "Customer not found"}), HTTP_404_NOT_FOUND
-    return jsonify({
+
+    cached = not_modified_response(last_modified=customer.updated_at)
+    if cached:
+        return cached
+
+    return add_validators(jsonify({
         "id": customer.id,
         "full_name": customer.full_name,
         "contact": customer.contact,
@@ -105,7 +175,7 @@ def get_customer(id):
         "address": customer.address,
         "customer_type": customer.customer_type,
         "biography": customer.biography
-    }), HTTP_200_OK
+    }), last_modified=customer.updated_at), HTTP_200_OK
 
 @customer_bp.route('/<int:id>', methods=['PUT'])
 def update_customer(id):
@@ -126,6 +196,8 @@ def update_customer(id):
         customer.biography = data.get('biography', customer.biography)
         
         db.session.commit()
+        customer_index.upsert(customer)
+        cache_bus.publish(CUSTOMERS)
         return jsonify({
             "message": "Customer updated successfully",
             "customer": {
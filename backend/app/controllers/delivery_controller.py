@@ -1,14 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models.delivery_model import Delivery
 from app.extensions import db
-from app.status_codes import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+from app.utils import hot_statements
+from app.utils.http_cache import add_version_etag, check_if_match
+from app.utils.status_transitions import DELIVERY_TRANSITIONS, InvalidTransition, parse_ids, bulk_transition
+from app.utils.delivery_zones import quote_addresses, apply_quote
+from app.utils.query_budget import query_budget
+from app.models.delivery_zone_model import DeliveryZone
+from app.status_codes import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_409_CONFLICT, HTTP_500_INTERNAL_SERVER_ERROR
+from sqlalchemy.orm.exc import StaleDataError
 
 delivery_bp = Blueprint('delivery', __name__, url_prefix='/api/v1/deliveries')
 
-@delivery_bp.route('/', methods=['GET'])
-def get_all_deliveries():
-    deliveries = Delivery.query.all()
-    delivery_list = [{
+def serialize_delivery(d):
+    return {
         "delivery_id": d.delivery_id,
         "order_id": d.order_id,
         "staff_id": d.staff_id,
@@ -16,25 +21,41 @@ def get_all_deliveries():
         "delivery_type": d.delivery_type,
         "delivery_status": d.delivery_status,
         "description": d.description,
-        "delivery_date": d.delivery_date.isoformat() if d.delivery_date else None
-    } for d in deliveries]
+        "delivery_date": d.delivery_date.isoformat() if d.delivery_date else None,
+        "latitude": d.latitude,
+        "longitude": d.longitude,
+        "zone_id": d.zone_id,
+        "delivery_fee": float(d.delivery_fee) if d.delivery_fee is not None else None,
+        "version": d.version
+    }
+
+def delivery_conflict(d, status):
+    response = jsonify({
+        "message": "Delivery was modified by someone else" if status == HTTP_409_CONFLICT
+        else "If-Match header with the delivery's ETag is required",
+        "current": serialize_delivery(d)
+    })
+    return add_version_etag(response, d.version), status
+
+@delivery_bp.route('/', methods=['GET'])
+@query_budget(timeout_ms=2000, max_rows=1000)
+def get_all_deliveries():
+    deliveries = Delivery.query.all()
+    delivery_list = [serialize_delivery(d) for d in deliveries]
     return jsonify(delivery_list), HTTP_200_OK
 
 @delivery_bp.route('/<int:id>', methods=['GET'])
 def get_delivery(id):
-    d = Delivery.query.get(id)
+    d = hot_statements.first("deliveries.by_id", id=id)
     if d is None:
         return jsonify({"message": "Delivery not found"}), HTTP_404_NOT_FOUND
-    return jsonify({
-        "delivery_id": d.delivery_id,
-        "order_id": d.order_id,
-        "staff_id": d.staff_id,
-        "delivery_address": d.delivery_address,
-        "delivery_type": d.delivery_type,
-        "delivery_status": d.delivery_status,
-        "description": d.description,
-        "delivery_date": d.delivery_date.isoformat() if d.delivery_date else None
-    }), HTTP_200_OK
+    return add_version_etag(jsonify(serialize_delivery(d)), d.version), HTTP_200_OK
+
+# A driver's run sheet, newest first
+@delivery_bp.route('/staff/<int:staff_id>', methods=['GET'])
+def get_staff_deliveries(staff_id):
+    deliveries = hot_statements.scalars("deliveries.by_staff", staff_id=staff_id).all()
+    return jsonify([serialize_delivery(d) for d in deliveries]), HTTP_200_OK
 
 @delivery_bp.route('/register', methods=['POST'])
 def create_delivery():
@@ -56,35 +77,37 @@ def create_delivery():
             delivery_status=data['delivery_status'],
             description=data.get('description')
         )
+        apply_quote(new_delivery, quote_addresses([new_delivery.delivery_address])[0])
         db.session.add(new_delivery)
         db.session.commit()
-        return jsonify({
+        return add_version_etag(jsonify({
             "message": "Delivery created successfully",
-            "delivery": {
-                "delivery_id": new_delivery.delivery_id,
-                "order_id": new_delivery.order_id,
-                "staff_id": new_delivery.staff_id,
-                "delivery_address": new_delivery.delivery_address,
-                "delivery_type": new_delivery.delivery_type,
-                "delivery_status": new_delivery.delivery_status,
-                "description": new_delivery.description,
-                "delivery_date": new_delivery.delivery_date.isoformat()
-            }
-        }), HTTP_201_CREATED
+            "delivery": serialize_delivery(new_delivery)
+        }), new_delivery.version), HTTP_201_CREATED
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to create delivery", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+# Requires If-Match with the ETag from GET; a stale version gets 409 and the current state
 @delivery_bp.route('/<int:id>', methods=['PUT'])
 def update_delivery(id):
-    d = Delivery.query.get(id)
+    d = hot_statements.first("deliveries.by_id", id=id)
     if not d:
         return jsonify({"message": "Delivery not found"}), HTTP_404_NOT_FOUND
     
+    precondition = check_if_match(d.version)
+    if precondition:
+        return delivery_conflict(d, precondition)
+    
     data = request.get_json()
     if not data:
         return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
     
+    # Quoted before any attribute changes so no pending UPDATE is flushed early
+    quote = None
+    if data.get('delivery_address', d.delivery_address) != d.delivery_address:
+        quote = quote_addresses([data['delivery_address']])[0]
+    
     d.order_id = data.get('order_id', d.order_id)
     d.staff_id = data.get('staff_id', d.staff_id)
     d.delivery_address = data.get('delivery_address', d.delivery_address)
@@ -93,27 +116,76 @@ def update_delivery(id):
     d.description = data.get('description', d.description)
     
     try:
+        if quote:
+            apply_quote(d, quote)
         db.session.commit()
-        return jsonify({
+        return add_version_etag(jsonify({
             "message": "Delivery updated successfully",
-            "delivery": {
-                "delivery_id": d.delivery_id,
-                "order_id": d.order_id,
-                "staff_id": d.staff_id,
-                "delivery_address": d.delivery_address,
-                "delivery_type": d.delivery_type,
-                "delivery_status": d.delivery_status,
-                "description": d.description,
-                "delivery_date": d.delivery_date.isoformat()
-            }
-        }), HTTP_200_OK
+            "delivery": serialize_delivery(d)
+        }), d.version), HTTP_200_OK
+    except StaleDataError:
+        # Another writer committed between our read and our UPDATE
+        db.session.rollback()
+        return delivery_conflict(hot_statements.first("deliveries.by_id", id=id), HTTP_409_CONFLICT)
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to update delivery", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+# End of a run: {"ids": [3, 4, 5], "delivery_status": "delivered"} in one UPDATE and one commit
+@delivery_bp.route('/bulk-status', methods=['POST'])
+def bulk_update_delivery_status():
+    data = request.get_json()
+    if not data or not isinstance(data.get('delivery_status'), str):
+        return jsonify({"message": "delivery_status is required"}), HTTP_400_BAD_REQUEST
+    
+    try:
+        ids = parse_ids(data.get('ids'), current_app.config['BULK_STATUS_MAX_IDS'])
+        results = bulk_transition(Delivery, Delivery.delivery_id, Delivery.delivery_status,
+                                  DELIVERY_TRANSITIONS, ids, data['delivery_status'])
+        db.session.commit()
+    except InvalidTransition as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to update deliveries", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+    
+    return jsonify({
+        "message": "Bulk status update applied",
+        "updated": sum(1 for r in results.values() if r["status"] == "updated"),
+        "results": [dict(delivery_id=i, **results[i]) for i in ids]
+    }), HTTP_200_OK
+
+# Zone and fee for up to DELIVERY_QUOTE_MAX_ADDRESSES addresses in one call:
+# {"addresses": [...]} -> quotes in the same order
+@delivery_bp.route('/quote', methods=['POST'])
+def quote_deliveries():
+    data = request.get_json()
+    addresses = data.get('addresses') if data else None
+    if not isinstance(addresses, list) or not addresses:
+        return jsonify({"message": "addresses must be a non-empty list"}), HTTP_400_BAD_REQUEST
+    limit = current_app.config['DELIVERY_QUOTE_MAX_ADDRESSES']
+    if len(addresses) > limit:
+        return jsonify({"message": f"At most {limit} addresses per request"}), HTTP_400_BAD_REQUEST
+    
+    try:
+        quotes = quote_addresses([a if isinstance(a, str) else None for a in addresses])
+    except Exception as e:
+        return jsonify({"message": "Failed to quote deliveries", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+    
+    return jsonify({
+        "quotes": quotes,
+        "quoted": sum(1 for q in quotes if q["fee"] is not None)
+    }), HTTP_200_OK
+
+@delivery_bp.route('/zones', methods=['GET'])
+def get_delivery_zones():
+    zones = DeliveryZone.query.filter_by(active=True).order_by(DeliveryZone.name).all()
+    return jsonify([zone.to_dict() for zone in zones]), HTTP_200_OK
+
 @delivery_bp.route('/<int:id>', methods=['DELETE'])
 def delete_delivery(id):
-    d = Delivery.query.get(id)
+    d = hot_statements.first("deliveries.by_id", id=id)
     if d is None:
         return jsonify({"message": "Delivery not found"}), HTTP_404_NOT_FOUND
     
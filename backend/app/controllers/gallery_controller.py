@@ -1,11 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from app.models.gallery_model import GalleryImage
 from app.extensions import db
+from app.utils.cache_bus import cache_bus, GALLERY
+from app.utils.media_store import (
+    MEDIA_GALLERY, UploadRejected, receive_upload, store_upload, retain_asset, release_asset, remove_files
+)
 import logging
 import os
 
 gallery_bp = Blueprint("gallery_bp", __name__, url_prefix="/api/v1/gallery")
 
+# Per-worker copy of the gallery, dropped on every worker when GALLERY is published
+gallery_cache = cache_bus.region_cache(GALLERY)
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -13,16 +21,17 @@ logger = logging.getLogger(__name__)
 # Get all images
 @gallery_bp.route("/", methods=["GET"])
 def get_images():
-    try:
-        images = GalleryImage.query.all()
+    def load_images():
         formatted_images = []
-        for img in images:
+        for img in GalleryImage.query.all():
             image_data = img.to_dict()
             # Construct URL using /static/gallery/ path
             image_data['image_url'] = f'/static/gallery/{os.path.basename(img.image_url)}'
             formatted_images.append(image_data)
-        
-        return jsonify(formatted_images), 200
+        return formatted_images
+    
+    try:
+        return jsonify(gallery_cache.get_or_compute('all', load_images)), 200
     except Exception as e:
         logger.error(f"Error fetching gallery images: {str(e)}")
         return jsonify({"error": "Failed to fetch images", "details": str(e)}), 500
@@ -44,7 +53,10 @@ def add_image():
         )
         
         db.session.add(new_image)
+        # Another row for an uploaded file keeps it on disk until both are gone
+        retain_asset(MEDIA_GALLERY, filename)
         db.session.commit()
+        cache_bus.publish(GALLERY)
         
         # Return with correct URL
         response_data = new_image.to_dict()
@@ -56,6 +68,38 @@ def add_image():
         logger.error(f"Error adding gallery image: {str(e)}")
         return jsonify({"error": "Failed to add image", "details": str(e)}), 500
 
+# Upload an image file (multipart/form-data: image, title, description).
+# Identical files are stored once, under their content hash.
+@gallery_bp.route("/upload", methods=["POST"])
+@jwt_required()
+def upload_image():
+    try:
+        form, upload = receive_upload(MEDIA_GALLERY)
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    try:
+        asset = store_upload(MEDIA_GALLERY, upload)
+        new_image = GalleryImage(
+            title=form.get("title") or "Untitled",
+            image_url=asset.filename,
+            description=form.get("description", "")
+        )
+        db.session.add(new_image)
+        db.session.commit()
+        upload.place()
+        cache_bus.publish(GALLERY)
+
+        response_data = new_image.to_dict()
+        response_data['image_url'] = f'/static/gallery/{asset.filename}'
+        response_data['asset'] = asset.to_dict()
+        return jsonify(response_data), 201
+    except Exception as e:
+        db.session.rollback()
+        upload.discard()
+        logger.error(f"Error uploading gallery image: {str(e)}")
+        return jsonify({"error": "Failed to upload image", "details": str(e)}), 500
+
 # Delete image
 @gallery_bp.route("/<int:id>", methods=["DELETE"])
 def delete_image(id):
@@ -64,13 +108,18 @@ def delete_image(id):
         if not image:
             return jsonify({"error": "Image not found"}), 404
             
-        # Remove file from disk
-        file_path = os.path.join(os.getcwd(), "app", "static", "gallery", image.image_url)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Uploaded files go once no image uses them; files put in static/
+        # by hand once no other gallery row names them
+        managed, file_path = release_asset(MEDIA_GALLERY, image.image_url)
+        if not managed and not GalleryImage.query.filter(
+            GalleryImage.image_url == image.image_url, GalleryImage.id != image.id
+        ).first():
+            file_path = os.path.join(current_app.static_folder, "gallery", os.path.basename(image.image_url))
             
         db.session.delete(image)
         db.session.commit()
+        cache_bus.publish(GALLERY)
+        remove_files(MEDIA_GALLERY, [file_path])
         
         return jsonify({"message": "Image deleted successfully"}), 200
     except Exception as e:
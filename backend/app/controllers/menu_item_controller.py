@@ -1,11 +1,23 @@
 from flask import Blueprint, request, jsonify
 from app.models.menu_item_model import MenuItem
 from app.extensions import db
+from app.utils import hot_statements
 from app.status_codes import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+from app.utils.http_cache import collection_validators, not_modified_response, add_validators
+from app.utils.sync import record_tombstone
+from app.utils.stock import restock
+from app.utils.cache_bus import cache_bus, MENU_ITEMS, MENU_PRICES, CATERING_EVENTS
+from app.utils.menu_pricing import get_price_book, price_at, start_price_history, set_price
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+import hashlib
 import logging
 
 menu_item_bp = Blueprint('menu_item', __name__, url_prefix='/api/v1/menu-items')
 
+# Per-worker copy of the menu, dropped on every worker when MENU_ITEMS is published
+menu_cache = cache_bus.region_cache(MENU_ITEMS)
+
 @menu_item_bp.route('/populate', methods=['POST'])
 def populate_menu_items():
     default_items = [
@@ -37,27 +49,48 @@ def populate_menu_items():
                     available=True,
                     image_key=item.get("image_key")
                 )
+                start_price_history(menu_item)
                 db.session.add(menu_item)
         db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
+        cache_bus.publish(MENU_PRICES)
         return jsonify({"message": "Default menu items populated successfully"}), HTTP_201_CREATED
     except Exception as e:
         db.session.rollback()
         logging.error(f"Error populating menu items: {str(e)}", exc_info=True)
         return jsonify({"message": "Failed to populate menu items", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+def load_menu():
+    etag, last_modified = collection_validators(MenuItem)
+    now = datetime.utcnow()
+    switch = get_price_book().last_switch(now)
+    if switch:
+        # A scheduled price taking effect changes the menu without any row write
+        etag = hashlib.md5(f"{etag}:{switch.isoformat()}".encode("utf-8")).hexdigest()
+        last_modified = max(last_modified, switch) if last_modified else switch
+    items = [{
+        "id": item.id,
+        "name": item.name,
+        "category": item.category,
+        "price": float(price_at(item, now)),
+        "description": item.description,
+        "available": item.available,
+        "stock": item.stock,
+        "image_key": item.image_key
+    } for item in hot_statements.scalars("menu_items.all")]
+    return etag, last_modified, items
+
 @menu_item_bp.route('', methods=['GET'], strict_slashes=False)
 def get_all_menu_items():
     try:
-        items = MenuItem.query.all()
-        return jsonify([{
-            "id": item.id,
-            "name": item.name,
-            "category": item.category,
-            "price": float(item.price),
-            "description": item.description,
-            "available": item.available,
-            "image_key": item.image_key
-        } for item in items]), HTTP_200_OK
+        # Keyed by the last price switch so scheduled prices show up on time
+        key = ('all', get_price_book().last_switch(datetime.utcnow()))
+        etag, last_modified, items = menu_cache.get_or_compute(key, load_menu)
+        cached = not_modified_response(etag, last_modified)
+        if cached:
+            return cached
+
+        return add_validators(jsonify(items), etag, last_modified), HTTP_200_OK
     except Exception as e:
         logging.error(f"Error fetching menu items: {str(e)}", exc_info=True)
         return jsonify({"message": "Error fetching menu items", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -65,19 +98,27 @@ def get_all_menu_items():
 @menu_item_bp.route('/<int:id>', methods=['GET'])
 def get_menu_item(id):
     try:
-        item = MenuItem.query.get(id)
+        item = hot_statements.first("menu_items.by_id", id=id)
         if not item:
             return jsonify({"message": "Menu item not found"}), HTTP_404_NOT_FOUND
         
-        return jsonify({
+        now = datetime.utcnow()
+        price_since = get_price_book().price_since(item.id, now)
+        last_modified = max(item.updated_at, price_since) if price_since else item.updated_at
+        cached = not_modified_response(last_modified=last_modified)
+        if cached:
+            return cached
+
+        return add_validators(jsonify({
             "id": item.id,
             "name": item.name,
             "category": item.category,
-            "price": float(item.price),
+            "price": float(price_at(item, now)),
             "description": item.description,
             "available": item.available,
+            "stock": item.stock,
             "image_key": item.image_key
-        }), HTTP_200_OK
+        }), last_modified=last_modified), HTTP_200_OK
     except Exception as e:
         logging.error(f"Error fetching menu item {id}: {str(e)}", exc_info=True)
         return jsonify({"message": "Error fetching menu item", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -95,10 +136,14 @@ def create_menu_item():
             price=data['price'],
             description=data.get('description', ''),
             available=data.get('available', True),
-            image_key=data.get('image_key', 'meal1.jpg')
+            image_key=data.get('image_key', 'meal1.jpg'),
+            stock=data.get('stock')
         )
+        start_price_history(new_item)
         db.session.add(new_item)
         db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
+        cache_bus.publish(MENU_PRICES)
         return jsonify({
             "message": "Menu item created",
             "menu_item": {
@@ -108,6 +153,7 @@ def create_menu_item():
                 "price": float(new_item.price),
                 "description": new_item.description,
                 "available": new_item.available,
+                "stock": new_item.stock,
                 "image_key": new_item.image_key
             }
         }), HTTP_201_CREATED
@@ -127,23 +173,67 @@ def update_menu_item(id):
         if not data:
             return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
         
+        # price_effective_from (ISO time) schedules the new price instead of
+        # applying it now
+        effective_from = data.get('price_effective_from')
+        if effective_from:
+            try:
+                effective_from = datetime.fromisoformat(effective_from)
+            except (TypeError, ValueError):
+                return jsonify({"message": "price_effective_from must be an ISO 8601 time"}), HTTP_400_BAD_REQUEST
+            if effective_from.tzinfo is not None:
+                effective_from = effective_from.astimezone(timezone.utc).replace(tzinfo=None)
+
+        if 'price' in data:
+            try:
+                price = Decimal(str(data['price']))
+            except InvalidOperation:
+                price = None
+            if isinstance(data['price'], bool) or price is None or not price.is_finite() or price < 0:
+                return jsonify({"message": "price must be a number of at least 0"}), HTTP_400_BAD_REQUEST
+
+        # null stops tracking stock for the item
+        stock = data.get('stock')
+        if stock is not None and (not isinstance(stock, int) or isinstance(stock, bool) or stock < 0):
+            return jsonify({"message": "stock must be an integer of at least 0, or null"}), HTTP_400_BAD_REQUEST
+        
+        # Names and categories are shown in the cached production plans
+        renamed = data.get('name', item.name) != item.name or data.get('category', item.category) != item.category
         item.name = data.get('name', item.name)
         item.category = data.get('category', item.category)
-        item.price = data.get('price', item.price)
+        if 'price' in data:
+            set_price(item, price, effective_from)
         item.description = data.get('description', item.description)
         item.available = data.get('available', item.available)
         item.image_key = data.get('image_key', item.image_key)
+        # Only written when sent, so a menu edit never overwrites stock taken
+        # by orders placed since the item was loaded. Set through restock so
+        # `available` follows it the same way
+        if 'stock' in data:
+            if stock is None:
+                item.stock = None
+            else:
+                restock([{"id": item.id, "stock": stock}])
+                db.session.refresh(item)
+                if 'available' in data:
+                    item.available = data['available']
         
         db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
+        if 'price' in data:
+            cache_bus.publish(MENU_PRICES)
+        if renamed:
+            cache_bus.publish(CATERING_EVENTS)
         return jsonify({
             "message": "Menu item updated",
             "menu_item": {
                 "id": item.id,
                 "name": item.name,
                 "category": item.category,
-                "price": float(item.price),
+                "price": float(price_at(item)),
                 "description": item.description,
                 "available": item.available,
+                "stock": item.stock,
                 "image_key": item.image_key
             }
         }), HTTP_200_OK
@@ -152,6 +242,60 @@ def update_menu_item(id):
         logging.error(f"Error updating menu item {id}: {str(e)}", exc_info=True)
         return jsonify({"message": "Failed to update menu item", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
+# Bulk restock: {"items": [{"id": 1, "stock": 40}, {"id": 2, "add": 10}]}
+@menu_item_bp.route('/restock', methods=['POST'])
+def restock_menu_items():
+    data = request.get_json()
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return jsonify({"message": "items must be a non-empty list"}), HTTP_400_BAD_REQUEST
+
+    for entry in data['items']:
+        if (
+            not isinstance(entry, dict)
+            or not isinstance(entry.get('id'), int)
+            or isinstance(entry['id'], bool)
+            or ('stock' in entry) == ('add' in entry)
+        ):
+            return jsonify({"message": "Each item needs an id and exactly one of stock or add"}), HTTP_400_BAD_REQUEST
+        amount = entry.get('stock', entry.get('add'))
+        # bool is an int subclass; add must be positive, stock may be zero
+        if (
+            not isinstance(amount, int)
+            or isinstance(amount, bool)
+            or ('stock' in entry and amount < 0)
+            or ('add' in entry and amount <= 0)
+        ):
+            return jsonify({"message": f"Invalid stock amount for menu item {entry['id']}"}), HTTP_400_BAD_REQUEST
+
+    try:
+        missing = restock(data['items'])
+        db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
+        return jsonify({"message": "Menu items restocked", "not_found": missing}), HTTP_200_OK
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error restocking menu items: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to restock menu items", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+# Price timeline, including scheduled changes
+@menu_item_bp.route('/<int:id>/prices', methods=['GET'])
+def get_menu_item_prices(id):
+    item = MenuItem.query.get(id)
+    if not item:
+        return jsonify({"message": "Menu item not found"}), HTTP_404_NOT_FOUND
+    
+    now = datetime.utcnow()
+    current_since = get_price_book().price_since(item.id, now)
+    return jsonify({
+        "menu_item_id": item.id,
+        "current_price": float(price_at(item, now)),
+        "prices": [
+            dict(row.to_dict(), status="scheduled" if row.effective_from > now
+                 else "current" if row.effective_from == current_since else "past")
+            for row in item.prices
+        ]
+    }), HTTP_200_OK
+
 @menu_item_bp.route('/<int:id>', methods=['DELETE'])
 def delete_menu_item(id):
     try:
@@ -160,7 +304,11 @@ def delete_menu_item(id):
             return jsonify({"message": "Menu item not found"}), HTTP_404_NOT_FOUND
         
         db.session.delete(item)
+        record_tombstone('menu_item', item.id)
         db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
+        cache_bus.publish(MENU_PRICES)
+        cache_bus.publish(CATERING_EVENTS)
         return jsonify({"message": "Deleted successfully"}), HTTP_200_OK
     except Exception as e:
         db.session.rollback()
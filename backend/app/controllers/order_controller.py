@@ -1,33 +1,52 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.extensions import db
+from app.utils import hot_statements
 from app.models.order_model import Order
+from app.models.archive_model import ArchivedOrder
 from app.models.customer_model import Customer
 from app.models.admin_user_model import AdminUser as User
+from app.utils.http_cache import add_version_etag, check_if_match
+from app.utils.query_budget import query_budget
+from app.utils.status_transitions import (
+    DELIVERY_TRANSITIONS, PAYMENT_TRANSITIONS, InvalidTransition, parse_ids, bulk_transition
+)
 from app.status_codes import (
     HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST,
-    HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+    HTTP_404_NOT_FOUND, HTTP_409_CONFLICT, HTTP_500_INTERNAL_SERVER_ERROR
 )
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime
 
 order_bp = Blueprint('order', __name__, url_prefix='/api/v1/orders')
 
-# GET all orders
+def include_archived():
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+def serialize_order(o):
+    return {
+        "id": o.id,
+        "customer_id": o.customer_id,
+        "user_id": o.handler_id,
+        "order_date": o.order_date.isoformat(),
+        "total_amount": str(o.total_amount),
+        "payment_status": o.payment_status,
+        "delivery_status": o.delivery_status,
+        "description": o.description,
+        "version": getattr(o, 'version', None)
+    }
+
+
+# GET all orders (hot set only unless ?include_archived=true)
 @order_bp.route('/', methods=['GET'])
+@query_budget(timeout_ms=2000, max_rows=1000)
 def get_all_orders():
     orders = Order.query.all()
-    result = []
-
-    for o in orders:
-        result.append({
-            "id": o.id,
-            "customer_id": o.customer_id,
-            "user_id": o.user_id,
-            "order_date": o.order_date.isoformat(),
-            "total_amount": str(o.total_amount),
-            "payment_status": o.payment_status,
-            "delivery_status": o.delivery_status,
-            "description": o.description
-        })
+    result = [serialize_order(o) for o in orders]
+
+    if include_archived():
+        archived = ArchivedOrder.query.order_by(ArchivedOrder.order_date).all()
+        result = [serialize_order(o) for o in archived] + result
 
     return jsonify(result), HTTP_200_OK
 
@@ -35,20 +54,16 @@ def get_all_orders():
 # GET one order
 @order_bp.route('/<int:id>', methods=['GET'])
 def get_order(id):
-    order = Order.query.get(id)
+    order = hot_statements.first("orders.by_id", id=id)
+    if not order and include_archived():
+        order = ArchivedOrder.query.get(id)
     if not order:
         return jsonify({"message": "Order not found"}), HTTP_404_NOT_FOUND
 
-    return jsonify({
-        "id": order.id,
-        "customer_id": order.customer_id,
-        "user_id": order.user_id,
-        "order_date": order.order_date.isoformat(),
-        "total_amount": str(order.total_amount),
-        "payment_status": order.payment_status,
-        "delivery_status": order.delivery_status,
-        "description": order.description
-    }), HTTP_200_OK
+    response = jsonify(serialize_order(order))
+    if isinstance(order, Order):
+        add_version_etag(response, order.version)
+    return response, HTTP_200_OK
 
 
 # CREATE a new order
@@ -74,7 +89,7 @@ def create_order():
     try:
         new_order = Order(
             customer_id=data['customer_id'],
-            user_id=data.get('user_id'),
+            handler_id=data.get('user_id'),
             total_amount=data['total_amount'],
             payment_status=data['payment_status'],
             delivery_status=data['delivery_status'],
@@ -84,38 +99,42 @@ def create_order():
         db.session.add(new_order)
         db.session.commit()
 
-        return jsonify({
+        return add_version_etag(jsonify({
             "message": "Order created successfully",
-            "order": {
-                "id": new_order.id,
-                "customer_id": new_order.customer_id,
-                "user_id": new_order.user_id,
-                "order_date": new_order.order_date.isoformat(),
-                "total_amount": str(new_order.total_amount),
-                "payment_status": new_order.payment_status,
-                "delivery_status": new_order.delivery_status,
-                "description": new_order.description
-            }
-        }), HTTP_201_CREATED
+            "order": serialize_order(new_order)
+        }), new_order.version), HTTP_201_CREATED
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to create order", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
 
-# UPDATE an order
+def order_conflict(order, status):
+    response = jsonify({
+        "message": "Order was modified by someone else" if status == HTTP_409_CONFLICT
+        else "If-Match header with the order's ETag is required",
+        "current": serialize_order(order)
+    })
+    return add_version_etag(response, order.version), status
+
+
+# UPDATE an order (requires If-Match with the ETag from GET)
 @order_bp.route('/<int:id>', methods=['PUT'])
 def update_order(id):
-    order = Order.query.get(id)
+    order = hot_statements.first("orders.by_id", id=id)
     if not order:
         return jsonify({"message": "Order not found"}), HTTP_404_NOT_FOUND
 
+    precondition = check_if_match(order.version)
+    if precondition:
+        return order_conflict(order, precondition)
+
     data = request.get_json()
     if not data:
         return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
 
     order.customer_id = data.get('customer_id', order.customer_id)
-    order.user_id = data.get('user_id', order.user_id)
+    order.handler_id = data.get('user_id', order.handler_id)
     order.total_amount = data.get('total_amount', order.total_amount)
     order.payment_status = data.get('payment_status', order.payment_status)
     order.delivery_status = data.get('delivery_status', order.delivery_status)
@@ -123,16 +142,58 @@ def update_order(id):
 
     try:
         db.session.commit()
-        return jsonify({"message": "Order updated successfully"}), HTTP_200_OK
+        return add_version_etag(jsonify({
+            "message": "Order updated successfully",
+            "order": serialize_order(order)
+        }), order.version), HTTP_200_OK
+    except StaleDataError:
+        # Another writer committed between our read and our UPDATE
+        db.session.rollback()
+        return order_conflict(hot_statements.first("orders.by_id", id=id), HTTP_409_CONFLICT)
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to update order", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
 
 
+# BULK status change: {"ids": [1, 2], "delivery_status": "preparing"} or
+# {"ids": [...], "payment_status": "paid"}; one UPDATE and one commit for all ids
+@order_bp.route('/bulk-status', methods=['POST'])
+def bulk_update_order_status():
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "No input data provided"}), HTTP_400_BAD_REQUEST
+    if ('delivery_status' in data) == ('payment_status' in data):
+        return jsonify({"message": "Provide exactly one of delivery_status or payment_status"}), HTTP_400_BAD_REQUEST
+
+    if 'delivery_status' in data:
+        field, column, transitions = 'delivery_status', Order.delivery_status, DELIVERY_TRANSITIONS
+    else:
+        field, column, transitions = 'payment_status', Order.payment_status, PAYMENT_TRANSITIONS
+
+    try:
+        ids = parse_ids(data.get('ids'), current_app.config['BULK_STATUS_MAX_IDS'])
+        if not isinstance(data[field], str):
+            raise InvalidTransition(f"{field} must be a string")
+        results = bulk_transition(Order, Order.id, column, transitions, ids, data[field])
+        db.session.commit()
+    except InvalidTransition as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to update orders", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+    return jsonify({
+        "message": "Bulk status update applied",
+        "updated": sum(1 for r in results.values() if r["status"] == "updated"),
+        "results": [dict(id=i, **results[i]) for i in ids]
+    }), HTTP_200_OK
+
+
 # DELETE an order
 @order_bp.route('/<int:id>', methods=['DELETE'])
 def delete_order(id):
-    order = Order.query.get(id)
+    order = hot_statements.first("orders.by_id", id=id)
     if not order:
         return jsonify({"message": "Order not found"}), HTTP_404_NOT_FOUND
 
@@ -2,18 +2,26 @@
 
 from flask import Blueprint, request, jsonify
 from app.extensions import db
+from app.utils import hot_statements
 from app.models.order_item_model import OrderItem
-from app.models.menu_item_model import MenuItem
-from app.models.order_model import Order
+from app.utils.stock import reserve_stock, release_stock, adjust_reservation, OutOfStock
+from app.utils.cache_bus import cache_bus, MENU_ITEMS
+from app.utils.menu_pricing import price_at
+from app.utils.query_budget import query_budget
 from app.status_codes import (
     HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST,
-    HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+    HTTP_404_NOT_FOUND, HTTP_409_CONFLICT, HTTP_500_INTERNAL_SERVER_ERROR
 )
 
 order_item_bp = Blueprint('order_item', __name__, url_prefix='/api/v1/order-items')
 
+
+def is_valid_quantity(quantity):
+    return isinstance(quantity, int) and not isinstance(quantity, bool) and quantity > 0
+
 # GET all order items
 @order_item_bp.route('/', methods=['GET'])
+@query_budget(timeout_ms=2000, max_rows=1000)
 def get_all_order_items():
     items = OrderItem.query.all()
     return jsonify([{
@@ -52,19 +60,24 @@ def create_order_item():
 
     if not order_id or not menu_item_id or not quantity:
         return jsonify({"message": "Missing required fields"}), HTTP_400_BAD_REQUEST
+    if not is_valid_quantity(quantity):
+        return jsonify({"message": "quantity must be a positive integer"}), HTTP_400_BAD_REQUEST
 
     # Validate existence of menu item and order
-    order = Order.query.get(order_id)
-    menu_item = MenuItem.query.get(menu_item_id)
+    order = hot_statements.first("orders.by_id", id=order_id)
+    menu_item = hot_statements.first("menu_items.by_id", id=menu_item_id)
 
     if not order:
         return jsonify({"error": "Invalid order_id: order does not exist"}), HTTP_400_BAD_REQUEST
     if not menu_item:
         return jsonify({"error": "Invalid menu_item_id: menu item does not exist"}), HTTP_400_BAD_REQUEST
 
-    subtotal = float(menu_item.price) * int(quantity)
+    # Priced as of the order, so a later or scheduled price change never applies
+    subtotal = float(price_at(menu_item, order.order_date)) * int(quantity)
 
     try:
+        # Reserved right before the commit so the row lock is held only briefly
+        reserve_stock(menu_item_id, int(quantity))
         new_item = OrderItem(
             order_id=order_id,
             menu_item_id=menu_item_id,
@@ -73,6 +86,11 @@ def create_order_item():
         )
         db.session.add(new_item)
         db.session.commit()
+        # Stock is part of the cached menu
+        cache_bus.publish(MENU_ITEMS)
+    except OutOfStock as e:
+        db.session.rollback()
+        return jsonify({"message": "Menu item is unavailable or out of stock", "error": str(e)}), HTTP_409_CONFLICT
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to create order item", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -102,18 +120,23 @@ def update_order_item(id):
 
     new_quantity = data.get('quantity', item.quantity)
     new_menu_item_id = data.get('menu_item_id', item.menu_item_id)
+    if not is_valid_quantity(new_quantity):
+        return jsonify({"message": "quantity must be a positive integer"}), HTTP_400_BAD_REQUEST
 
     # Fetch new or current menu item
-    menu_item = MenuItem.query.get(new_menu_item_id)
+    menu_item = hot_statements.first("menu_items.by_id", id=new_menu_item_id)
     if not menu_item:
         return jsonify({"error": "Invalid menu_item_id: menu item does not exist"}), HTTP_400_BAD_REQUEST
 
+    old_menu_item_id, old_quantity = item.menu_item_id, item.quantity
     item.menu_item_id = new_menu_item_id
     item.quantity = new_quantity
-    item.subtotal = float(menu_item.price) * int(new_quantity)
+    item.subtotal = float(price_at(menu_item, item.order.order_date)) * int(new_quantity)
 
     try:
+        adjust_reservation(old_menu_item_id, old_quantity, new_menu_item_id, int(new_quantity))
         db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
         return jsonify({
             "message": "Order item updated successfully",
             "order_item": {
@@ -124,6 +147,9 @@ def update_order_item(id):
                 "subtotal": float(item.subtotal)
             }
         }), HTTP_200_OK
+    except OutOfStock as e:
+        db.session.rollback()
+        return jsonify({"message": "Menu item is unavailable or out of stock", "error": str(e)}), HTTP_409_CONFLICT
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to update order item", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
@@ -137,8 +163,10 @@ def delete_order_item(id):
         return jsonify({"message": "Order item not found"}), HTTP_404_NOT_FOUND
 
     try:
+        release_stock(item.menu_item_id, item.quantity)
         db.session.delete(item)
         db.session.commit()
+        cache_bus.publish(MENU_ITEMS)
         return jsonify({"message": "Order item deleted successfully"}), HTTP_200_OK
     except Exception as e:
         db.session.rollback()
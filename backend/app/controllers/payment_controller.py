@@ -0,0 +1,132 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.models.payment_model import PaymentRequest, PaymentStatement, PaymentTransaction
+from app.extensions import db
+from app.utils.payment_reconciliation import StatementError, reconcile_statement
+from app.status_codes import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+from decimal import Decimal, InvalidOperation
+import logging
+import secrets
+
+payment_bp = Blueprint('payment', __name__, url_prefix='/api/v1/payments')
+
+PAYMENT_METHODS = ("airtel", "mtn")
+EXCEPTIONS_DEFAULT_LIMIT = 100
+EXCEPTIONS_MAX_LIMIT = 1000
+# Bounds of the payment_requests columns, checked up front so a bad value
+# gets a 400 rather than failing at commit
+MAX_AMOUNT = Decimal("99999999.99")
+MAX_PHONE_LENGTH = 30
+
+logger = logging.getLogger(__name__)
+
+# Checkout: records the payment the customer is about to make and hands back
+# the reference to quote on the mobile money transaction.
+# Also served at /api/payments for the checkout page.
+@payment_bp.route('/', methods=['POST'])
+def create_payment():
+    data = request.get_json() or {}
+    method = str(data.get('method', '')).lower()
+    if method not in PAYMENT_METHODS:
+        return jsonify({"message": f"method must be one of: {', '.join(PAYMENT_METHODS)}"}), HTTP_400_BAD_REQUEST
+    if not data.get('phone'):
+        return jsonify({"message": "phone is required"}), HTTP_400_BAD_REQUEST
+    phone = str(data['phone']).strip()
+    if len(phone) > MAX_PHONE_LENGTH:
+        return jsonify({"message": f"phone must be at most {MAX_PHONE_LENGTH} characters"}), HTTP_400_BAD_REQUEST
+    try:
+        amount = Decimal(str(data.get('amount')))
+        if not amount.is_finite() or amount <= 0:
+            raise InvalidOperation
+    except InvalidOperation:
+        return jsonify({"message": "amount must be a positive number"}), HTTP_400_BAD_REQUEST
+    if amount > MAX_AMOUNT:
+        return jsonify({"message": f"amount must be at most {MAX_AMOUNT}"}), HTTP_400_BAD_REQUEST
+    amount = amount.quantize(Decimal("0.01"))
+    order_id = data.get('order_id')
+    if order_id is not None and (not isinstance(order_id, int) or isinstance(order_id, bool)):
+        return jsonify({"message": "order_id must be an integer"}), HTTP_400_BAD_REQUEST
+
+    try:
+        payment = PaymentRequest(
+            reference=f"JIL{secrets.token_hex(5).upper()}",
+            order_id=order_id,
+            method=method,
+            phone=phone,
+            amount=amount
+        )
+        db.session.add(payment)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to start payment", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+    return jsonify({
+        "message": f"Payment request created. Use reference {payment.reference} when paying.",
+        "transactionId": payment.reference,
+        "payment": payment.to_dict()
+    }), HTTP_201_CREATED
+
+# Upload a provider statement as multipart `file` or a raw text/csv body;
+# ?provider= (or form field) names the provider
+@payment_bp.route('/statements', methods=['POST'])
+@jwt_required()
+def upload_statement():
+    provider = (request.form.get('provider') or request.args.get('provider') or '').lower()
+    if provider not in PAYMENT_METHODS:
+        return jsonify({"message": f"provider must be one of: {', '.join(PAYMENT_METHODS)}"}), HTTP_400_BAD_REQUEST
+
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename = upload.stream, upload.filename
+    elif request.mimetype in ('text/csv', 'application/octet-stream'):
+        stream, filename = request.stream, None
+    else:
+        return jsonify({"message": "Statement file is required"}), HTTP_400_BAD_REQUEST
+
+    try:
+        statement = reconcile_statement(stream, provider, filename)
+    except (StatementError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error reconciling {provider} statement: {str(e)}")
+        return jsonify({"message": "Failed to reconcile statement", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+    return jsonify(statement.to_dict()), HTTP_201_CREATED
+
+@payment_bp.route('/statements/<int:id>', methods=['GET'])
+@jwt_required()
+def get_statement(id):
+    statement = PaymentStatement.query.get(id)
+    if statement is None:
+        return jsonify({"message": "Statement not found"}), HTTP_404_NOT_FOUND
+    return jsonify(statement.to_dict()), HTTP_200_OK
+
+# Exceptions report: unmatched statement transactions, oldest first, with
+# keyset pagination (?after_id=, ?limit=) and an optional ?statement_id=
+@payment_bp.route('/exceptions', methods=['GET'])
+@jwt_required()
+def get_exceptions():
+    try:
+        limit = max(1, min(int(request.args.get('limit', EXCEPTIONS_DEFAULT_LIMIT)), EXCEPTIONS_MAX_LIMIT))
+        after_id = int(request.args.get('after_id', 0))
+        statement_id = request.args.get('statement_id', type=int)
+    except ValueError:
+        return jsonify({"message": "limit and after_id must be integers"}), HTTP_400_BAD_REQUEST
+
+    query = PaymentTransaction.query.filter(
+        PaymentTransaction.status == 'unmatched',
+        PaymentTransaction.id > after_id
+    )
+    if statement_id:
+        query = query.filter(PaymentTransaction.statement_id == statement_id)
+    transactions = query.order_by(PaymentTransaction.id).limit(limit + 1).all()
+
+    has_more = len(transactions) > limit
+    transactions = transactions[:limit]
+    return jsonify({
+        "exceptions": [t.to_dict() for t in transactions],
+        "next_after_id": transactions[-1].id if has_more else None
+    }), HTTP_200_OK
@@ -0,0 +1,170 @@
+# app/controllers/report_controller.py
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from datetime import datetime, timedelta
+from app.utils.sales_analytics import load_sales_extract, demand_profile, category_trends, price_points, sales_window
+from app.utils.menu_pricing import get_price_book
+from app.utils.hot_statements import statement_stats
+from app.utils.query_budget import query_budget, budget_stats
+from app.utils.status_history import TRACKED, time_in_state, transition_durations
+from app.utils.ttl_cache import TTLCache
+from app.status_codes import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
+import logging
+
+report_bp = Blueprint('report', __name__, url_prefix='/api/v1/reports')
+
+report_cache = None
+
+
+def get_report_cache():
+    global report_cache
+    if report_cache is None:
+        report_cache = TTLCache(ttl=current_app.config['ANALYTICS_CACHE_TTL_SECONDS'])
+    return report_cache
+
+
+def int_arg(name, default, minimum, maximum):
+    value = int(request.args.get(name, default))
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def cached_report(key, days, build):
+    def compute():
+        start, end = sales_window(days)
+        extract = load_sales_extract(start, end, current_app.config['ANALYTICS_CHUNK_SIZE'])
+        report = build(extract)
+        report['generated_at'] = datetime.utcnow().isoformat()
+        return report
+    return get_report_cache().get_or_compute(key, compute)
+
+
+# Average portions and revenue for each hour of the week
+@report_bp.route('/demand-profile', methods=['GET'])
+@jwt_required()
+@query_budget(timeout_ms=30000)
+def get_demand_profile():
+    try:
+        days = int_arg('days', 90, 7, 730)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+
+    try:
+        report = cached_report(('demand-profile', days), days, demand_profile)
+        return jsonify(report), HTTP_200_OK
+    except Exception as e:
+        logging.error(f"Error building demand profile: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to build demand profile", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+
+# Daily portions per category with moving averages and a short forecast
+@report_bp.route('/category-trends', methods=['GET'])
+@jwt_required()
+@query_budget(timeout_ms=30000)
+def get_category_trends():
+    try:
+        days = int_arg('days', 90, 7, 730)
+        window = int_arg('window', 7, 1, 90)
+        horizon = int_arg('horizon', 7, 1, 60)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+
+    try:
+        report = cached_report(
+            ('category-trends', days, window, horizon), days,
+            lambda extract: category_trends(extract, window=window, horizon=horizon)
+        )
+        return jsonify(report), HTTP_200_OK
+    except Exception as e:
+        logging.error(f"Error building category trends: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to build category trends", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+
+# Sales per menu item at each price it had, e.g. to see how a price change
+# moved demand
+@report_bp.route('/price-points', methods=['GET'])
+@jwt_required()
+@query_budget(timeout_ms=30000)
+def get_price_points():
+    try:
+        days = int_arg('days', 90, 7, 730)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+
+    try:
+        report = cached_report(('price-points', days), days, lambda extract: price_points(extract, get_price_book()))
+        return jsonify(report), HTTP_200_OK
+    except Exception as e:
+        logging.error(f"Error building price points: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to build price points", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+
+# Prep/delivery SLAs from the status history: time spent in each status, plus
+# the lead time between two statuses when ?from=preparing&to=delivered is given
+@report_bp.route('/status-durations', methods=['GET'])
+@jwt_required()
+@query_budget(timeout_ms=30000)
+def get_status_durations():
+    entity = request.args.get('entity', 'order')
+    field = request.args.get('field', 'delivery_status')
+    allowed = [f"{name}.{column}" for name, columns in TRACKED.values() for column in columns]
+    if f"{entity}.{field}" not in allowed:
+        return jsonify({"message": f"entity and field must be one of {allowed}"}), HTTP_400_BAD_REQUEST
+
+    start = request.args.get('from', '').strip().lower()
+    end = request.args.get('to', '').strip().lower()
+    if bool(start) != bool(end):
+        return jsonify({"message": "from and to must be given together"}), HTTP_400_BAD_REQUEST
+
+    try:
+        days = int_arg('days', 30, 1, 365)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTP_400_BAD_REQUEST
+
+    def compute():
+        since = datetime.utcnow() - timedelta(days=days)
+        report = {
+            "entity": entity,
+            "field": field,
+            "days": days,
+            "time_in_state": time_in_state(entity, field, since)
+        }
+        if start:
+            report["lead_time"] = {"from": start, "to": end, **transition_durations(entity, field, start, end, since)}
+        report['generated_at'] = datetime.utcnow().isoformat()
+        return report
+
+    try:
+        report = get_report_cache().get_or_compute(('status-durations', entity, field, days, start, end), compute)
+        return jsonify(report), HTTP_200_OK
+    except Exception as e:
+        logging.error(f"Error building status durations: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to build status durations", "error": str(e)}), HTTP_500_INTERNAL_SERVER_ERROR
+
+
+# Compiled statement cache for this worker: overall and per hot statement hit
+# rates, plus how long the boot-time prewarm took
+@report_bp.route('/statement-cache', methods=['GET'])
+@jwt_required()
+def get_statement_cache():
+    return jsonify(statement_stats.report()), HTTP_200_OK
+
+
+# Admission control state for this worker; exempt from admission itself so it
+# answers while the worker is shedding load
+@report_bp.route('/admission', methods=['GET'])
+@jwt_required()
+def get_admission_stats():
+    controller = current_app.extensions.get('admission')
+    if controller is None:
+        return jsonify({"enabled": False}), HTTP_200_OK
+    return jsonify(dict(controller.report(), enabled=True)), HTTP_200_OK
+
+
+# Statement timeouts, row caps and pool waits given up on, per endpoint, for
+# this worker
+@report_bp.route('/query-budgets', methods=['GET'])
+@jwt_required()
+def get_query_budgets():
+    return jsonify(dict(budget_stats.report(), default_timeout_ms=current_app.config['QUERY_TIMEOUT_MS'])), HTTP_200_OK
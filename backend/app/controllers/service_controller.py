@@ -1,11 +1,20 @@
 from flask import Blueprint, request, jsonify, url_for
+from flask_jwt_extended import jwt_required
 from app.models.service_model import Service
 from app.extensions import db
+from app.utils.sync import record_tombstone
+from app.utils.cache_bus import cache_bus, SERVICES
+from app.utils.media_store import (
+    MEDIA_SERVICES, UploadRejected, receive_upload, store_upload, retain_asset, release_asset, remove_files
+)
 import logging
 import os
 
 service_bp = Blueprint("service_bp", __name__, url_prefix="/api/v1/services")
 
+# Per-worker copy of the formatted services, dropped on every worker when SERVICES is published
+service_cache = cache_bus.region_cache(SERVICES)
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -13,15 +22,17 @@ logger = logging.getLogger(__name__)
 # Get all services
 @service_bp.route("/", methods=["GET"])
 def get_services():
-    services = Service.query.all()
-    formatted_services = []
-    for service in services:
-        service_data = service.to_dict()
-        # Construct the full URL for the service image
-        service_data['image_url'] = url_for('serve_static', filename=f'services/{os.path.basename(service.image_url)}', _external=True)
-        formatted_services.append(service_data)
+    def load_services():
+        formatted_services = []
+        for service in Service.query.all():
+            service_data = service.to_dict()
+            # Construct the full URL for the service image
+            service_data['image_url'] = url_for('serve_static', filename=f'services/{os.path.basename(service.image_url)}', _external=True)
+            formatted_services.append(service_data)
+        return formatted_services
     
-    return jsonify(formatted_services), 200
+    # Keyed by host because the image URLs are absolute
+    return jsonify(service_cache.get_or_compute(('all', request.host_url), load_services)), 200
 
 # Get single service by slug
 @service_bp.route("/<string:slug>", methods=["GET"])
@@ -47,7 +58,9 @@ def register_service():
         image_url=data.get("image_url")  # Store original filename
     )
     db.session.add(new_service)
+    retain_asset(MEDIA_SERVICES, new_service.image_url)
     db.session.commit()
+    cache_bus.publish(SERVICES)
     
     # Format the response with the correct URL
     response_data = new_service.to_dict()
@@ -66,7 +79,9 @@ def create_service():
         image_url=data.get("image_url")  # Store original filename
     )
     db.session.add(new_service)
+    retain_asset(MEDIA_SERVICES, new_service.image_url)
     db.session.commit()
+    cache_bus.publish(SERVICES)
     
     # Format the response with the correct URL
     response_data = new_service.to_dict()
@@ -83,8 +98,15 @@ def update_service(slug):
     data = request.get_json()
     service.title = data.get("title", service.title)
     service.description = data.get("description", service.description)
-    service.image_url = data.get("image_url", service.image_url)  # Store original filename
+    released = None
+    new_image_url = data.get("image_url", service.image_url)  # Store original filename
+    if new_image_url != service.image_url:
+        retain_asset(MEDIA_SERVICES, new_image_url)
+        _, released = release_asset(MEDIA_SERVICES, service.image_url)
+        service.image_url = new_image_url
     db.session.commit()
+    cache_bus.publish(SERVICES)
+    remove_files(MEDIA_SERVICES, [released])
     
     # Format the response with the correct URL
     response_data = service.to_dict()
@@ -98,6 +120,47 @@ def delete_service(slug):
     service = Service.query.filter_by(slug=slug).first()
     if not service:
         return jsonify({"error": "Service not found"}), 404
+    _, released = release_asset(MEDIA_SERVICES, service.image_url)
     db.session.delete(service)
+    record_tombstone('service', service.id)
     db.session.commit()
-    return jsonify({"message": "Service deleted"}), 200
\ No newline at end of file
+    cache_bus.publish(SERVICES)
+    remove_files(MEDIA_SERVICES, [released])
+    return jsonify({"message": "Service deleted"}), 200
+
+# Upload a new image for a service (multipart/form-data: image). Identical
+# files are stored once, under their content hash.
+@service_bp.route("/<string:slug>/image", methods=["POST"])
+@jwt_required()
+def upload_service_image(slug):
+    service = Service.query.filter_by(slug=slug).first()
+    if not service:
+        return jsonify({"error": "Service not found"}), 404
+    try:
+        _, upload = receive_upload(MEDIA_SERVICES)
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    try:
+        asset = store_upload(MEDIA_SERVICES, upload)
+        released = None
+        if service.image_url != asset.filename:
+            _, released = release_asset(MEDIA_SERVICES, service.image_url)
+            service.image_url = asset.filename
+        else:
+            # Same image again: the upload's reference is not needed
+            release_asset(MEDIA_SERVICES, asset.filename)
+        db.session.commit()
+        upload.place()
+        cache_bus.publish(SERVICES)
+        remove_files(MEDIA_SERVICES, [released])
+    except Exception as e:
+        db.session.rollback()
+        upload.discard()
+        logger.error(f"Error uploading service image: {str(e)}")
+        return jsonify({"error": "Failed to upload image", "details": str(e)}), 500
+
+    response_data = service.to_dict()
+    response_data['image_url'] = url_for('serve_static', filename=f'services/{asset.filename}', _external=True)
+    response_data['asset'] = asset.to_dict()
+    return jsonify(response_data), 200
\ No newline at end of file
@@ -0,0 +1,118 @@
+# app/controllers/sync_controller.py
+from flask import Blueprint, request, jsonify, url_for, current_app
+from flask_jwt_extended import jwt_required
+from sqlalchemy import or_, and_, select
+from datetime import datetime, timedelta, timezone
+from app.models.menu_item_model import MenuItem
+from app.models.service_model import Service
+from app.models.customer_model import Customer
+from app.models.tombstone_model import Tombstone
+from app.models.menu_price_model import MenuItemPrice
+from app.utils.sync import tombstone_horizon
+from app.utils.menu_pricing import price_at
+from app.status_codes import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+import os
+
+sync_bp = Blueprint('sync', __name__, url_prefix='/api/v1/sync')
+
+
+def serialize_menu_item(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "category": item.category,
+        "price": float(price_at(item)),
+        "description": item.description,
+        "available": item.available,
+        "stock": item.stock,
+        "image_key": item.image_key
+    }
+
+
+def serialize_service(service):
+    service_data = service.to_dict()
+    if service.image_url:
+        service_data['image_url'] = url_for('serve_static', filename=f'services/{os.path.basename(service.image_url)}', _external=True)
+    return service_data
+
+
+def serialize_customer(customer):
+    return {
+        "id": customer.id,
+        "full_name": customer.full_name,
+        "contact": customer.contact,
+        "email": customer.email,
+        "address": customer.address,
+        "customer_type": customer.customer_type,
+        "biography": customer.biography
+    }
+
+
+# A scheduled price takes effect without touching the menu item row, so
+# items whose price changed in the window count as changed too
+def menu_price_changes(since, high_water):
+    return MenuItem.id.in_(
+        select(MenuItemPrice.menu_item_id).where(
+            MenuItemPrice.effective_from > since,
+            MenuItemPrice.effective_from <= high_water
+        )
+    )
+
+
+# url name -> (model, tombstone entity, serializer)
+SYNC_ENTITIES = {
+    'menu-items': (MenuItem, 'menu_item', serialize_menu_item),
+    'services': (Service, 'service', serialize_service),
+    'customers': (Customer, 'customer', serialize_customer),
+}
+
+
+# GET /api/v1/sync/<menu-items|services|customers>?since=<cursor>
+#
+# Without a cursor (or with one older than the tombstone retention) this is a
+# full snapshot. Otherwise it returns rows changed after the cursor and the ids
+# deleted since then. Either way the response carries the next cursor.
+# Customers carry contact details, so every feed needs a token.
+@sync_bp.route('/<string:entity>', methods=['GET'])
+@jwt_required()
+def sync_changes(entity):
+    if entity not in SYNC_ENTITIES:
+        return jsonify({"message": "Unknown sync entity"}), HTTP_404_NOT_FOUND
+    model, tombstone_entity, serialize = SYNC_ENTITIES[entity]
+
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({"message": "Invalid since cursor"}), HTTP_400_BAD_REQUEST
+        # Stored times are naive UTC
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        if since < tombstone_horizon():
+            since = None
+
+    # Stop short of "now" so rows from transactions still in flight are picked
+    # up by the next sync instead of being skipped
+    high_water = datetime.utcnow() - timedelta(seconds=current_app.config['SYNC_SAFETY_LAG_SECONDS'])
+
+    if since is None:
+        rows = model.query.filter(or_(model.updated_at <= high_water, model.updated_at.is_(None))).all()
+        deleted = []
+    else:
+        changed = and_(model.updated_at > since, model.updated_at <= high_water)
+        if model is MenuItem:
+            changed = or_(changed, menu_price_changes(since, high_water))
+        rows = model.query.filter(changed).all()
+        deleted = [t.entity_id for t in Tombstone.query.filter(
+            Tombstone.entity == tombstone_entity,
+            Tombstone.deleted_at > since,
+            Tombstone.deleted_at <= high_water
+        )]
+
+    return jsonify({
+        "full": since is None,
+        "changed": [serialize(row) for row in rows],
+        "deleted": deleted,
+        "cursor": high_water.isoformat()
+    }), HTTP_200_OK
@@ -3,6 +3,7 @@ from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_requir
 from werkzeug.security import check_password_hash
 from app.models.admin_user_model import AdminUser as User
 from app.extensions import db
+from app.utils.http_cache import not_modified_response, add_validators
 
 user_bp = Blueprint('user_bp', __name__, url_prefix="/api/v1/users")
 
@@ -48,8 +49,12 @@ def get_profile():
     
     if not user:
         return jsonify({"message": "User not found"}), 404
+
+    cached = not_modified_response(last_modified=user.updated_at)
+    if cached:
+        return cached
         
-    return jsonify({
+    return add_validators(jsonify({
         "id": user.id,
         "full_name": user.full_name,
         "contact": user.contact,
@@ -57,4 +62,4 @@ def get_profile():
         "address": user.address,
         "role": user.role,
         "description": user.description
-    }), 200
\ No newline at end of file
+    }), last_modified=user.updated_at), 200
\ No newline at end of file
@@ -1,8 +1,17 @@
 from .admin_user_model import AdminUser
 from .customer_model import Customer
-from .catering_event_model import CateringEvent
+from .catering_event_model import CateringEvent, CateringEventLine
 from .delivery_model import Delivery
 from .order_model import Order
 from .menu_item_model import MenuItem
 from .service_model import Service
-from .gallery_model import GalleryImage
\ No newline at end of file
+from .gallery_model import GalleryImage
+from .archive_model import ArchivedOrder, ArchivedOrderItem, ArchivedDelivery
+from .tombstone_model import Tombstone
+from .customer_segment_model import CustomerSegment
+from .status_history_model import StatusHistory
+from .token_revocation_model import TokenRevocation
+from .payment_model import PaymentRequest, PaymentStatement, PaymentTransaction
+from .delivery_zone_model import DeliveryZone, GeocodedAddress
+from .menu_price_model import MenuItemPrice
+from .media_asset_model import MediaAsset
@@ -5,7 +5,7 @@ class AdminUser(db.Model):
     __tablename__ = "admin_users"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, index=True)
     full_name = db.Column(db.String(255), nullable=False)
-    contact = db.Column(db.String(255), nullable=False)
+    contact = db.Column(db.String(255), nullable=False, index=True)
     email = db.Column(db.String(255), unique=True, index=True, nullable=False)  # Added index
     password = db.Column(db.String(255), nullable=True)
     address = db.Column(db.String(255), nullable=True)
@@ -0,0 +1,43 @@
+# app/models/archive_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# Cold copies of orders, order items and deliveries moved out of the hot tables
+# by app.utils.archival. No foreign keys, so archived history never slows down
+# deletes or index maintenance on the live tables.
+class ArchivedOrder(db.Model):
+    __tablename__ = "orders_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    customer_id = db.Column(db.Integer, nullable=False, index=True)
+    handler_id = db.Column(db.Integer, nullable=True)
+    order_date = db.Column(db.DateTime, index=True)
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    payment_status = db.Column(db.String(100), nullable=False)
+    delivery_status = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.String(255), nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ArchivedOrderItem(db.Model):
+    __tablename__ = "order_items_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    subtotal = db.Column(db.Numeric(10, 2), nullable=False)
+
+
+class ArchivedDelivery(db.Model):
+    __tablename__ = "deliveries_archive"
+
+    delivery_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False, index=True)
+    staff_id = db.Column(db.Integer, nullable=False)
+    delivery_address = db.Column(db.String(255), nullable=False)
+    delivery_type = db.Column(db.String(100), nullable=False)
+    delivery_status = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.String(255), nullable=True)
+    delivery_date = db.Column(db.DateTime)
@@ -15,8 +15,14 @@ class CateringEvent(db.Model):
     menu = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(100), nullable=False, default="pending")
     description = db.Column(db.String(255), nullable=True)
+    # Bumped on every UPDATE; a stale version raises StaleDataError (optimistic locking)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
 
     customer = db.relationship("Customer", back_populates="catering_events")
+    # The menu as rows; `menu` stays as the human-readable summary
+    lines = db.relationship("CateringEventLine", cascade="all, delete-orphan", order_by="CateringEventLine.id", lazy=True)
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __init__(self, customer_id, event_name, event_date, location, number_of_guests, menu, status="pending", description=None):
         self.customer_id = customer_id
@@ -27,3 +33,26 @@ class CateringEvent(db.Model):
         self.menu = menu
         self.status = status
         self.description = description
+
+
+# One dish on an event's menu: the kitchen cooks number_of_guests *
+# portions_per_guest portions of it for the event
+class CateringEventLine(db.Model):
+    __tablename__ = "catering_event_lines"
+    __table_args__ = (
+        db.UniqueConstraint("event_id", "menu_item_id", name="uq_catering_event_lines_event_item"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.Integer, db.ForeignKey("catering_events.id"), nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey("menu_items.id"), nullable=False, index=True)
+    portions_per_guest = db.Column(db.Numeric(6, 2), nullable=False, default=1)
+
+    menu_item = db.relationship("MenuItem", lazy="joined")
+
+    def to_dict(self):
+        return {
+            "menu_item_id": self.menu_item_id,
+            "name": self.menu_item.name if self.menu_item else None,
+            "portions_per_guest": float(self.portions_per_guest)
+        }
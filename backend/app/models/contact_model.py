@@ -4,14 +4,22 @@ from datetime import datetime
 
 class Contact(db.Model):
     __tablename__ = "contacts"
+    __table_args__ = (
+        # Inbox keyset pagination walks (created_at, id) newest first
+        db.Index("ix_contacts_created_at_id", "created_at", "id"),
+        # Full-text search on MySQL; other backends use contact_search_terms
+        db.Index("ix_contacts_fulltext", "name", "message", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     phone = db.Column(db.String(50), nullable=True)
-    service_type = db.Column(db.String(50), nullable=True)
+    service_type = db.Column(db.String(50), nullable=True, index=True)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set by the write-behind spool so replays after a crash stay idempotent
+    submission_id = db.Column(db.String(32), unique=True, nullable=True)
 
     def to_dict(self):
         return {
@@ -23,3 +31,12 @@ class Contact(db.Model):
             "message": self.message,
             "created_at": self.created_at.isoformat()
         }
+
+
+# Inverted index over Contact.name and Contact.message for backends without
+# FULLTEXT support; maintained by app.utils.contact_search as contacts are inserted
+class ContactSearchTerm(db.Model):
+    __tablename__ = "contact_search_terms"
+
+    term = db.Column(db.String(64), primary_key=True)
+    contact_id = db.Column(db.Integer, db.ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True)
@@ -5,15 +5,15 @@ class Customer(db.Model):
     __tablename__ = "customers"
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    full_name = db.Column(db.String(255), nullable=False)
-    contact = db.Column(db.String(255), nullable=False)
+    full_name = db.Column(db.String(255), nullable=False, index=True)
+    contact = db.Column(db.String(255), nullable=False, index=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
     address = db.Column(db.String(255), nullable=True)
     customer_type = db.Column(db.String(50), default="individual")
     biography = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     orders = db.relationship("Order", back_populates="customer", lazy=True)
     catering_events = db.relationship("CateringEvent", back_populates="customer", lazy=True)
@@ -0,0 +1,33 @@
+# app/models/customer_segment_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# Recency/frequency/monetary scores per customer, recomputed in bulk by
+# `flask compute-segments` (app.utils.rfm_segmentation)
+class CustomerSegment(db.Model):
+    __tablename__ = "customer_segments"
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True)
+    recency_days = db.Column(db.Integer, nullable=True)
+    frequency = db.Column(db.Integer, nullable=False, default=0)
+    monetary = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    r_score = db.Column(db.SmallInteger, nullable=False, default=0)
+    f_score = db.Column(db.SmallInteger, nullable=False, default=0)
+    m_score = db.Column(db.SmallInteger, nullable=False, default=0)
+    segment = db.Column(db.String(50), nullable=False, index=True)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "customer_id": self.customer_id,
+            "recency_days": self.recency_days,
+            "frequency": self.frequency,
+            "monetary": float(self.monetary),
+            "r_score": self.r_score,
+            "f_score": self.f_score,
+            "m_score": self.m_score,
+            "rfm": f"{self.r_score}{self.f_score}{self.m_score}",
+            "segment": self.segment,
+            "computed_at": self.computed_at.isoformat()
+        }
@@ -4,18 +4,27 @@ from datetime import datetime
 class Delivery(db.Model):
     __tablename__ = "deliveries"
     delivery_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    staff_id = db.Column(db.Integer, db.ForeignKey('admin_users.id'), nullable=False)  # Match AdminUser
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey('admin_users.id'), nullable=False, index=True)  # Match AdminUser
     delivery_address = db.Column(db.String(255), nullable=False)
     delivery_type = db.Column(db.String(100), nullable=False)
     delivery_status = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=True)
     delivery_date = db.Column(db.DateTime, default=datetime.utcnow)
+    # Filled from the address by the zone lookup; NULL when it could not be placed
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    zone_id = db.Column(db.Integer, db.ForeignKey('delivery_zones.id'), nullable=True, index=True)
+    delivery_fee = db.Column(db.Numeric(10, 2), nullable=True)
+    # Bumped on every UPDATE; a stale version raises StaleDataError (optimistic locking)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
     
     # Corrected relationships
     order = db.relationship('Order', back_populates='delivery')
     staff = db.relationship('AdminUser', back_populates='deliveries')  # Match AdminUser
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __init__(self, order_id, staff_id, delivery_address, delivery_type, delivery_status, description=None):
         self.order_id = order_id
         self.staff_id = staff_id
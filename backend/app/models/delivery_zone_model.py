@@ -0,0 +1,41 @@
+# app/models/delivery_zone_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# A priced delivery area. `polygon` is a ring of [longitude, latitude] pairs
+# (GeoJSON order); the fee is base_fee + per_km_fee * distance from the kitchen.
+class DeliveryZone(db.Model):
+    __tablename__ = "delivery_zones"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    polygon = db.Column(db.JSON, nullable=False)
+    base_fee = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    per_km_fee = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "polygon": self.polygon,
+            "base_fee": float(self.base_fee),
+            "per_km_fee": float(self.per_km_fee),
+            "active": self.active
+        }
+
+
+# Geocoder results keyed by the normalized address text. Addresses the
+# geocoder could not place are kept too (NULL coordinates) so they are not
+# looked up again on every quote.
+class GeocodedAddress(db.Model):
+    __tablename__ = "geocoded_addresses"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    address_key = db.Column(db.String(255), unique=True, nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    provider = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,34 @@
+# app/models/media_asset_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# An uploaded image stored once under its content hash in static/<kind>/.
+# ref_count is the number of gallery images or services that use it; the
+# file is removed when the last one lets go.
+class MediaAsset(db.Model):
+    __tablename__ = "media_assets"
+    __table_args__ = (
+        db.UniqueConstraint("kind", "sha256", name="uq_media_assets_kind_sha256"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(20), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(50), nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "sha256": self.sha256,
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "size_bytes": self.size_bytes,
+            "ref_count": self.ref_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -5,24 +5,30 @@ class MenuItem(db.Model):
     __tablename__ = "menu_items"
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, index=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)
+    # Price as of the last edit; scheduled changes live in menu_item_prices,
+    # see app.utils.menu_pricing for the price at a given time
     price = db.Column(db.Numeric(10, 2), nullable=False)
     available = db.Column(db.Boolean, default=True, nullable=False)
-    category = db.Column(db.String(255), nullable=False)
+    # Portions left; NULL means the item is not stock-tracked (see app.utils.stock)
+    stock = db.Column(db.Integer, nullable=True)
+    category = db.Column(db.String(255), nullable=False, index=True)
     description = db.Column(db.String(255), nullable=True)
     image_key = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Add this relationship back
     order_items = db.relationship("OrderItem", back_populates="menu_item", lazy=True)
+    prices = db.relationship("MenuItemPrice", cascade="all, delete-orphan", order_by="MenuItemPrice.effective_from", lazy=True)
 
-    def __init__(self, name, category, price, description=None, available=True, image_key=None):
+    def __init__(self, name, category, price, description=None, available=True, image_key=None, stock=None):
         self.name = name
         self.category = category
         self.price = price
         self.description = description
         self.available = available
         self.image_key = image_key
+        self.stock = stock
         if not self.image_key:
             self.image_key = "meal_default"
\ No newline at end of file
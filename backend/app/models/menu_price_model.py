@@ -0,0 +1,27 @@
+# app/models/menu_price_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# Effective-dated menu prices: a row's price applies from effective_from until
+# the item's next row. Rows dated in the future are scheduled price changes.
+class MenuItemPrice(db.Model):
+    __tablename__ = "menu_item_prices"
+    __table_args__ = (
+        db.UniqueConstraint("menu_item_id", "effective_from", name="uq_menu_item_prices_item_from"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    menu_item_id = db.Column(db.Integer, db.ForeignKey("menu_items.id"), nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    effective_from = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "menu_item_id": self.menu_item_id,
+            "price": float(self.price),
+            "effective_from": self.effective_from.isoformat(),
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -6,11 +6,13 @@ class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     customer_id = db.Column(db.Integer, db.ForeignKey("customers.id"), nullable=False, index=True)
     handler_id = db.Column(db.Integer, db.ForeignKey("admin_users.id"), nullable=True, index=True)  # Renamed for clarity
-    order_date = db.Column(db.DateTime, default=datetime.utcnow)
+    order_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     payment_status = db.Column(db.String(100), nullable=False)
     delivery_status = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=True)
+    # Bumped on every UPDATE; a stale version raises StaleDataError (optimistic locking)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
     
     # Corrected relationships
     customer = db.relationship("Customer", back_populates="orders")
@@ -18,6 +20,8 @@ class Order(db.Model):
     order_items = db.relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy=True)
     delivery = db.relationship("Delivery", back_populates="order", uselist=False)
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __init__(self, customer_id, total_amount, payment_status, delivery_status, description=None, handler_id=None):
         self.customer_id = customer_id
         self.handler_id = handler_id  # Updated parameter name
@@ -0,0 +1,104 @@
+# app/models/payment_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# A mobile money payment started at checkout (POST /api/payments). Its
+# reference is what the customer's transaction should carry, so statement
+# rows can be matched to it exactly.
+class PaymentRequest(db.Model):
+    __tablename__ = "payment_requests"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    reference = db.Column(db.String(32), unique=True, nullable=False)
+    # No foreign key: orders move to orders_archive while payments stay
+    order_id = db.Column(db.Integer, nullable=True, index=True)
+    method = db.Column(db.String(20), nullable=False)
+    phone = db.Column(db.String(30), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "reference": self.reference,
+            "order_id": self.order_id,
+            "method": self.method,
+            "phone": self.phone,
+            "amount": float(self.amount),
+            "status": self.status,
+            "created_at": self.created_at.isoformat()
+        }
+
+
+# One uploaded provider statement file and its reconciliation totals
+class PaymentStatement(db.Model):
+    __tablename__ = "payment_statements"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    provider = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    rows_total = db.Column(db.Integer, nullable=False, default=0)
+    matched = db.Column(db.Integer, nullable=False, default=0)
+    unmatched = db.Column(db.Integer, nullable=False, default=0)
+    duplicates = db.Column(db.Integer, nullable=False, default=0)
+    ignored = db.Column(db.Integer, nullable=False, default=0)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "provider": self.provider,
+            "filename": self.filename,
+            "rows_total": self.rows_total,
+            "matched": self.matched,
+            "unmatched": self.unmatched,
+            "duplicates": self.duplicates,
+            "ignored": self.ignored,
+            "duration_ms": self.duration_ms,
+            "uploaded_at": self.uploaded_at.isoformat()
+        }
+
+
+# A successful transaction from a statement. Unmatched rows (order_id and
+# payment_request_id both NULL) make up the exceptions report.
+class PaymentTransaction(db.Model):
+    __tablename__ = "payment_transactions"
+    __table_args__ = (
+        # Re-uploading an overlapping statement skips rows already ingested
+        db.UniqueConstraint("provider", "provider_txn_id", name="uq_payment_transactions_provider_txn"),
+        db.Index("ix_payment_transactions_status_id", "status", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    statement_id = db.Column(db.Integer, db.ForeignKey("payment_statements.id"), nullable=False, index=True)
+    provider = db.Column(db.String(20), nullable=False)
+    provider_txn_id = db.Column(db.String(64), nullable=False)
+    reference = db.Column(db.String(64), nullable=True)
+    phone = db.Column(db.String(30), nullable=True)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    order_id = db.Column(db.Integer, nullable=True, index=True)
+    payment_request_id = db.Column(db.Integer, db.ForeignKey("payment_requests.id"), nullable=True)
+    status = db.Column(db.String(20), nullable=False)
+    match_method = db.Column(db.String(20), nullable=True)
+    exception_reason = db.Column(db.String(100), nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "statement_id": self.statement_id,
+            "provider": self.provider,
+            "provider_txn_id": self.provider_txn_id,
+            "reference": self.reference,
+            "phone": self.phone,
+            "amount": float(self.amount),
+            "occurred_at": self.occurred_at.isoformat(),
+            "order_id": self.order_id,
+            "payment_request_id": self.payment_request_id,
+            "status": self.status,
+            "match_method": self.match_method,
+            "exception_reason": self.exception_reason
+        }
@@ -0,0 +1,22 @@
+# app/models/status_history_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# Append-only log of order/delivery status changes, written in batches by
+# app.utils.status_history. Rows are never updated or deleted.
+class StatusHistory(db.Model):
+    __tablename__ = "status_history"
+    __table_args__ = (
+        # Covers the time-in-state report: the range scan on changed_at reads
+        # entity_id and to_status from the index without touching the table
+        db.Index("ix_status_history_time_in_state", "entity", "field", "changed_at", "entity_id", "to_status"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    field = db.Column(db.String(50), nullable=False)
+    from_status = db.Column(db.String(100), nullable=True)
+    to_status = db.Column(db.String(100), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+# app/models/token_revocation_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# Revoked JWTs. A row with a jti revokes that one token (logout); a row with
+# only revoked_before revokes every token of `subject` issued before it
+# (password change, staff offboarding). Rows can go once expires_at passes.
+class TokenRevocation(db.Model):
+    __tablename__ = "token_revocations"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(64), nullable=True, unique=True)
+    subject = db.Column(db.String(100), nullable=False, index=True)
+    token_type = db.Column(db.String(20), nullable=True)
+    revoked_before = db.Column(db.DateTime, nullable=True)
+    reason = db.Column(db.String(50), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,20 @@
+# app/models/tombstone_model.py
+from app.extensions import db
+from datetime import datetime
+
+
+# Records a deleted row so delta-sync clients (GET /api/v1/sync/...) can drop it
+class Tombstone(db.Model):
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        db.Index("ix_tombstones_entity_deleted_at", "entity", "deleted_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __init__(self, entity, entity_id):
+        self.entity = entity
+        self.entity_id = entity_id
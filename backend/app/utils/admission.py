@@ -0,0 +1,163 @@
+# app/utils/admission.py
+import logging
+import math
+import threading
+
+from flask import g, jsonify, request
+
+from app.status_codes import HTTP_503_SERVICE_UNAVAILABLE
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT = "checkout"
+
+# Route classes. Anything not listed is a "read" (GET/HEAD) or a "write".
+CHECKOUT_ENDPOINTS = {
+    "order.create_order",
+    "order_item.create_order_item",
+    "payment.create_payment",
+    # POST /api/payments, registered in create_app; the checkout page uses it
+    "create_payment",
+}
+AUTH_ENDPOINTS = {
+    "customer.register_user",
+    "user_bp.login",
+}
+EXPORT_ENDPOINTS = {
+    "payment.upload_statement",
+    "payment.get_exceptions",
+}
+BLUEPRINT_CLASSES = {
+    "auth": "auth",
+    "report": "export",
+    "sync": "export",
+    "batch": "export",
+}
+# Never queued or shed: health check, static files and the admission stats
+EXEMPT_ENDPOINTS = {"index", "static", "serve_static", "report.get_admission_stats"}
+# Set by the batch endpoint on its sub-requests. The batch already holds an
+# export slot, and its sub-requests waiting on other classes while holding
+# it could starve each other; BATCH_MAX_WORKERS bounds them instead.
+BATCH_SUB_REQUEST = "app.batch_sub_request"
+
+
+def route_class(endpoint, blueprint, method):
+    if endpoint in CHECKOUT_ENDPOINTS:
+        return CHECKOUT
+    if endpoint in AUTH_ENDPOINTS:
+        return "auth"
+    if endpoint in EXPORT_ENDPOINTS:
+        return "export"
+    if blueprint in BLUEPRINT_CLASSES:
+        return BLUEPRINT_CLASSES[blueprint]
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+# ADMISSION_CLASSES is "class=limit:queue:timeout,...": at most `limit`
+# requests of the class run at once, up to `queue` more wait for at most
+# `timeout` seconds, and the rest are turned away at once
+def parse_classes(spec):
+    classes = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, values = entry.partition("=")
+        limit, queue, timeout = values.split(":")
+        classes[name.strip()] = {"limit": int(limit), "queue": int(queue), "timeout": float(timeout)}
+    return classes
+
+
+# Per-worker admission control. Each route class has its own concurrency
+# limit and bounded wait queue, and all classes together share
+# ADMISSION_MAX_CONCURRENT slots (keep it within the DB pool size), of which
+# ADMISSION_RESERVED_CHECKOUT are only ever used by checkout. A slow report
+# or a login storm fills its own class and then gets fast 503s, while order
+# taking and the health check keep their capacity.
+class AdmissionController:
+    def __init__(self, classes, max_concurrent, reserved_checkout):
+        self.classes = classes
+        self.max_concurrent = max_concurrent
+        self.reserved_checkout = reserved_checkout
+        self._cond = threading.Condition()
+        self._active_total = 0
+        self.stats = {name: {"active": 0, "waiting": 0, "admitted": 0, "rejected": 0, "timed_out": 0} for name in classes}
+
+    def _can_run(self, name):
+        budget = self.max_concurrent if name == CHECKOUT else self.max_concurrent - self.reserved_checkout
+        return self.stats[name]["active"] < self.classes[name]["limit"] and self._active_total < budget
+
+    # True once admitted; False when the queue is full or the wait timed out
+    def acquire(self, name):
+        config, stats = self.classes[name], self.stats[name]
+        with self._cond:
+            if not self._can_run(name):
+                if stats["waiting"] >= config["queue"] or config["timeout"] <= 0:
+                    stats["rejected"] += 1
+                    return False
+                stats["waiting"] += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self._can_run(name), config["timeout"])
+                finally:
+                    stats["waiting"] -= 1
+                if not admitted:
+                    stats["timed_out"] += 1
+                    return False
+            stats["active"] += 1
+            stats["admitted"] += 1
+            self._active_total += 1
+            return True
+
+    def release(self, name):
+        with self._cond:
+            self.stats[name]["active"] -= 1
+            self._active_total -= 1
+            self._cond.notify_all()
+
+    def retry_after(self, name):
+        return max(1, math.ceil(self.classes[name]["timeout"]))
+
+    def report(self):
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "reserved_checkout": self.reserved_checkout,
+                "active": self._active_total,
+                "classes": {name: dict(self.classes[name], **self.stats[name]) for name in self.classes}
+            }
+
+
+def init_admission_control(app):
+    if not app.config["ADMISSION_CONTROL"]:
+        return
+    controller = AdmissionController(
+        parse_classes(app.config["ADMISSION_CLASSES"]),
+        app.config["ADMISSION_MAX_CONCURRENT"],
+        app.config["ADMISSION_RESERVED_CHECKOUT"]
+    )
+    app.extensions["admission"] = controller
+
+    @app.before_request
+    def admit_request():
+        if (
+            request.endpoint is None
+            or request.endpoint in EXEMPT_ENDPOINTS
+            or request.method == "OPTIONS"
+            or request.environ.get(BATCH_SUB_REQUEST)
+        ):
+            return None
+        name = route_class(request.endpoint, request.blueprint, request.method)
+        if name not in controller.classes:
+            return None
+        if not controller.acquire(name):
+            logger.warning(f"Shed {request.method} {request.path} ({name} class busy)")
+            response = jsonify({"message": "Server is busy, please retry shortly", "route_class": name})
+            response.headers["Retry-After"] = str(controller.retry_after(name))
+            return response, HTTP_503_SERVICE_UNAVAILABLE
+        g.admission_class = name
+        return None
+
+    @app.teardown_request
+    def release_request(exc):
+        name = g.pop("admission_class", None)
+        if name is not None:
+            controller.release(name)
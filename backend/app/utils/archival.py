@@ -0,0 +1,96 @@
+# app/utils/archival.py
+import logging
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, delete, select
+
+from app.extensions import db
+from app.models.order_model import Order
+from app.models.order_item_model import OrderItem
+from app.models.delivery_model import Delivery
+from app.models.archive_model import ArchivedOrder, ArchivedOrderItem, ArchivedDelivery
+
+logger = logging.getLogger(__name__)
+
+# (hot model, archive model, column holding the order id)
+ARCHIVE_TABLES = [
+    (Order, ArchivedOrder, "id"),
+    (OrderItem, ArchivedOrderItem, "order_id"),
+    (Delivery, ArchivedDelivery, "order_id"),
+]
+
+
+# Columns present in both tables, so new hot-only columns never break the copy
+def _shared_columns(hot_model, archive_model):
+    archive_columns = archive_model.__table__.columns
+    return [c.name for c in hot_model.__table__.columns if c.name in archive_columns]
+
+
+def _archive_batch(order_ids):
+    counts = {}
+    for hot_model, archive_model, key in ARCHIVE_TABLES:
+        columns = _shared_columns(hot_model, archive_model)
+        source = select(*[hot_model.__table__.c[name] for name in columns]).where(
+            hot_model.__table__.c[key].in_(order_ids)
+        )
+        result = db.session.execute(
+            insert(archive_model.__table__).from_select(columns, source)
+        )
+        counts[hot_model.__tablename__] = result.rowcount
+
+    # Children first so the foreign keys on the hot tables stay satisfied
+    for hot_model, _, key in reversed(ARCHIVE_TABLES):
+        db.session.execute(
+            delete(hot_model.__table__).where(hot_model.__table__.c[key].in_(order_ids))
+        )
+    return counts
+
+
+# Moves orders placed before the cutoff, with their items and delivery, into
+# the archive tables. Each batch is its own transaction so the hot tables are
+# never locked for longer than one batch.
+def archive_orders(before=None, batch_size=None):
+    if before is None:
+        days = current_app.config["ORDER_ARCHIVE_AFTER_DAYS"]
+        before = datetime.utcnow() - timedelta(days=days)
+    batch_size = batch_size or current_app.config["ORDER_ARCHIVE_BATCH_SIZE"]
+
+    totals = {hot_model.__tablename__: 0 for hot_model, _, _ in ARCHIVE_TABLES}
+    while True:
+        order_ids = db.session.execute(
+            select(Order.id)
+            .where(Order.order_date < before)
+            .order_by(Order.order_date)
+            .limit(batch_size)
+        ).scalars().all()
+        if not order_ids:
+            break
+
+        try:
+            counts = _archive_batch(order_ids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error archiving orders {order_ids[0]}..{order_ids[-1]}: {str(e)}", exc_info=True)
+            raise
+
+        for table, count in counts.items():
+            totals[table] += count
+        logger.info(f"Archived {len(order_ids)} orders placed before {before.isoformat()}")
+
+    return totals
+
+
+@click.command("archive-orders")
+@click.option("--days", type=int, default=None, help="Archive orders older than this many days.")
+@click.option("--batch-size", type=int, default=None, help="Orders moved per transaction.")
+@with_appcontext
+def archive_orders_command(days, batch_size):
+    """Move old orders, order items and deliveries into the archive tables."""
+    before = datetime.utcnow() - timedelta(days=days) if days is not None else None
+    totals = archive_orders(before=before, batch_size=batch_size)
+    for table, count in totals.items():
+        click.echo(f"{table}: {count} rows archived")
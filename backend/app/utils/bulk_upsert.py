@@ -0,0 +1,38 @@
+# app/utils/bulk_upsert.py
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+from app.extensions import db
+
+
+def _upsert_statement(table, dialect, key_columns, update_columns):
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update_columns})
+
+    insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={name: stmt.excluded[name] for name in update_columns}
+    )
+
+
+# INSERT ... ON DUPLICATE KEY UPDATE (MySQL) or ON CONFLICT DO UPDATE (SQLite,
+# PostgreSQL) in the current session's transaction. The statement is compiled
+# once and executed with executemany per batch; `rows` are dicts keyed by
+# column name, all with the same keys.
+def bulk_upsert(model, rows, key_columns, batch_size=1000):
+    if not rows:
+        return 0
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in ("mysql", "sqlite", "postgresql"):
+        raise NotImplementedError(f"bulk_upsert does not support {dialect}")
+
+    update_columns = [name for name in rows[0] if name not in key_columns]
+    stmt = _upsert_statement(model.__table__, dialect, key_columns, update_columns)
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(stmt, rows[start:start + batch_size])
+    return len(rows)
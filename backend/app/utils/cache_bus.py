@@ -0,0 +1,228 @@
+# app/utils/cache_bus.py
+import logging
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+
+
+# Exclusive lock on an open file for the publish read-modify-write: flock on
+# POSIX, a one-byte msvcrt lock on Windows (which retries for ~10s, then raises)
+def _lock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Cache regions published by the write handlers
+MENU_ITEMS = "menu_items"
+SERVICES = "services"
+GALLERY = "gallery"
+MENU_PRICES = "menu_prices"
+CATERING_EVENTS = "catering_events"
+CUSTOMERS = "customers"
+
+
+# Default transport: one small file per region holding its version number,
+# shared by every worker on the host. Publishing bumps the number under a
+# file lock and swaps the file in atomically; polling is a stat per region
+# and only re-reads a file whose inode changed.
+class FileTransport:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._seen = {}
+
+    def _path(self, region):
+        return os.path.join(self.directory, f"{region}.version")
+
+    def _read(self, region):
+        try:
+            with open(self._path(region), encoding="utf-8") as version_file:
+                return int(version_file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def publish(self, region):
+        with open(os.path.join(self.directory, f"{region}.lock"), "a+") as lock:
+            _lock(lock)
+            try:
+                version = self._read(region) + 1
+                tmp_path = os.path.join(self.directory, f".{region}.{uuid.uuid4().hex}")
+                with open(tmp_path, "w", encoding="utf-8") as version_file:
+                    version_file.write(str(version))
+                os.replace(tmp_path, self._path(region))
+            finally:
+                _unlock(lock)
+        return version
+
+    def versions(self, regions):
+        result = {}
+        for region in regions:
+            try:
+                stat = os.stat(self._path(region))
+            except FileNotFoundError:
+                result[region] = 0
+                continue
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            seen = self._seen.get(region)
+            if seen and seen[0] == signature:
+                result[region] = seen[1]
+                continue
+            version = self._read(region)
+            self._seen[region] = (signature, version)
+            result[region] = version
+        return result
+
+
+# Optional transport for workers spread over several hosts. Versions live in a
+# Redis hash (HINCRBY) and every bump is also published on a channel; each
+# worker keeps a subscriber thread that mirrors the hash locally, so polling
+# is a dict lookup. While the subscription is down, polls read the hash.
+class RedisTransport:
+    def __init__(self, url, prefix="cache_bus"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BUS_URL points at Redis but the redis package is not installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.key = f"{prefix}:versions"
+        self.channel = f"{prefix}:invalidations"
+        self._versions = {}
+        self._connected = False
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, region):
+        version = self.client.hincrby(self.key, region, 1)
+        self.client.publish(self.channel, f"{region}:{version}")
+        return version
+
+    def versions(self, regions):
+        self._ensure_listener()
+        if not self._connected:
+            return {region: int(version) for region, version in zip(regions, self.client.hmget(self.key, regions)) if version}
+        return {region: self._versions.get(region, 0) for region in regions}
+
+    # Started lazily so the subscriber lives in the forked worker
+    def _ensure_listener(self):
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._connected = False
+            self._thread = threading.Thread(target=self._listen, name="cache-bus-subscriber", daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Loaded after subscribing so no bump can fall in between
+                self._versions = {region: int(version) for region, version in self.client.hgetall(self.key).items()}
+                self._connected = True
+                for message in pubsub.listen():
+                    region, _, version = message["data"].rpartition(":")
+                    self._versions[region] = max(int(version), self._versions.get(region, 0))
+            except Exception as e:
+                self._connected = False
+                logger.warning(f"Cache bus subscription lost, retrying: {str(e)}")
+                time.sleep(1)
+
+
+# Invalidation bus for per-worker caches of read-mostly data. Write handlers
+# publish the region they changed after committing; every worker compares
+# the region versions before each request and clears the caches subscribed
+# to a region whose version moved.
+class CacheBus:
+    def __init__(self):
+        self.transport = None
+        self.ttl = DEFAULT_TTL
+        self._handlers = {}
+        self._caches = []
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        url = app.config.get("CACHE_BUS_URL") or ""
+        if url.startswith(("redis://", "rediss://")):
+            self.transport = RedisTransport(url)
+        else:
+            directory = url[len("file://"):] if url.startswith("file://") else os.path.join(app.instance_path, "cache_bus")
+            self.transport = FileTransport(directory)
+        self.ttl = app.config["CACHE_BUS_TTL_SECONDS"]
+        for cache in self._caches:
+            cache.ttl = self.ttl
+        app.before_request(self.poll)
+
+    def subscribe(self, region, handler):
+        self._handlers.setdefault(region, []).append(handler)
+
+    # A TTLCache cleared whenever `region` is invalidated; the TTL is only a
+    # safety net for a missed message
+    def region_cache(self, region, max_entries=64):
+        cache = TTLCache(ttl=self.ttl, max_entries=max_entries)
+        self._caches.append(cache)
+        self.subscribe(region, cache.invalidate)
+        return cache
+
+    # Call after the commit, otherwise another worker can refill its cache
+    # from the old rows before the change is visible
+    def publish(self, region):
+        if self.transport is None:
+            return
+        try:
+            version = self.transport.publish(region)
+        except Exception as e:
+            # The write already committed; the TTL bounds how stale others get
+            logger.error(f"Failed to publish invalidation for {region}: {str(e)}", exc_info=True)
+            return
+        self._deliver(region, version)
+
+    def poll(self):
+        if self.transport is None or not self._handlers:
+            return
+        try:
+            versions = self.transport.versions(list(self._handlers))
+        except Exception as e:
+            logger.warning(f"Cache bus poll failed: {str(e)}")
+            return
+        for region, version in versions.items():
+            self._deliver(region, version)
+
+    def _deliver(self, region, version):
+        with self._lock:
+            if self._seen.get(region) == version:
+                return
+            self._seen[region] = version
+        for handler in self._handlers.get(region, ()):
+            handler()
+
+
+cache_bus = CacheBus()
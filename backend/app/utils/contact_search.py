@@ -0,0 +1,85 @@
+# app/utils/contact_search.py
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, insert, delete
+from sqlalchemy.dialects.mysql import match
+
+from app.extensions import db
+from app.models.contact_model import Contact, ContactSearchTerm
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    terms = set()
+    for token in TOKEN_RE.findall((text or "").lower()):
+        if len(token) >= MIN_TERM_LENGTH:
+            terms.add(token[:MAX_TERM_LENGTH])
+    return terms
+
+
+def uses_fulltext():
+    return db.engine.dialect.name == "mysql"
+
+
+# Adds the terms of the given contacts to the inverted index. Runs in the
+# caller's transaction so a contact and its terms are committed together.
+def index_contacts(contact_ids):
+    if uses_fulltext() or not contact_ids:
+        return 0
+
+    rows = db.session.execute(
+        select(Contact.id, Contact.name, Contact.message).where(Contact.id.in_(contact_ids))
+    ).all()
+    postings = [
+        {"term": term, "contact_id": contact_id}
+        for contact_id, name, message in rows
+        for term in tokenize(f"{name} {message}")
+    ]
+    if postings:
+        db.session.execute(insert(ContactSearchTerm), postings)
+    return len(postings)
+
+
+# Restricts a Contact query to rows matching every word in `q`
+def apply_search(query, q):
+    if uses_fulltext():
+        words = " ".join(f"+{term}" for term in tokenize(q))
+        return query.filter(match(Contact.name, Contact.message, against=words).in_boolean_mode())
+
+    terms = tokenize(q)
+    if not terms:
+        return query.filter(False)
+    for term in terms:
+        query = query.filter(Contact.id.in_(
+            select(ContactSearchTerm.contact_id).where(ContactSearchTerm.term == term)
+        ))
+    return query
+
+
+@click.command("reindex-contacts")
+@click.option("--batch-size", type=int, default=1000)
+@with_appcontext
+def reindex_contacts_command(batch_size):
+    """Rebuild the contact search index (no-op on MySQL, which uses FULLTEXT)."""
+    if uses_fulltext():
+        click.echo("MySQL FULLTEXT index in use, nothing to rebuild")
+        return
+
+    db.session.execute(delete(ContactSearchTerm))
+    last_id, total = 0, 0
+    while True:
+        ids = db.session.execute(
+            select(Contact.id).where(Contact.id > last_id).order_by(Contact.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        total += index_contacts(ids)
+        last_id = ids[-1]
+        db.session.commit()
+    db.session.commit()
+    click.echo(f"{total} search terms indexed")
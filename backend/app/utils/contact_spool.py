@@ -0,0 +1,268 @@
+# app/utils/contact_spool.py
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models.contact_model import Contact
+from app.utils.contact_search import index_contacts
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SUFFIX = ".spool"
+FLUSHING_SUFFIX = ".flushing"
+# Files that failed to insert CONTACT_SPOOL_MAX_ATTEMPTS times in a row are
+# renamed to this and left for an admin to look at
+BAD_SUFFIX = ".bad"
+
+
+# Windows has no signal 0: os.kill(pid, 0) there ends the process (as
+# CTRL_C_EVENT), so the process is looked up with OpenProcess instead
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+ERROR_ACCESS_DENIED = 5
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        return _windows_pid_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _windows_pid_alive(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Running under another account; any other failure means no such process
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+# Write-behind buffer for contact form submissions.
+#
+# Each worker process appends submissions to its own append-only spool file
+# (contacts-<pid>.spool) and acknowledges immediately. A background thread
+# swaps the file out for a fresh one when it reaches the batch size or the
+# flush interval elapses, and inserts the batch with a single executemany.
+# Files left behind by a crashed worker are replayed by the next flusher;
+# submission_id makes the replay idempotent. A file that keeps failing is
+# set aside as .bad so it cannot hold up the files after it.
+class ContactSpool:
+    def __init__(self, app):
+        self.app = app
+        self.directory = app.config.get("CONTACT_SPOOL_DIR") or os.path.join(app.instance_path, "contact_spool")
+        self.batch_size = app.config["CONTACT_SPOOL_BATCH_SIZE"]
+        self.flush_interval = app.config["CONTACT_SPOOL_FLUSH_SECONDS"]
+        self.fsync = app.config["CONTACT_SPOOL_FSYNC"]
+        self.max_attempts = app.config["CONTACT_SPOOL_MAX_ATTEMPTS"]
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = 0
+        self._pid = None
+        self._thread = None
+        self._failures = {}
+
+    @property
+    def spool_path(self):
+        return os.path.join(self.directory, f"contacts-{os.getpid()}{SPOOL_SUFFIX}")
+
+    def append(self, name, email, message, phone=None, service_type=None):
+        record = {
+            "submission_id": uuid.uuid4().hex,
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "service_type": service_type,
+            "message": message,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        line = json.dumps(record) + "\n"
+
+        self._ensure_flusher()
+        with self._lock:
+            with open(self.spool_path, "a", encoding="utf-8") as spool:
+                spool.write(line)
+                spool.flush()
+                if self.fsync:
+                    os.fsync(spool.fileno())
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._wakeup.set()
+        return record["submission_id"]
+
+    # The flusher thread is started lazily so it lives in the forked worker,
+    # not in a gunicorn master that preloaded the app
+    def _ensure_flusher(self):
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._pending = 0
+            self._thread = threading.Thread(target=self._run, name="contact-spool-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing contact spool: {str(e)}", exc_info=True)
+
+    # Atomically hands the active spool file over to the flusher; appends that
+    # arrive afterwards start a new file
+    def _claim_active(self):
+        with self._lock:
+            if not os.path.exists(self.spool_path):
+                return None
+            claimed = os.path.join(self.directory, f"contacts-{os.getpid()}-{time.time_ns()}{FLUSHING_SUFFIX}")
+            os.rename(self.spool_path, claimed)
+            self._pending = 0
+            return claimed
+
+    # Spool files of dead workers, plus our own batches that failed to insert
+    def _claim_orphans(self):
+        claimed = []
+        for path in glob.glob(os.path.join(self.directory, "contacts-*")):
+            if path.endswith(BAD_SUFFIX):
+                continue
+            owner = os.path.basename(path).split("-")[1].split(".")[0]
+            if not owner.isdigit():
+                continue
+            owner = int(owner)
+            if path.endswith(FLUSHING_SUFFIX) and owner == os.getpid():
+                claimed.append(path)
+            elif owner != os.getpid() and not _pid_alive(owner):
+                target = os.path.join(self.directory, f"contacts-{os.getpid()}-{time.time_ns()}{FLUSHING_SUFFIX}")
+                try:
+                    os.rename(path, target)
+                except FileNotFoundError:
+                    # Another worker recovered it first
+                    continue
+                claimed.append(target)
+        return claimed
+
+    def flush(self):
+        paths = self._claim_orphans()
+        active = self._claim_active()
+        if active:
+            paths.append(active)
+
+        inserted = 0
+        for path in sorted(paths):
+            try:
+                inserted += self._replay(path)
+            except Exception as e:
+                logger.error(f"Error flushing {os.path.basename(path)}: {str(e)}", exc_info=True)
+                self._record_failure(path)
+        return inserted
+
+    # The file stays claimed and is retried on the next flush, until it has
+    # failed max_attempts times
+    def _record_failure(self, path):
+        attempts = self._failures.get(path, 0) + 1
+        if attempts < self.max_attempts:
+            self._failures[path] = attempts
+            return
+        self._failures.pop(path, None)
+        bad_path = path[:-len(FLUSHING_SUFFIX)] + BAD_SUFFIX
+        try:
+            os.rename(path, bad_path)
+            logger.error(f"Set aside {os.path.basename(bad_path)} after {attempts} failed flushes")
+        except OSError as e:
+            logger.error(f"Could not set aside {os.path.basename(path)}: {str(e)}")
+
+    def _replay(self, path):
+        rows = []
+        with open(path, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning(f"Skipping unreadable line in {path}")
+                    continue
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                rows.append(row)
+
+        try:
+            inserted = 0
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                seen = set(db.session.execute(
+                    select(Contact.submission_id).where(
+                        Contact.submission_id.in_([row["submission_id"] for row in batch])
+                    )
+                ).scalars())
+                batch = [row for row in batch if row["submission_id"] not in seen]
+                if batch:
+                    db.session.execute(insert(Contact), batch)
+                    index_contacts(db.session.execute(
+                        select(Contact.id).where(
+                            Contact.submission_id.in_([row["submission_id"] for row in batch])
+                        )
+                    ).scalars().all())
+                    inserted += len(batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        os.remove(path)
+        self._failures.pop(path, None)
+        logger.info(f"Flushed {inserted} contact submissions from {os.path.basename(path)}")
+        return inserted
+
+
+def init_contact_spool(app):
+    spool = ContactSpool(app)
+    app.extensions["contact_spool"] = spool
+    # Start the flusher with the first request so orphaned spools get
+    # replayed even if no new submissions arrive
+    app.before_request(spool._ensure_flusher)
+
+
+def get_contact_spool():
+    return current_app.extensions["contact_spool"]
+
+
+@click.command("flush-contacts")
+@with_appcontext
+def flush_contacts_command():
+    """Insert every spooled contact submission, including those left by crashed workers."""
+    inserted = get_contact_spool().flush()
+    click.echo(f"{inserted} contact submissions inserted")
@@ -0,0 +1,149 @@
+# app/utils/customer_index.py
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.customer_model import Customer
+from app.utils.cache_bus import cache_bus, CUSTOMERS
+
+DIGITS_RE = re.compile(r"\D+")
+
+
+def _normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+# Prefix keys for one customer: the full name, each word of it (so "ade" finds
+# "Grace Adeyemi"), the email, and the phone number as bare digits
+def _keys(full_name, email, contact):
+    name = _normalize(full_name)
+    keys = {name, _normalize(email)}
+    keys.update(name.split(" "))
+    digits = DIGITS_RE.sub("", contact or "")
+    if digits:
+        keys.add(digits)
+    keys.discard("")
+    return keys
+
+
+# Per-worker typeahead index over customers, kept as a sorted array of
+# (key, customer_id) so a prefix lookup is one bisect and a short scan.
+#
+# It is filled with one query on first use, patched in place by the register
+# and update handlers, and catches up with writes made by other workers by
+# loading only rows whose updated_at moved past its watermark. That catch-up
+# runs on the next search after CUSTOMERS is published, or once the cache bus
+# TTL has passed for writes that did not publish.
+class CustomerPrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._keys_by_id = {}
+        self._customers = {}
+        self._watermark = None
+        self._loaded = False
+        self._stale = True
+        self._refreshed_at = 0.0
+
+    def _add(self, customer_id, full_name, email, contact):
+        self._remove(customer_id)
+        keys = _keys(full_name, email, contact)
+        for key in keys:
+            insort(self._entries, (key, customer_id))
+        self._keys_by_id[customer_id] = keys
+        self._customers[customer_id] = {
+            "id": customer_id,
+            "full_name": full_name,
+            "email": email,
+            "contact": contact
+        }
+
+    def _remove(self, customer_id):
+        for key in self._keys_by_id.pop(customer_id, ()):
+            position = bisect_left(self._entries, (key, customer_id))
+            if position < len(self._entries) and self._entries[position] == (key, customer_id):
+                del self._entries[position]
+        self._customers.pop(customer_id, None)
+
+    def mark_stale(self):
+        self._stale = True
+
+    def _refresh(self):
+        # Cleared first so a publish during the query is not lost
+        self._stale = False
+        self._refreshed_at = time.monotonic()
+        query = select(Customer.id, Customer.full_name, Customer.email, Customer.contact, Customer.updated_at)
+        if self._loaded and self._watermark is not None:
+            query = query.where(Customer.updated_at >= self._watermark)
+
+        rows = db.session.execute(query).all()
+        with self._lock:
+            if not self._loaded:
+                # Bulk build: one sort instead of an insort per key
+                self._entries = sorted(
+                    (key, row.id)
+                    for row in rows
+                    for key in _keys(row.full_name, row.email, row.contact)
+                )
+                for row in rows:
+                    self._keys_by_id[row.id] = _keys(row.full_name, row.email, row.contact)
+                    self._customers[row.id] = {
+                        "id": row.id,
+                        "full_name": row.full_name,
+                        "email": row.email,
+                        "contact": row.contact
+                    }
+                self._loaded = True
+            else:
+                for row in rows:
+                    self._add(row.id, row.full_name, row.email, row.contact)
+
+            for row in rows:
+                if row.updated_at and (self._watermark is None or row.updated_at > self._watermark):
+                    self._watermark = row.updated_at
+
+    def upsert(self, customer):
+        if not self._loaded:
+            return
+        with self._lock:
+            self._add(customer.id, customer.full_name, customer.email, customer.contact)
+
+    def remove(self, customer_id):
+        with self._lock:
+            self._remove(customer_id)
+
+    def search(self, q, limit=10):
+        if self._stale or time.monotonic() - self._refreshed_at > cache_bus.ttl:
+            self._refresh()
+
+        prefix = _normalize(q)
+        digits = DIGITS_RE.sub("", q)
+        prefixes = [prefix]
+        # Let "0772 123" match the stored digits "0772123456"
+        if digits and digits != prefix:
+            prefixes.append(digits)
+
+        with self._lock:
+            matches = []
+            seen = set()
+            for p in prefixes:
+                for position in range(bisect_left(self._entries, (p,)), len(self._entries)):
+                    key, customer_id = self._entries[position]
+                    if not key.startswith(p):
+                        break
+                    if customer_id in seen:
+                        continue
+                    seen.add(customer_id)
+                    matches.append((key != p, len(key), customer_id))
+
+            # Exact key matches first, then the shortest (closest) keys
+            matches.sort()
+            return [self._customers[customer_id] for _, _, customer_id in matches[:limit]]
+
+
+customer_index = CustomerPrefixIndex()
+cache_bus.subscribe(CUSTOMERS, customer_index.mark_stale)
@@ -0,0 +1,191 @@
+# app/utils/delivery_zones.py
+import json
+import logging
+from decimal import Decimal
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions import db
+from app.models.delivery_zone_model import DeliveryZone
+from app.utils.cache_bus import cache_bus
+from app.utils.geocoding import address_key, geocode_addresses
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_ZONES = "delivery_zones"
+EARTH_RADIUS_KM = 6371.0088
+
+# Per-worker zone index, rebuilt when DELIVERY_ZONES is published
+zone_cache = cache_bus.region_cache(DELIVERY_ZONES, max_entries=1)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+# Ray casting over the ring's edges, vectorized across the points
+def points_in_polygon(lng, lat, ring):
+    inside = np.zeros(lng.shape, dtype=bool)
+    x0, y0 = ring[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for x1, y1 in ring:
+            crosses = ((y1 > lat) != (y0 > lat)) & (lng < (x0 - x1) * (lat - y1) / (y0 - y1) + x1)
+            inside ^= crosses
+            x0, y0 = x1, y1
+    return inside
+
+
+def _ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1))) / 2
+
+
+# Grid buckets over the zones' bounding boxes. A batch of points is grouped
+# by cell, so each zone's polygon test only runs on the points in cells it
+# touches. Where zones overlap the smaller one wins (an inner zone priced
+# differently from the area around it).
+class ZoneIndex:
+    def __init__(self, zones, cell_degrees):
+        self.cell = cell_degrees
+        zones = sorted(zones, key=lambda zone: _ring_area(zone["ring"]))
+        self.zones = zones
+        self.base_fee = np.array([zone["base_fee"] for zone in zones] + [0.0])
+        self.per_km_fee = np.array([zone["per_km_fee"] for zone in zones] + [0.0])
+        self.buckets = {}
+        for position, zone in enumerate(zones):
+            lng_min, lat_min = np.floor(zone["ring"].min(axis=0) / self.cell).astype(int)
+            lng_max, lat_max = np.floor(zone["ring"].max(axis=0) / self.cell).astype(int)
+            for x in range(lng_min, lng_max + 1):
+                for y in range(lat_min, lat_max + 1):
+                    self.buckets.setdefault((x, y), []).append(position)
+
+    # Index into self.zones for each point, -1 when it is in no zone
+    def locate(self, lat, lng):
+        result = np.full(lat.shape, -1)
+        if not lat.size or not self.zones:
+            return result
+        cells, inverse = np.unique(
+            np.stack([np.floor(lng / self.cell), np.floor(lat / self.cell)], axis=1).astype(int),
+            axis=0, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        cells_by_zone = {}
+        for cell_index, cell in enumerate(map(tuple, cells.tolist())):
+            for position in self.buckets.get(cell, ()):
+                cells_by_zone.setdefault(position, []).append(cell_index)
+
+        for position in sorted(cells_by_zone):
+            candidates = np.flatnonzero(np.isin(inverse, cells_by_zone[position]) & (result < 0))
+            if candidates.size:
+                inside = points_in_polygon(lng[candidates], lat[candidates], self.zones[position]["ring"])
+                result[candidates[inside]] = position
+        return result
+
+
+def load_zone_index():
+    zones = [
+        {
+            "id": zone.id,
+            "name": zone.name,
+            "ring": np.array(zone.polygon, dtype=float),
+            "base_fee": float(zone.base_fee),
+            "per_km_fee": float(zone.per_km_fee)
+        }
+        for zone in DeliveryZone.query.filter_by(active=True).all()
+        if len(zone.polygon) >= 3
+    ]
+    return ZoneIndex(zones, current_app.config["DELIVERY_ZONE_GRID_DEGREES"])
+
+
+# Quotes a batch of addresses: one cached geocode pass, then zone lookup and
+# fee for all placed points at once. Returns one dict per address, in order;
+# `error` says why an address has no fee.
+def quote_addresses(addresses):
+    config = current_app.config
+    coords = geocode_addresses(addresses)
+    index = zone_cache.get_or_compute("index", load_zone_index)
+
+    quotes = []
+    placed = []
+    for address in addresses:
+        point = coords.get(address_key(address)) if address and str(address).strip() else None
+        quotes.append({
+            "address": address,
+            "latitude": point[0] if point else None,
+            "longitude": point[1] if point else None,
+            "zone_id": None,
+            "zone": None,
+            "distance_km": None,
+            "fee": None,
+            "error": None if point else "address_not_found"
+        })
+        if point:
+            placed.append(len(quotes) - 1)
+    if not placed:
+        return quotes
+
+    lat = np.array([quotes[i]["latitude"] for i in placed], dtype=float)
+    lng = np.array([quotes[i]["longitude"] for i in placed], dtype=float)
+    positions = index.locate(lat, lng)
+    distance = haversine_km(config["DELIVERY_ORIGIN_LATITUDE"], config["DELIVERY_ORIGIN_LONGITUDE"], lat, lng)
+    rounding = config["DELIVERY_FEE_ROUNDING"]
+    fees = index.base_fee[positions] + index.per_km_fee[positions] * distance
+    if rounding:
+        fees = np.ceil(fees / rounding) * rounding
+
+    for i, position, km, fee in zip(placed, positions.tolist(), distance.tolist(), fees.tolist()):
+        quote = quotes[i]
+        quote["distance_km"] = round(km, 2)
+        if position < 0:
+            quote["error"] = "outside_delivery_zones"
+            continue
+        zone = index.zones[position]
+        quote.update(zone_id=zone["id"], zone=zone["name"], fee=round(fee, 2))
+    return quotes
+
+
+def apply_quote(delivery, quote):
+    delivery.latitude = quote["latitude"]
+    delivery.longitude = quote["longitude"]
+    delivery.zone_id = quote["zone_id"]
+    delivery.delivery_fee = Decimal(str(quote["fee"])) if quote["fee"] is not None else None
+
+
+@click.command("load-delivery-zones")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--replace", is_flag=True, help="Deactivate zones missing from the file.")
+@with_appcontext
+def load_delivery_zones_command(path, replace):
+    """Load delivery zones from a GeoJSON FeatureCollection of polygons."""
+    with open(path, encoding="utf-8") as f:
+        features = json.load(f).get("features", [])
+
+    existing = {zone.name: zone for zone in DeliveryZone.query.all()}
+    names = set()
+    for feature in features:
+        properties = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        name = properties.get("name")
+        if not name or geometry.get("type") != "Polygon":
+            raise click.ClickException("Every feature needs a name and a Polygon geometry")
+        zone = existing.get(name) or DeliveryZone(name=name)
+        # Outer ring only; holes are not used for delivery areas
+        zone.polygon = [[float(lng), float(lat)] for lng, lat in geometry["coordinates"][0]]
+        zone.base_fee = properties.get("base_fee", 0)
+        zone.per_km_fee = properties.get("per_km_fee", 0)
+        zone.active = True
+        db.session.add(zone)
+        names.add(name)
+
+    if replace:
+        for name, zone in existing.items():
+            if name not in names:
+                zone.active = False
+    db.session.commit()
+    cache_bus.publish(DELIVERY_ZONES)
+    click.echo(f"{len(names)} delivery zones loaded")
@@ -0,0 +1,148 @@
+# app/utils/geocoding.py
+import json
+import logging
+import re
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import import_string
+
+from app.extensions import db
+from app.models.delivery_zone_model import GeocodedAddress
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+
+# Approximate centres of the areas we deliver to, as (latitude, longitude)
+LOCAL_PLACES = {
+    "kampala": (0.3136, 32.5811),
+    "nakasero": (0.3240, 32.5790),
+    "kololo": (0.3330, 32.5950),
+    "wandegeya": (0.3350, 32.5700),
+    "mulago": (0.3400, 32.5760),
+    "kamwokya": (0.3450, 32.5900),
+    "ntinda": (0.3540, 32.6160),
+    "naguru": (0.3420, 32.6060),
+    "nakawa": (0.3300, 32.6160),
+    "bugolobi": (0.3180, 32.6210),
+    "luzira": (0.2990, 32.6420),
+    "muyenga": (0.2960, 32.6120),
+    "kansanga": (0.2880, 32.6050),
+    "kabalagala": (0.2960, 32.6000),
+    "makindye": (0.2790, 32.5920),
+    "nsambya": (0.3000, 32.5870),
+    "rubaga": (0.3030, 32.5530),
+    "mengo": (0.3020, 32.5650),
+    "nateete": (0.2970, 32.5340),
+    "kawempe": (0.3800, 32.5600),
+    "bwaise": (0.3540, 32.5580),
+    "kyebando": (0.3600, 32.5750),
+    "kisaasi": (0.3690, 32.6000),
+    "kyanja": (0.3880, 32.5990),
+    "najjera": (0.3830, 32.6290),
+    "kira": (0.3970, 32.6400),
+    "namugongo": (0.3900, 32.6500),
+    "bweyogerere": (0.3560, 32.6650),
+    "mukono": (0.3533, 32.7553),
+    "wakiso": (0.4040, 32.4590),
+    "nansana": (0.3630, 32.5280),
+    "kajjansi": (0.2110, 32.5510),
+    "entebbe": (0.0512, 32.4637),
+}
+
+
+def address_key(address):
+    return " ".join(str(address).lower().split())[:255]
+
+
+# Offline stand-in for a real geocoder: places an address at the most
+# specific known place name it mentions. GEOCODER_GAZETTEER may point at a
+# JSON file of {"place": [latitude, longitude]} replacing the built-in list.
+class LocalGeocoder:
+    name = "local"
+
+    def __init__(self, places=None):
+        places = places or LOCAL_PLACES
+        self.places = [
+            (re.compile(rf"\b{re.escape(place.lower())}\b"), tuple(coords))
+            for place, coords in sorted(places.items(), key=lambda item: -len(item[0]))
+        ]
+
+    def geocode(self, address):
+        for pattern, coords in self.places:
+            if pattern.search(address):
+                return coords
+        return None
+
+
+# GEOCODER is "local" or the import path of a class ("package.module:Class")
+# whose instances have a `name` and geocode(address) -> (lat, lng) or None
+def get_geocoder():
+    geocoder = current_app.extensions.get("geocoder")
+    if geocoder is None:
+        path = current_app.config["GEOCODER"]
+        if path == "local":
+            gazetteer = current_app.config.get("GEOCODER_GAZETTEER")
+            places = None
+            if gazetteer:
+                with open(gazetteer, encoding="utf-8") as f:
+                    places = json.load(f)
+            geocoder = LocalGeocoder(places)
+        else:
+            geocoder = import_string(path)()
+        current_app.extensions["geocoder"] = geocoder
+    return geocoder
+
+
+# Returns {address_key: (latitude, longitude) or None} for the addresses.
+# Cached keys are read in a few IN queries; only new ones reach the
+# geocoder, and their results are cached in a separate transaction.
+def geocode_addresses(addresses):
+    keys = {address_key(address) for address in addresses if address and str(address).strip()}
+    found = {}
+    pending = list(keys)
+    for start in range(0, len(pending), LOOKUP_CHUNK):
+        for key, latitude, longitude in db.session.execute(
+            select(GeocodedAddress.address_key, GeocodedAddress.latitude, GeocodedAddress.longitude)
+            .where(GeocodedAddress.address_key.in_(pending[start:start + LOOKUP_CHUNK]))
+        ):
+            found[key] = (latitude, longitude) if latitude is not None else None
+
+    missing = keys - found.keys()
+    if not missing:
+        return found
+
+    geocoder = get_geocoder()
+    rows = []
+    now = datetime.utcnow()
+    for key in missing:
+        try:
+            coords = geocoder.geocode(key)
+        except Exception as e:
+            # Not cached, so the address is tried again next time
+            logger.warning(f"Geocoding '{key}' failed: {str(e)}")
+            found[key] = None
+            continue
+        found[key] = tuple(coords) if coords else None
+        rows.append({
+            "address_key": key,
+            "latitude": coords[0] if coords else None,
+            "longitude": coords[1] if coords else None,
+            "provider": geocoder.name,
+            "created_at": now
+        })
+
+    if rows:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(GeocodedAddress), rows)
+        except IntegrityError:
+            # Another worker cached some of these first; theirs are as good
+            logger.debug("Geocode cache insert raced with another worker")
+        except Exception as e:
+            # The cache is best effort; the quote itself does not depend on it
+            logger.warning(f"Failed to cache geocoded addresses: {str(e)}")
+    return found
@@ -0,0 +1,115 @@
+# app/utils/hot_statements.py
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+from app.extensions import db
+from app.models.menu_item_model import MenuItem
+from app.models.order_model import Order
+from app.models.customer_model import Customer
+from app.models.admin_user_model import AdminUser
+from app.models.delivery_model import Delivery
+
+logger = logging.getLogger(__name__)
+
+def _register(statements):
+    # The name rides along as an execution option (not part of the cache key)
+    # so cache outcomes can be counted per statement
+    return {
+        name: (statement.execution_options(hot_statement=name), params)
+        for name, (statement, params) in statements.items()
+    }
+
+
+# Statements on the request path, built once at import with bind parameters
+# so their cache key is computed from the same construct every time instead
+# of a fresh Model.query chain per request. name -> (statement, prewarm params)
+HOT_STATEMENTS = _register({
+    "menu_items.all": (select(MenuItem), {}),
+    "menu_items.by_id": (select(MenuItem).where(MenuItem.id == bindparam("id")), {"id": 0}),
+    "orders.by_id": (select(Order).where(Order.id == bindparam("id")), {"id": 0}),
+    "customers.by_email": (select(Customer).where(Customer.email == bindparam("email")), {"email": ""}),
+    "admin_users.by_email": (select(AdminUser).where(AdminUser.email == bindparam("email")), {"email": ""}),
+    "deliveries.by_id": (select(Delivery).where(Delivery.delivery_id == bindparam("id")), {"id": 0}),
+    "deliveries.by_staff": (
+        select(Delivery).where(Delivery.staff_id == bindparam("staff_id"))
+        .order_by(Delivery.delivery_date.desc(), Delivery.delivery_id.desc()),
+        {"staff_id": 0}
+    ),
+})
+
+
+def scalars(name, **params):
+    return db.session.scalars(HOT_STATEMENTS[name][0], params)
+
+
+def first(name, **params):
+    return db.session.scalars(HOT_STATEMENTS[name][0], params).first()
+
+
+# Compiled-cache outcomes per hot statement and for all statements, counted
+# from each execution context
+class StatementCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {"hits": 0, "misses": 0, "uncached": 0}
+        self.by_name = {name: {"hits": 0, "misses": 0} for name in HOT_STATEMENTS}
+        self.prewarm_ms = None
+        self.engine = None
+
+    def attach(self, engine):
+        self.engine = engine
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        outcome = "hits" if context.cache_hit == CACHE_HIT else "misses" if context.cache_hit == CACHE_MISS else "uncached"
+        name = context.execution_options.get("hot_statement")
+        with self._lock:
+            self.totals[outcome] += 1
+            if name in self.by_name and outcome != "uncached":
+                self.by_name[name][outcome] += 1
+
+    def report(self):
+        def rate(counts):
+            cached = counts["hits"] + counts["misses"]
+            return round(counts["hits"] / cached, 4) if cached else None
+
+        with self._lock:
+            totals = dict(self.totals)
+            by_name = {name: dict(counts) for name, counts in self.by_name.items()}
+        compiled_cache = getattr(self.engine, "_compiled_cache", None)
+        return {
+            "cache_size": compiled_cache.capacity if compiled_cache is not None else None,
+            "cache_entries": len(compiled_cache) if compiled_cache is not None else None,
+            "prewarm_ms": self.prewarm_ms,
+            "totals": dict(totals, hit_rate=rate(totals)),
+            "statements": {name: dict(counts, hit_rate=rate(counts)) for name, counts in by_name.items()}
+        }
+
+
+statement_stats = StatementCacheStats()
+
+
+# Runs every hot statement once so the worker's first requests find them in
+# the compiled cache, with mappers configured and a pooled connection open
+def prewarm(app):
+    started = time.perf_counter()
+    with app.app_context():
+        statement_stats.attach(db.engine)
+        if not app.config["SQL_PREWARM"]:
+            return
+        try:
+            for statement, params in HOT_STATEMENTS.values():
+                db.session.execute(statement, params).all()
+        except Exception as e:
+            # Tables may not exist yet; the statements then compile on first use
+            logger.warning(f"Statement prewarm failed: {str(e)}")
+        finally:
+            db.session.rollback()
+            db.session.remove()
+    statement_stats.prewarm_ms = round((time.perf_counter() - started) * 1000, 1)
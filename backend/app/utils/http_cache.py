@@ -0,0 +1,71 @@
+# app/utils/http_cache.py
+import hashlib
+from datetime import timezone
+from flask import request, make_response
+from sqlalchemy import func
+from app.extensions import db
+from app.status_codes import HTTP_304_NOT_MODIFIED, HTTP_409_CONFLICT, HTTP_428_PRECONDITION_REQUIRED
+
+
+# HTTP dates only carry whole seconds, so drop microseconds before comparing
+def _http_datetime(value):
+    if value is None:
+        return None
+    return value.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+# Cheap validators for a whole table: one aggregate query, no rows loaded
+def collection_validators(model):
+    latest, count = db.session.query(
+        func.max(model.updated_at), func.count()
+    ).select_from(model).one()
+
+    fingerprint = f"{model.__tablename__}:{count}:{latest.isoformat() if latest else ''}"
+    etag = hashlib.md5(fingerprint.encode("utf-8")).hexdigest()
+    return etag, latest
+
+
+def is_not_modified(etag=None, last_modified=None):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if etag is not None and request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    last_modified = _http_datetime(last_modified)
+    if last_modified is not None and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+
+    return False
+
+
+def add_validators(response, etag=None, last_modified=None):
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _http_datetime(last_modified)
+    # Let clients keep the body but always revalidate before reusing it
+    response.cache_control.no_cache = True
+    return response
+
+
+# Returns a 304 response when the client copy is still fresh, otherwise None
+def not_modified_response(etag=None, last_modified=None):
+    if not is_not_modified(etag, last_modified):
+        return None
+    response = make_response("", HTTP_304_NOT_MODIFIED)
+    return add_validators(response, etag, last_modified)
+
+
+# Strong ETag carrying a row's version_id_col value, for optimistic concurrency
+def add_version_etag(response, version):
+    response.set_etag(str(version))
+    return response
+
+
+# For PUT: None when If-Match names the current version (or is "*"),
+# otherwise the status to answer with
+def check_if_match(version):
+    if not request.if_match:
+        return HTTP_428_PRECONDITION_REQUIRED
+    if request.if_match.star_tag or request.if_match.contains(str(version)):
+        return None
+    return HTTP_409_CONFLICT
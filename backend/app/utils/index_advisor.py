@@ -0,0 +1,228 @@
+# app/utils/index_advisor.py
+import os
+import re
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import inspect
+
+from app.extensions import db
+from app.utils.slow_query_log import load_slow_queries
+
+QUALIFIED = r"[`\"]?(\w+)[`\"]?\.[`\"]?(\w+)[`\"]?"
+ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+[`\"]?(\w+)[`\"]?\s+AS\s+[`\"]?(\w+)[`\"]?", re.IGNORECASE)
+JOIN_RE = re.compile(rf"{QUALIFIED}\s*=\s*{QUALIFIED}")
+PREDICATE_RE = re.compile(rf"{QUALIFIED}\s*(<=|>=|!=|<>|=|<|>|\bIN\b|\bLIKE\b|\bBETWEEN\b|\bIS\b)", re.IGNORECASE)
+ORDER_RE = re.compile(r"\bORDER BY\b(.*?)(?:\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)", re.IGNORECASE)
+FROM_TABLE_RE = re.compile(r"\bFROM\s+[`\"]?(\w+)[`\"]?", re.IGNORECASE)
+SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)")
+POSTGRES_SCAN_RE = re.compile(r"Seq Scan on (\w+)")
+
+EQUALITY_OPS = {"=", "IN", "IS"}
+RANGE_OPS = {"<", ">", "<=", ">=", "LIKE", "BETWEEN"}
+MAX_INDEX_COLUMNS = 4
+
+
+# Tables the plan reads in full, and whether it sorts without an index
+def _plan_evidence(dialect, explain):
+    scanned, filesort = set(), False
+    for row in explain or []:
+        if dialect == "mysql":
+            if row.get("type") == "ALL":
+                scanned.add(row.get("table"))
+            filesort = filesort or "filesort" in (row.get("Extra") or "")
+        elif dialect == "sqlite":
+            detail = row.get("detail") or ""
+            match = SQLITE_SCAN_RE.match(detail)
+            if match:
+                scanned.add(match.group(1))
+            filesort = filesort or "TEMP B-TREE FOR ORDER BY" in detail
+        else:
+            plan = " ".join(str(value) for value in row.values())
+            scanned.update(POSTGRES_SCAN_RE.findall(plan))
+            filesort = filesort or "Sort" in plan
+    return scanned, filesort
+
+
+# Per table: equality columns in order of appearance, range columns, and
+# ORDER BY columns, with aliases resolved to table names
+def _predicates(shape):
+    aliases = {alias: table for table, alias in ALIAS_RE.findall(shape)}
+    tables = {}
+
+    def add(kind, table, column):
+        table = aliases.get(table, table)
+        columns = tables.setdefault(table, {"equality": [], "range": [], "order": []})[kind]
+        if column not in columns:
+            columns.append(column)
+
+    from_start = re.search(r"\bFROM\b", shape, re.IGNORECASE)
+    body = shape[from_start.start():] if from_start else shape
+    order = ORDER_RE.search(body)
+    filters = body[:order.start()] if order else body
+
+    for left_table, left_column, right_table, right_column in JOIN_RE.findall(filters):
+        add("equality", left_table, left_column)
+        add("equality", right_table, right_column)
+    for table, column, op in PREDICATE_RE.findall(filters):
+        op = op.upper()
+        if op in EQUALITY_OPS:
+            add("equality", table, column)
+        elif op in RANGE_OPS:
+            add("range", table, column)
+    if order:
+        for table, column in re.findall(QUALIFIED, order.group(1)):
+            add("order", table, column)
+    return tables, aliases
+
+
+# Equality columns first, then one range column, or the ORDER BY columns when
+# there is no range so the index also returns rows in order
+def _composite(columns):
+    composite = list(columns["equality"])
+    if columns["range"]:
+        composite.append(columns["range"][0])
+    else:
+        composite.extend(c for c in columns["order"] if c not in composite)
+    return composite[:MAX_INDEX_COLUMNS]
+
+
+# Column lists of every index the table already has, in the database or
+# declared on the models (pending a migration)
+def _existing_indexes(inspector, table_name):
+    existing = []
+    table = db.metadata.tables.get(table_name)
+    if table is not None:
+        existing.extend([column.name for column in index.columns] for index in table.indexes)
+        existing.append([column.name for column in table.primary_key.columns])
+    if inspector.has_table(table_name):
+        existing.extend(index["column_names"] for index in inspector.get_indexes(table_name))
+        existing.extend(unique["column_names"] for unique in inspector.get_unique_constraints(table_name))
+        existing.append(inspector.get_pk_constraint(table_name)["constrained_columns"])
+    return existing
+
+
+def _covered(columns, existing):
+    return any(index[:len(columns)] == columns for index in existing)
+
+
+def _index_name(table, columns):
+    return f"ix_{table}_{'_'.join(columns)}"[:64]
+
+
+# Turns captured slow queries into index recommendations. A table is a
+# candidate when its EXPLAIN shows a full scan or an unindexed sort (or no
+# plan was captured, as for UPDATE/DELETE); candidates already served by the
+# leading columns of an existing index are dropped.
+def recommend_indexes(shapes, min_calls=1):
+    inspector = inspect(db.engine)
+    recommendations = {}
+
+    for stats in sorted(shapes.values(), key=lambda s: s["total_ms"], reverse=True):
+        if stats["calls"] < min_calls:
+            continue
+        scanned, filesort = _plan_evidence(stats["dialect"], stats["explain"])
+        tables, aliases = _predicates(stats["shape"])
+        scanned = {aliases.get(name, name) for name in scanned}
+        first_table = FROM_TABLE_RE.search(stats["shape"])
+        first_table = first_table.group(1) if first_table else None
+
+        for table, columns in tables.items():
+            if table not in db.metadata.tables:
+                continue
+            needs_index = (
+                not stats["explain"]
+                or table in scanned
+                or (filesort and table == first_table and columns["order"])
+            )
+            composite = [c for c in _composite(columns) if c in db.metadata.tables[table].columns]
+            if not needs_index or not composite or _covered(composite, _existing_indexes(inspector, table)):
+                continue
+
+            key = (table, tuple(composite))
+            recommendation = recommendations.setdefault(key, {
+                "table": table,
+                "columns": composite,
+                "name": _index_name(table, composite),
+                "calls": 0,
+                "total_ms": 0.0,
+                "shapes": []
+            })
+            recommendation["calls"] += stats["calls"]
+            recommendation["total_ms"] += stats["total_ms"]
+            recommendation["shapes"].append(stats["shape"])
+
+    # An index on (a) is redundant next to a recommended (a, b)
+    result = [
+        r for r in recommendations.values()
+        if not any(
+            o is not r and o["table"] == r["table"] and len(o["columns"]) > len(r["columns"])
+            and o["columns"][:len(r["columns"])] == r["columns"]
+            for o in recommendations.values()
+        )
+    ]
+    return sorted(result, key=lambda r: r["total_ms"], reverse=True)
+
+
+# Generates a revision through Flask-Migrate's Alembic config. Autogenerate
+# supplies the indexes declared on the models but missing from the database
+# (every other difference is left out), and the recommendations are appended.
+def write_index_migration(recommendations, message, directory=None):
+    from alembic import command
+    from alembic.operations import ops
+
+    config = current_app.extensions["migrate"].migrate.get_config(directory)
+    if not os.path.isdir(config.get_main_option("script_location")):
+        raise click.ClickException("No migrations directory, run `flask db init` first")
+
+    def keep_index_changes(context, revision, directives):
+        script = directives[0]
+        creates = [
+            op for table_ops in script.upgrade_ops.ops if isinstance(table_ops, ops.ModifyTableOps)
+            for op in table_ops.ops if isinstance(op, ops.CreateIndexOp)
+        ]
+        names = {op.index_name for op in creates}
+        creates.extend(
+            ops.CreateIndexOp(r["name"], r["table"], r["columns"])
+            for r in recommendations if r["name"] not in names
+        )
+        if not creates:
+            directives[:] = []
+            return
+        script.upgrade_ops.ops = [
+            ops.ModifyTableOps(table, [op for op in creates if op.table_name == table])
+            for table in sorted({op.table_name for op in creates})
+        ]
+        script.downgrade_ops = script.upgrade_ops.reverse()
+
+    return command.revision(config, message=message, autogenerate=True,
+                            process_revision_directives=keep_index_changes)
+
+
+@click.command("suggest-indexes")
+@click.option("--min-calls", default=1, show_default=True, help="Ignore statement shapes captured fewer times than this.")
+@click.option("--dry-run", is_flag=True, help="Only print the recommendations.")
+@click.option("-m", "--message", default="add recommended indexes", show_default=True, help="Migration message.")
+@click.option("-d", "--directory", default=None, help="Migrations directory (Flask-Migrate default if omitted).")
+@with_appcontext
+def suggest_indexes_command(min_calls, dry_run, message, directory):
+    """Recommend indexes from the slow query log and write them as an Alembic migration."""
+    path = current_app.config.get("SLOW_QUERY_LOG") or os.path.join(current_app.instance_path, "slow_queries.jsonl")
+    recommendations = recommend_indexes(load_slow_queries(path), min_calls=min_calls)
+
+    for r in recommendations:
+        click.echo(f"{r['name']}: {r['table']}({', '.join(r['columns'])}) "
+                   f"-- {r['calls']} slow calls, {r['total_ms']:.0f} ms total")
+        for shape in r["shapes"][:3]:
+            click.echo(f"    {shape[:160]}")
+    if not recommendations:
+        click.echo("No index recommendations from the slow query log")
+    if dry_run:
+        return
+
+    script = write_index_migration(recommendations, message, directory)
+    if script:
+        click.echo(f"Wrote migration {script.path}")
+    else:
+        click.echo("Database already has every recommended and declared index, no migration written")
@@ -0,0 +1,263 @@
+# app/utils/media_store.py
+import hashlib
+import logging
+import os
+import tempfile
+
+from flask import current_app, request
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import FormDataParser
+
+from app.extensions import db
+from app.models.media_asset_model import MediaAsset
+from app.status_codes import HTTP_400_BAD_REQUEST, HTTP_413_PAYLOAD_TOO_LARGE, HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+logger = logging.getLogger(__name__)
+
+MEDIA_GALLERY = "gallery"
+MEDIA_SERVICES = "services"
+
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+SNIFF_BYTES = 12
+# Room in the body for the boundaries, part headers and the text fields
+FORM_OVERHEAD_BYTES = 64 * 1024
+MAX_FORM_PARTS = 10
+
+
+class UploadRejected(Exception):
+    def __init__(self, message, status=HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+# Image type from the file's first bytes; the client's Content-Type is not trusted
+def sniff_image_type(head):
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def media_dir(kind):
+    return os.path.join(current_app.static_folder, kind)
+
+
+# File object the multipart parser streams a file part into, chunk by chunk.
+# Each chunk is hashed and written to a temp file next to its final place,
+# and the size and type limits are checked as it arrives, so a too large or
+# non-image upload stops at the chunk that gives it away.
+class HashingUpload:
+    def __init__(self, directory, max_bytes, allowed_types):
+        self.max_bytes = max_bytes
+        self.allowed_types = allowed_types
+        self.file = tempfile.NamedTemporaryFile(dir=directory, prefix=".upload-", delete=False)
+        self.path = self.file.name
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.content_type = None
+        self.target = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected(f"Image is larger than {self.max_bytes} bytes", HTTP_413_PAYLOAD_TOO_LARGE)
+        if len(self.head) < SNIFF_BYTES:
+            self.head = (self.head + data)[:SNIFF_BYTES]
+            if len(self.head) == SNIFF_BYTES:
+                self._check_type()
+        self.digest.update(data)
+        self.file.write(data)
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        return self.file.seek(offset, whence)
+
+    def _check_type(self):
+        self.content_type = sniff_image_type(self.head)
+        if self.content_type not in self.allowed_types:
+            raise UploadRejected(
+                f"Only {', '.join(sorted(self.allowed_types))} images are accepted", HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+    def finish(self):
+        self.file.close()
+        if self.size == 0:
+            raise UploadRejected("Image file is empty")
+        if self.content_type is None:
+            self._check_type()
+        self.sha256 = self.digest.hexdigest()
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    # After the commit: moves the file to the path store_upload picked, unless
+    # the same content is already there
+    def place(self):
+        if self.target is None or os.path.exists(self.target):
+            self.discard()
+            return
+        try:
+            os.replace(self.path, self.target)
+        except OSError as e:
+            logger.warning(f"Could not move upload to {self.target}: {str(e)}")
+            self.discard()
+
+
+# Parses a multipart/form-data request with one image in `field`, streaming
+# it to disk in the parser's fixed 64 KiB chunks; at most one chunk is held
+# in memory. Returns the text fields and the finished HashingUpload, which
+# store_upload then adds to the store. Raises UploadRejected.
+def receive_upload(kind, field="image"):
+    max_bytes = current_app.config["UPLOAD_MAX_BYTES"]
+    allowed_types = {t.strip() for t in current_app.config["UPLOAD_IMAGE_TYPES"].split(",") if t.strip() in IMAGE_TYPES}
+    if request.mimetype != "multipart/form-data":
+        raise UploadRejected("Send the image as multipart/form-data", HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    # Content-Length is the whole body, so an oversized upload is turned away
+    # before any of it is read
+    max_body = max_bytes + FORM_OVERHEAD_BYTES
+    if request.content_length is not None and request.content_length > max_body:
+        raise UploadRejected(f"Image is larger than {max_bytes} bytes", HTTP_413_PAYLOAD_TOO_LARGE)
+
+    directory = media_dir(kind)
+    os.makedirs(directory, exist_ok=True)
+    uploads = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        if uploads:
+            raise UploadRejected("Send one image per request")
+        upload = HashingUpload(directory, max_bytes, allowed_types)
+        uploads.append(upload)
+        return upload
+
+    parser = FormDataParser(
+        stream_factory,
+        max_form_memory_size=FORM_OVERHEAD_BYTES,
+        max_content_length=max_body,
+        silent=False,
+        max_form_parts=MAX_FORM_PARTS
+    )
+    try:
+        _, form, files = parser.parse(request.stream, request.mimetype, request.content_length, request.mimetype_params)
+        storage = files.get(field)
+        if storage is None:
+            raise UploadRejected(f"An image file is required in the '{field}' field")
+        storage.stream.finish()
+        return form, storage.stream
+    except RequestEntityTooLarge:
+        for upload in uploads:
+            upload.discard()
+        raise UploadRejected(f"Image is larger than {max_bytes} bytes", HTTP_413_PAYLOAD_TOO_LARGE)
+    except ValueError as e:
+        for upload in uploads:
+            upload.discard()
+        raise UploadRejected(f"Malformed multipart body: {str(e)}")
+    except BaseException:
+        for upload in uploads:
+            upload.discard()
+        raise
+
+
+def find_asset(kind, filename):
+    if not filename:
+        return None
+    return MediaAsset.query.filter_by(kind=kind, filename=os.path.basename(filename)).first()
+
+
+# Adds a reference to the asset with the upload's content: a new asset row
+# for the first upload of some content, a ref_count bump for later ones.
+# Commit with the row that uses the returned asset's filename, then call
+# upload.place() to move the file in as <sha256><ext> (or drop it when that
+# file is already there); on failure roll back and call upload.discard().
+# Nothing reaches the final path before the commit, so a failed one leaves
+# no file behind.
+def store_upload(kind, upload):
+    asset = MediaAsset.query.filter_by(kind=kind, sha256=upload.sha256).first()
+    if asset is None:
+        filename = upload.sha256 + IMAGE_TYPES[upload.content_type]
+        try:
+            with db.session.begin_nested():
+                asset = MediaAsset(
+                    kind=kind,
+                    sha256=upload.sha256,
+                    filename=filename,
+                    content_type=upload.content_type,
+                    size_bytes=upload.size,
+                    ref_count=1
+                )
+                db.session.add(asset)
+            upload.target = os.path.join(media_dir(kind), filename)
+            return asset
+        except IntegrityError:
+            # Another worker stored the same content first. A locking read sees
+            # its row even where a plain one would be held to this transaction's
+            # snapshot (MySQL REPEATABLE READ)
+            asset = (
+                MediaAsset.query.filter_by(kind=kind, sha256=upload.sha256)
+                .with_for_update()
+                .populate_existing()
+                .one_or_none()
+            )
+            if asset is None:
+                # ... and rolled it back since
+                return store_upload(kind, upload)
+    # Incremented in SQL so concurrent uploads of the same content all count
+    asset.ref_count = MediaAsset.ref_count + 1
+    db.session.flush()
+    # The file normally exists; this upload restores it if it went missing
+    upload.target = os.path.join(media_dir(kind), asset.filename)
+    return asset
+
+
+# For rows that point at an existing file by name, e.g. image_url in JSON
+def retain_asset(kind, filename):
+    asset = find_asset(kind, filename)
+    if asset is not None:
+        asset.ref_count = MediaAsset.ref_count + 1
+        db.session.flush()
+    return asset
+
+
+# Drops one reference to the stored file. Returns (managed, path): path is
+# the file to remove_files() after the commit once nothing uses it, and
+# managed is False for files that were put in static/ by hand.
+def release_asset(kind, filename):
+    asset = find_asset(kind, filename)
+    if asset is None:
+        return False, None
+    asset.ref_count = MediaAsset.ref_count - 1
+    db.session.flush()
+    if asset.ref_count > 0:
+        return True, None
+    db.session.delete(asset)
+    return True, os.path.join(media_dir(kind), asset.filename)
+
+
+def remove_files(kind, paths):
+    for path in paths:
+        if not path:
+            continue
+        # The same content may have been uploaded again since the release
+        if find_asset(kind, path) is not None:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {str(e)}")
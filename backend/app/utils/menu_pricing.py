@@ -0,0 +1,108 @@
+# app/utils/menu_pricing.py
+from bisect import bisect_right
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.menu_item_model import MenuItem
+from app.models.menu_price_model import MenuItemPrice
+from app.utils.cache_bus import cache_bus, MENU_PRICES
+
+# Per-worker price timelines, dropped when MENU_PRICES is published. Kept
+# apart from MENU_ITEMS, which every stock change publishes
+price_book_cache = cache_bus.region_cache(MENU_PRICES, max_entries=1)
+
+
+# Sorted effective_from/price lists per menu item, so the price at any moment
+# is one bisect. Items that never had a price change have no history rows and
+# use MenuItem.price. A scheduled change is just a row dated in the future:
+# it takes effect when lookups pass its time, with nothing written then.
+class PriceBook:
+    def __init__(self, rows, list_prices):
+        self.timelines = {}
+        for menu_item_id, effective_from, price in rows:
+            times, prices = self.timelines.setdefault(menu_item_id, ([], []))
+            times.append(effective_from)
+            prices.append(price)
+        self.list_prices = list_prices
+        self.switches = sorted({when for times, _ in self.timelines.values() for when in times})
+
+    def price_at(self, menu_item_id, when):
+        timeline = self.timelines.get(menu_item_id)
+        if timeline is None:
+            return self.list_prices.get(menu_item_id)
+        times, prices = timeline
+        # Before the first recorded price the earliest one is the best we know
+        return prices[max(bisect_right(times, when) - 1, 0)]
+
+    # When the price in effect at `when` started, None without history
+    def price_since(self, menu_item_id, when):
+        timeline = self.timelines.get(menu_item_id)
+        if timeline is None:
+            return None
+        i = bisect_right(timeline[0], when)
+        return timeline[0][i - 1] if i else None
+
+    # Latest switch over at `when`; it only moves when some price takes
+    # effect, so caches keyed on it pick up scheduled changes on time
+    def last_switch(self, when):
+        i = bisect_right(self.switches, when)
+        return self.switches[i - 1] if i else None
+
+    def timeline(self, menu_item_id):
+        times, prices = self.timelines.get(menu_item_id, ([], []))
+        return list(zip(times, prices))
+
+
+def load_price_book():
+    rows = db.session.execute(
+        select(MenuItemPrice.menu_item_id, MenuItemPrice.effective_from, MenuItemPrice.price)
+        .order_by(MenuItemPrice.menu_item_id, MenuItemPrice.effective_from)
+    ).all()
+    list_prices = dict(db.session.execute(select(MenuItem.id, MenuItem.price)).all())
+    return PriceBook(rows, list_prices)
+
+
+def get_price_book():
+    return price_book_cache.get_or_compute("book", load_price_book)
+
+
+def price_at(menu_item, when=None):
+    price = get_price_book().price_at(menu_item.id, when or datetime.utcnow())
+    # A row created since the book was built is not in it yet
+    return menu_item.price if price is None else price
+
+
+# Times are kept to whole seconds: MySQL DATETIME rounds microseconds, which
+# could push a row a moment into the future or make two edits in one second
+# look different here but collide on the unique key there
+def _now():
+    return datetime.utcnow().replace(microsecond=0)
+
+
+# First history row for a new item
+def start_price_history(item):
+    item.prices.append(MenuItemPrice(price=item.price, effective_from=_now()))
+
+
+# Records a price change effective now, or at effective_from when that is in
+# the future. Only a change effective now touches MenuItem.price, which keeps
+# the price as of the last edit for callers that do not need point-in-time
+# prices. Publish MENU_ITEMS and MENU_PRICES after the commit.
+def set_price(item, price, effective_from=None):
+    now = _now()
+    effective_from = max((effective_from or now).replace(microsecond=0), now)
+
+    if not item.prices:
+        # Items from before price history: keep what they cost until now
+        created_at = item.created_at.replace(microsecond=0) if item.created_at else now
+        item.prices.append(MenuItemPrice(price=item.price, effective_from=min(created_at, now)))
+
+    existing = next((row for row in item.prices if row.effective_from == effective_from), None)
+    if existing:
+        existing.price = price
+    else:
+        item.prices.append(MenuItemPrice(price=price, effective_from=effective_from))
+    if effective_from == now:
+        item.price = price
@@ -0,0 +1,268 @@
+# app/utils/payment_reconciliation.py
+import csv
+import io
+import logging
+import re
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import select, insert, update, func
+
+from app.extensions import db
+from app.models.order_model import Order
+from app.models.customer_model import Customer
+from app.models.payment_model import PaymentRequest, PaymentStatement, PaymentTransaction
+from app.utils.status_transitions import PAYMENT_TRANSITIONS, bulk_transition
+
+logger = logging.getLogger(__name__)
+
+# Header names used by the providers' statement exports, lower-cased
+COLUMN_ALIASES = {
+    "txn_id": ("transaction_id", "transaction id", "txn_id", "financial transaction id", "external_id", "id"),
+    "amount": ("amount", "credit", "amount (ugx)"),
+    "timestamp": ("date", "timestamp", "transaction_date", "transaction date", "date/time", "time"),
+    "reference": ("reference", "external_reference", "external reference", "narration", "message"),
+    "phone": ("phone", "msisdn", "from", "sender", "payer", "from account"),
+    "status": ("status", "transaction status"),
+}
+REQUIRED_COLUMNS = ("txn_id", "amount", "timestamp")
+SUCCESS_STATUSES = {"successful", "success", "succeeded", "completed", "complete"}
+TIMESTAMP_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M")
+DIGITS_RE = re.compile(r"\D+")
+UPDATE_CHUNK = 1000
+
+
+class StatementError(ValueError):
+    pass
+
+
+# Mobile numbers are compared on their last digits so 0772..., 256772...
+# and +256 772... are the same payer
+def normalize_phone(value, digits):
+    value = DIGITS_RE.sub("", value or "")
+    return value[-digits:] if len(value) >= digits else None
+
+
+def to_cents(value):
+    try:
+        return int((Decimal(str(value).replace(",", "").strip()) * 100).to_integral_value())
+    except (InvalidOperation, ValueError):
+        raise StatementError(f"Invalid amount '{value}'")
+
+
+def _parse_timestamp(value, utc_offset):
+    value = (value or "").strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise StatementError(f"Invalid timestamp '{value}'")
+    # Statements are in local time; orders are stored in UTC
+    if parsed.tzinfo is not None:
+        return parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed - utc_offset
+
+
+def _resolve_columns(fieldnames):
+    headers = {(name or "").strip().lower(): name for name in fieldnames or ()}
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in headers:
+                columns[key] = headers[alias]
+                break
+    missing = [key for key in REQUIRED_COLUMNS if key not in columns]
+    if missing:
+        raise StatementError(f"Statement is missing columns for: {', '.join(missing)}")
+    return columns
+
+
+# Hash indexes over what a statement row can pay for: open payment requests
+# by reference, and open orders by (payer phone, amount) with their order
+# times sorted so the closest order inside the time window is a bisect away.
+# Every order or request is claimed by at most one transaction.
+class MatchIndex:
+    def __init__(self, since, window, phone_digits):
+        self.window = window
+        self.phone_digits = phone_digits
+        self.by_reference = {}
+        self.by_phone_amount = {}
+        self.claimed_orders = set()
+        self.claimed_requests = set()
+
+        for request_id, reference, order_id, amount in db.session.execute(
+            select(PaymentRequest.id, PaymentRequest.reference, PaymentRequest.order_id, PaymentRequest.amount)
+            .where(PaymentRequest.status == "pending", PaymentRequest.created_at >= since)
+        ):
+            self.by_reference[reference.upper()] = (request_id, order_id, to_cents(amount))
+
+        for order_id, order_date, amount, contact in db.session.execute(
+            select(Order.id, Order.order_date, Order.total_amount, Customer.contact)
+            .join(Customer, Customer.id == Order.customer_id)
+            .where(
+                func.lower(Order.payment_status).in_(PAYMENT_TRANSITIONS["paid"]),
+                Order.order_date >= since
+            )
+        ):
+            phone = normalize_phone(contact, phone_digits)
+            if phone:
+                self.by_phone_amount.setdefault((phone, to_cents(amount)), []).append((order_date, order_id))
+        for candidates in self.by_phone_amount.values():
+            candidates.sort()
+
+    # Returns (order_id, payment_request_id, match_method, exception_reason)
+    def match(self, reference, phone, cents, occurred_at):
+        if reference:
+            hit = self.by_reference.get(reference.strip().upper())
+            if hit:
+                request_id, order_id, expected = hit
+                if expected != cents:
+                    return None, None, None, "amount_mismatch"
+                if request_id in self.claimed_requests or order_id in self.claimed_orders:
+                    return None, None, None, "already_matched"
+                self.claimed_requests.add(request_id)
+                if order_id:
+                    self.claimed_orders.add(order_id)
+                return order_id, request_id, "reference", None
+
+        phone = normalize_phone(phone, self.phone_digits)
+        candidates = self.by_phone_amount.get((phone, cents)) if phone else None
+        if not candidates:
+            return None, None, None, "no_match"
+
+        best = None
+        i = bisect_left(candidates, (occurred_at - self.window,))
+        while i < len(candidates) and candidates[i][0] <= occurred_at + self.window:
+            order_date, order_id = candidates[i]
+            if order_id not in self.claimed_orders:
+                distance = abs(occurred_at - order_date)
+                if best is None or distance < best[0]:
+                    best = (distance, order_id)
+            i += 1
+        if best is None:
+            return None, None, None, "outside_time_window"
+        self.claimed_orders.add(best[1])
+        return best[1], None, "phone_amount", None
+
+
+# Reconciles one provider statement in a single streaming pass: rows are
+# parsed, de-duplicated against earlier uploads, matched in memory and
+# inserted in executemany chunks. Matched orders then move to "paid" with
+# set-based UPDATEs. Everything commits together; returns the statement.
+def reconcile_statement(stream, provider, filename=None):
+    config = current_app.config
+    started = time.perf_counter()
+    chunk_size = config["PAYMENT_INGEST_CHUNK_SIZE"]
+    utc_offset = timedelta(minutes=config["PAYMENT_STATEMENT_UTC_OFFSET_MINUTES"])
+
+    statement = PaymentStatement(provider=provider, filename=filename)
+    db.session.add(statement)
+    db.session.flush()
+
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    columns = _resolve_columns(reader.fieldnames)
+    index = MatchIndex(
+        since=datetime.utcnow() - timedelta(days=config["PAYMENT_MATCH_LOOKBACK_DAYS"]),
+        window=timedelta(minutes=config["PAYMENT_MATCH_WINDOW_MINUTES"]),
+        phone_digits=config["PAYMENT_PHONE_MATCH_DIGITS"]
+    )
+
+    counts = {"rows_total": 0, "matched": 0, "unmatched": 0, "duplicates": 0, "ignored": 0}
+    seen = set()
+    matched_orders, matched_requests = [], []
+    chunk = []
+
+    def flush_chunk():
+        ids = [row["provider_txn_id"] for row in chunk]
+        existing = set(db.session.execute(
+            select(PaymentTransaction.provider_txn_id).where(
+                PaymentTransaction.provider == provider,
+                PaymentTransaction.provider_txn_id.in_(ids)
+            )
+        ).scalars())
+        rows = []
+        for row in chunk:
+            if row["provider_txn_id"] in existing:
+                counts["duplicates"] += 1
+                continue
+            cents = row.pop("cents")
+            order_id, request_id, method, reason = (
+                (None, None, None, row.pop("invalid")) if "invalid" in row
+                else index.match(row["reference"], row["phone"], cents, row["occurred_at"])
+            )
+            row.update(
+                order_id=order_id,
+                payment_request_id=request_id,
+                match_method=method,
+                exception_reason=reason,
+                status="unmatched" if reason else "matched"
+            )
+            counts["unmatched" if reason else "matched"] += 1
+            if order_id:
+                matched_orders.append(order_id)
+            if request_id:
+                matched_requests.append(request_id)
+            rows.append(row)
+        if rows:
+            db.session.execute(insert(PaymentTransaction), rows)
+        chunk.clear()
+
+    for record in reader:
+        counts["rows_total"] += 1
+        status = (record.get(columns.get("status")) or "").strip().lower() if "status" in columns else "successful"
+        txn_id = (record.get(columns["txn_id"]) or "").strip()
+        if status not in SUCCESS_STATUSES or not txn_id:
+            counts["ignored"] += 1
+            continue
+        if txn_id in seen:
+            counts["duplicates"] += 1
+            continue
+        seen.add(txn_id)
+
+        row = {
+            "statement_id": statement.id,
+            "provider": provider,
+            "provider_txn_id": txn_id[:64],
+            "reference": (record.get(columns.get("reference")) or "").strip()[:64] or None,
+            "phone": (record.get(columns.get("phone")) or "").strip()[:30] or None,
+        }
+        try:
+            row["cents"] = to_cents(record.get(columns["amount"]))
+            row["occurred_at"] = _parse_timestamp(record.get(columns["timestamp"]), utc_offset)
+        except StatementError:
+            # Kept as an exception so nothing on the statement goes unaccounted
+            row.setdefault("cents", 0)
+            row["occurred_at"] = datetime.utcnow()
+            row["invalid"] = "invalid_row"
+        row["amount"] = Decimal(row["cents"]) / 100
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush_chunk()
+    if chunk:
+        flush_chunk()
+
+    for start in range(0, len(matched_orders), UPDATE_CHUNK):
+        bulk_transition(Order, Order.id, Order.payment_status, PAYMENT_TRANSITIONS,
+                        matched_orders[start:start + UPDATE_CHUNK], "paid")
+    for start in range(0, len(matched_requests), UPDATE_CHUNK):
+        db.session.execute(
+            update(PaymentRequest)
+            .where(PaymentRequest.id.in_(matched_requests[start:start + UPDATE_CHUNK]))
+            .values(status="paid")
+        )
+
+    for key, value in counts.items():
+        setattr(statement, key, value)
+    statement.duration_ms = int((time.perf_counter() - started) * 1000)
+    db.session.commit()
+    logger.info(f"Reconciled {provider} statement {statement.id}: {counts} in {statement.duration_ms} ms")
+    return statement
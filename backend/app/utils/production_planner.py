@@ -0,0 +1,239 @@
+# app/utils/production_planner.py
+import re
+from datetime import datetime
+
+import click
+import numpy as np
+from flask.cli import with_appcontext
+from sqlalchemy import select, func, literal, union_all
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.extensions import db
+from app.models.catering_event_model import CateringEvent, CateringEventLine
+from app.models.menu_item_model import MenuItem
+from app.models.order_model import Order
+from app.models.order_item_model import OrderItem
+from app.utils.cache_bus import cache_bus, CATERING_EVENTS
+
+# Events in these states are not cooked for
+INACTIVE_EVENT_STATUSES = ("cancelled", "rejected")
+CANCELLED_ORDER = "cancelled"
+EVENT_SOURCE, ORDER_SOURCE = 0, 1
+MENU_SPLIT_RE = re.compile(r"\s*(?:[,;/&+\n]|\band\b|\bwith\b)\s*", re.IGNORECASE)
+
+# Per-worker production plans by date range, dropped when CATERING_EVENTS is
+# published (event writes and menu item renames). New orders are picked up
+# within CACHE_BUS_TTL_SECONDS, which the plan reports.
+plan_cache = cache_bus.region_cache(CATERING_EVENTS, max_entries=32)
+
+
+# [{"menu_item_id": 3, "portions_per_guest": 1.5}, ...] -> ([(3, 1.5), ...], {3: "Jollof rice"}).
+# Checked in full, with one query for the menu items, before anything is changed
+def validate_menu_lines(lines):
+    if not isinstance(lines, list) or not lines:
+        raise ValueError("menu_lines must be a non-empty list")
+    parsed = []
+    for line in lines:
+        try:
+            menu_item_id = int(line["menu_item_id"])
+            factor = float(line.get("portions_per_guest", 1))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError("Each menu line needs a menu_item_id and a numeric portions_per_guest")
+        if not 0 < factor <= 100:
+            raise ValueError("portions_per_guest must be greater than 0 and at most 100")
+        parsed.append((menu_item_id, round(factor, 2)))
+
+    ids = [menu_item_id for menu_item_id, _ in parsed]
+    if len(set(ids)) != len(ids):
+        raise ValueError("A menu item may appear only once per event")
+    names = dict(db.session.execute(select(MenuItem.id, MenuItem.name).where(MenuItem.id.in_(ids))).all())
+    unknown = sorted(set(ids) - names.keys())
+    if unknown:
+        raise ValueError(f"Unknown menu_item_id: {', '.join(map(str, unknown))}")
+    return parsed, names
+
+
+# Replaces the event's lines in place (kept items are updated, so the unique
+# (event, item) key is never hit mid-flush) and bumps the event's version
+def set_event_lines(event, parsed):
+    existing = {line.menu_item_id: line for line in event.lines}
+    wanted = dict(parsed)
+    for menu_item_id, line in existing.items():
+        if menu_item_id not in wanted:
+            event.lines.remove(line)
+    for menu_item_id, factor in parsed:
+        if menu_item_id in existing:
+            existing[menu_item_id].portions_per_guest = factor
+        else:
+            event.lines.append(CateringEventLine(menu_item_id=menu_item_id, portions_per_guest=factor))
+    flag_modified(event, "menu")
+
+
+def menu_summary(parsed, names):
+    return ", ".join(names[menu_item_id] for menu_item_id, _ in parsed)[:255]
+
+
+def _day(value):
+    # DATE() comes back as a date from MySQL and as text from SQLite
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)[:10]
+
+
+# Portions to cook per day and menu item in [start, end): event lines scaled
+# by their event's guests, plus the portions already ordered. Both come from
+# one grouped UNION ALL query (one row per day, item and portion factor);
+# the scaling and the per-day totals are done on arrays.
+def build_production_plan(start, end):
+    event_day = func.date(CateringEvent.event_date)
+    events = (
+        select(
+            event_day.label("day"),
+            CateringEventLine.menu_item_id.label("menu_item_id"),
+            func.sum(CateringEvent.number_of_guests).label("volume"),
+            CateringEventLine.portions_per_guest.label("factor"),
+            literal(EVENT_SOURCE).label("source")
+        )
+        .join(CateringEvent, CateringEventLine.event_id == CateringEvent.id)
+        .where(
+            CateringEvent.event_date >= start,
+            CateringEvent.event_date < end,
+            CateringEvent.status.notin_(INACTIVE_EVENT_STATUSES)
+        )
+        .group_by(event_day, CateringEventLine.menu_item_id, CateringEventLine.portions_per_guest)
+    )
+    order_day = func.date(Order.order_date)
+    orders = (
+        select(
+            order_day.label("day"),
+            OrderItem.menu_item_id.label("menu_item_id"),
+            func.sum(OrderItem.quantity).label("volume"),
+            literal(1).label("factor"),
+            literal(ORDER_SOURCE).label("source")
+        )
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(Order.order_date >= start, Order.order_date < end, Order.delivery_status != CANCELLED_ORDER)
+        .group_by(order_day, OrderItem.menu_item_id)
+    )
+    rows = db.session.execute(union_all(events, orders)).all()
+
+    event_day_stats = db.session.execute(
+        select(event_day, func.count(CateringEvent.id), func.sum(CateringEvent.number_of_guests))
+        .where(
+            CateringEvent.event_date >= start,
+            CateringEvent.event_date < end,
+            CateringEvent.status.notin_(INACTIVE_EVENT_STATUSES)
+        )
+        .group_by(event_day)
+    ).all()
+    day_stats = {_day(day): (int(count), int(guests or 0)) for day, count, guests in event_day_stats}
+
+    plan = {"start": start.isoformat(), "end": end.isoformat(), "days": [], "totals": []}
+    if not rows:
+        plan["days"] = [
+            {"date": day, "events": count, "guests": guests, "items": []} for day, (count, guests) in sorted(day_stats.items())
+        ]
+        return plan
+
+    days, item_ids, volumes, factors, sources = zip(*rows)
+    day_keys, day_index = np.unique(np.array([_day(day) for day in days]), return_inverse=True)
+    item_keys, item_index = np.unique(np.array(item_ids, dtype=np.int64), return_inverse=True)
+    portions = np.array(volumes, dtype=np.float64) * np.array(factors, dtype=np.float64)
+
+    # grid[source, day, item]: summed portions; event portions round up
+    grid = np.zeros((2, len(day_keys), len(item_keys)))
+    np.add.at(grid, (np.array(sources, dtype=np.int64), day_index, item_index), portions)
+    grid[EVENT_SOURCE] = np.ceil(grid[EVENT_SOURCE] - 1e-9)
+    total = grid.sum(axis=0)
+
+    menu = {
+        menu_item_id: (name, category)
+        for menu_item_id, name, category in db.session.execute(
+            select(MenuItem.id, MenuItem.name, MenuItem.category).where(MenuItem.id.in_(item_keys.tolist()))
+        )
+    }
+
+    def item_row(column, event_portions, order_portions, total_portions):
+        menu_item_id = int(item_keys[column])
+        name, category = menu.get(menu_item_id, (None, None))
+        return {
+            "menu_item_id": menu_item_id,
+            "name": name,
+            "category": category,
+            "event_portions": int(event_portions),
+            "order_portions": int(order_portions),
+            "total_portions": int(total_portions)
+        }
+
+    for d, day in enumerate(day_keys.tolist()):
+        columns = np.flatnonzero(total[d])
+        columns = columns[np.argsort(-total[d, columns], kind="stable")]
+        count, guests = day_stats.get(day, (0, 0))
+        plan["days"].append({
+            "date": day,
+            "events": count,
+            "guests": guests,
+            "items": [item_row(c, grid[EVENT_SOURCE, d, c], grid[ORDER_SOURCE, d, c], total[d, c]) for c in columns]
+        })
+    for day in sorted(day_stats.keys() - set(day_keys.tolist())):
+        count, guests = day_stats[day]
+        plan["days"].append({"date": day, "events": count, "guests": guests, "items": []})
+    plan["days"].sort(key=lambda entry: entry["date"])
+
+    by_item = grid.sum(axis=1)
+    order = np.argsort(-total.sum(axis=0), kind="stable")
+    plan["totals"] = [item_row(c, by_item[EVENT_SOURCE, c], by_item[ORDER_SOURCE, c], by_item[:, c].sum()) for c in order]
+    return plan
+
+
+def get_production_plan(start, end):
+    def compute():
+        plan = build_production_plan(start, end)
+        plan["generated_at"] = datetime.utcnow().isoformat()
+        return plan
+    plan = plan_cache.get_or_compute((start, end), compute)
+    # Events are always current; order_portions may trail new orders by this much
+    return dict(plan, order_volume_max_age_seconds=cache_bus.ttl)
+
+
+# Best menu item for one dish named in free text: an exact name, else the
+# longest item name it contains or that contains it
+def match_menu_item(text, items):
+    text = text.strip().lower()
+    if not text:
+        return None
+    if text in items:
+        return items[text]
+    candidates = [name for name in items if name in text or text in name]
+    return items[max(candidates, key=len)] if candidates else None
+
+
+@click.command("normalize-event-menus")
+@click.option("--dry-run", is_flag=True, help="Only print what would be matched.")
+@with_appcontext
+def normalize_event_menus_command(dry_run):
+    """Turn the free-text menus of events without menu lines into menu lines (one portion per guest)."""
+    items = {name.strip().lower(): menu_item_id for menu_item_id, name in db.session.execute(select(MenuItem.id, MenuItem.name))}
+    events = CateringEvent.query.filter(~CateringEvent.lines.any()).all()
+    converted = 0
+    for event in events:
+        matched, unmatched = {}, []
+        for dish in MENU_SPLIT_RE.split(event.menu or ""):
+            if not dish.strip():
+                continue
+            menu_item_id = match_menu_item(dish, items)
+            if menu_item_id is None:
+                unmatched.append(dish.strip())
+            else:
+                matched.setdefault(menu_item_id, 1.0)
+        if matched:
+            converted += 1
+            if not dry_run:
+                set_event_lines(event, list(matched.items()))
+        click.echo(f"Event {event.id} '{event.event_name}': {len(matched)} dishes matched"
+                   + (f", not matched: {', '.join(unmatched)}" if unmatched else ""))
+
+    if dry_run:
+        click.echo(f"{converted} of {len(events)} events would get menu lines")
+        return
+    db.session.commit()
+    cache_bus.publish(CATERING_EVENTS)
+    click.echo(f"Added menu lines to {converted} of {len(events)} events")
@@ -0,0 +1,195 @@
+# app/utils/query_budget.py
+import logging
+import re
+import threading
+import time
+
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.extensions import db
+from app.status_codes import HTTP_503_SERVICE_UNAVAILABLE
+
+logger = logging.getLogger(__name__)
+
+SELECT_RE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+# MySQL: "Query execution was interrupted, maximum statement execution time exceeded"
+MYSQL_MAX_EXECUTION_TIME_EXCEEDED = 3024
+# SQLite checks the progress handler every this many VM instructions
+SQLITE_PROGRESS_STEPS = 10000
+
+
+class QueryTimeout(Exception):
+    def __init__(self, timeout_ms):
+        super().__init__(f"Query exceeded its {timeout_ms} ms time limit")
+        self.timeout_ms = timeout_ms
+
+
+# Per-route limits, read by the before_request hook from the view function:
+#
+#     @order_item_bp.route('/', methods=['GET'])
+#     @query_budget(timeout_ms=2000, max_rows=1000)
+#     def get_all_order_items(): ...
+#
+# timeout_ms bounds each statement the request runs (QUERY_TIMEOUT_MS when
+# not given); max_rows caps top-level ORM selects that have no LIMIT of their own
+def query_budget(timeout_ms=None, max_rows=None):
+    def decorator(view):
+        view.query_budget = {"timeout_ms": timeout_ms, "max_rows": max_rows}
+        return view
+    return decorator
+
+
+class QueryBudgetStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {"timeouts": 0, "row_caps": 0, "pool_timeouts": 0}
+        self.by_endpoint = {}
+
+    def count(self, endpoint, outcome):
+        with self._lock:
+            self.totals[outcome] += 1
+            counts = self.by_endpoint.setdefault(endpoint, {"timeouts": 0, "row_caps": 0, "pool_timeouts": 0})
+            counts[outcome] += 1
+
+    def report(self):
+        with self._lock:
+            return {
+                "totals": dict(self.totals),
+                "endpoints": {endpoint: dict(counts) for endpoint, counts in self.by_endpoint.items()}
+            }
+
+
+budget_stats = QueryBudgetStats()
+
+
+def current_budget():
+    if not has_request_context():
+        return None, None
+    return g.get("query_timeout_ms"), g.get("query_max_rows")
+
+
+def record_violation(outcome):
+    g.query_budget_violation = outcome
+    budget_stats.count(request.endpoint, outcome)
+
+
+# Statement time limits enforced by the database, so a runaway query is
+# stopped server side and its pooled connection comes back instead of the
+# worker waiting on it. MySQL gets a MAX_EXECUTION_TIME optimizer hint on
+# each SELECT (writes are bounded by innodb_lock_wait_timeout); SQLite, used
+# in development, is interrupted from its progress handler. Other dialects
+# run without a limit. CLI commands and boot-time work are never limited.
+class StatementTimeouts:
+    def __init__(self, engine):
+        self.dialect = engine.dialect.name
+        if self.dialect == "mysql":
+            event.listen(engine, "before_cursor_execute", self._add_hint, retval=True)
+        elif self.dialect == "sqlite":
+            event.listen(engine, "before_cursor_execute", self._set_deadline)
+            event.listen(engine, "after_cursor_execute", self._clear_deadline)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _add_hint(self, conn, cursor, statement, parameters, context, executemany):
+        timeout_ms, _ = current_budget()
+        if timeout_ms and not executemany and "MAX_EXECUTION_TIME" not in statement:
+            statement = SELECT_RE.sub(f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */", statement, count=1)
+        return statement, parameters
+
+    def _set_deadline(self, conn, cursor, statement, parameters, context, executemany):
+        timeout_ms, _ = current_budget()
+        if not timeout_ms:
+            return
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        # A true return value makes SQLite abort the statement ("interrupted")
+        conn.connection.dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+
+    def _clear_deadline(self, conn, cursor, statement, parameters, context, executemany):
+        if self.dialect == "sqlite" and conn.connection.dbapi_connection is not None:
+            conn.connection.dbapi_connection.set_progress_handler(None, 0)
+
+    def _is_timeout(self, error):
+        if self.dialect == "mysql":
+            return bool(error.args) and error.args[0] == MYSQL_MAX_EXECUTION_TIME_EXCEEDED
+        if self.dialect == "sqlite":
+            return "interrupted" in str(error)
+        return False
+
+    def _handle_error(self, context):
+        if self.dialect == "sqlite" and context.connection is not None:
+            self._clear_deadline(context.connection, None, None, None, None, None)
+        timeout_ms, _ = current_budget()
+        if not timeout_ms or not self._is_timeout(context.original_exception):
+            return None
+        logger.warning(f"Query on {request.endpoint} stopped after {timeout_ms} ms: {context.statement[:200]}")
+        record_violation("timeouts")
+        return QueryTimeout(timeout_ms)
+
+
+# Row caps: the ORM select runs with LIMIT max_rows and the response carries
+# X-Row-Cap when the cap was reached, so clients know the list was cut short.
+# Relationship loads, statements with their own LIMIT and streamed
+# (yield_per) reads are left alone.
+def _cap_rows(orm_execute_state):
+    _, max_rows = current_budget()
+    if (
+        not max_rows
+        or not orm_execute_state.is_select
+        or orm_execute_state.is_relationship_load
+        or orm_execute_state.is_column_load
+        or orm_execute_state.statement._limit_clause is not None
+        or orm_execute_state.execution_options.get("yield_per")
+    ):
+        return None
+    result = orm_execute_state.invoke_statement(statement=orm_execute_state.statement.limit(max_rows))
+    frozen = result.freeze()
+    if len(frozen.data) >= max_rows:
+        g.query_rows_capped = max_rows
+    return frozen()
+
+
+def budget_exceeded_response(outcome):
+    message = "The request hit its database time limit" if outcome == "timeouts" else "The database is busy"
+    response = jsonify({"message": message, "error": outcome})
+    response.headers["Retry-After"] = "1"
+    return response, HTTP_503_SERVICE_UNAVAILABLE
+
+
+def init_query_budgets(app):
+    if not app.config["QUERY_BUDGETS"]:
+        return
+    with app.app_context():
+        app.extensions["statement_timeouts"] = StatementTimeouts(db.engine)
+    event.listen(db.session, "do_orm_execute", _cap_rows)
+
+    @app.before_request
+    def set_query_budget():
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, "query_budget", {})
+        g.query_timeout_ms = budget.get("timeout_ms") or app.config["QUERY_TIMEOUT_MS"]
+        g.query_max_rows = budget.get("max_rows")
+
+    @app.after_request
+    def report_query_budget(response):
+        # Controllers turn a stopped query into their generic 500; replace it
+        # with the same clean 503 the error handler gives
+        if g.pop("query_budget_violation", None) == "timeouts" and response.status_code >= 500:
+            response, status = budget_exceeded_response("timeouts")
+            response.status_code = status
+        capped = g.pop("query_rows_capped", None)
+        if capped:
+            budget_stats.count(request.endpoint, "row_caps")
+            response.headers["X-Row-Cap"] = str(capped)
+        return response
+
+    @app.errorhandler(QueryTimeout)
+    def query_timeout(error):
+        return budget_exceeded_response("timeouts")
+
+    # Every pooled connection is busy for longer than DB_POOL_TIMEOUT_SECONDS
+    @app.errorhandler(PoolTimeoutError)
+    def pool_timeout(error):
+        logger.warning(f"No database connection for {request.endpoint}: {str(error)}")
+        record_violation("pool_timeouts")
+        return budget_exceeded_response("pool_timeouts")
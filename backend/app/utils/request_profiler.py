@@ -0,0 +1,327 @@
+# app/utils/request_profiler.py
+import cProfile
+import glob
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask import current_app, g, has_request_context, request
+from flask.cli import with_appcontext
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event
+
+from app.extensions import db
+from app.utils.slow_query_log import statement_shape
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+MODES = ("sample", "cprofile")
+
+
+def profile_dir(app):
+    return app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+
+
+# Statistical profiler for one request thread: a helper thread reads the
+# thread's stack every interval and counts it in collapsed form
+# ("outer;inner;leaf"), which flamegraph.pl and speedscope read as is
+class StackSampler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            # A sample taken while stopping only shows the profiler itself
+            if stack and not self._stop.is_set():
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        path += ".collapsed"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, samples in self.counts.most_common():
+                f.write(f"{stack} {samples}\n")
+        return path
+
+
+class CallProfiler:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        path += ".pstats"
+        self.profile.dump_stats(path)
+        return path
+
+
+# Opt-in per-request profiling. A request is profiled when an admin sends
+# "X-Profile: 1" (or "sample" / "cprofile" to pick the mode) with their
+# token, or at random at PROFILE_SAMPLE_RATE. Its SQL time is timed apart,
+# per statement shape. Each profile is a .collapsed or .pstats file plus a
+# .json summary in PROFILE_DIR, which is pruned oldest first to stay under
+# PROFILE_DIR_MAX_MB. One request per worker is profiled at a time, as
+# cProfile cannot run on two threads at once. `flask profile-summary` reads them.
+class RequestProfiler:
+    def __init__(self, app, engine):
+        self.directory = profile_dir(app)
+        self.sample_rate = app.config["PROFILE_SAMPLE_RATE"]
+        self.default_mode = app.config["PROFILE_MODE"]
+        self.interval = app.config["PROFILE_INTERVAL_MS"] / 1000.0
+        self.max_bytes = app.config["PROFILE_DIR_MAX_MB"] * 1024 * 1024
+        self._active = threading.Lock()
+        self._write_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def requested_mode(self):
+        value = request.headers.get(PROFILE_HEADER, "").strip().lower()
+        if value:
+            try:
+                verify_jwt_in_request(optional=True)
+                identity = get_jwt_identity()
+            except Exception:
+                return None
+            if not isinstance(identity, dict) or identity.get("role") != "admin":
+                return None
+            return value if value in MODES else self.default_mode
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.default_mode
+        return None
+
+    def start(self):
+        mode = self.requested_mode()
+        if mode is None or not self._active.acquire(blocking=False):
+            return
+        profiler = StackSampler(threading.get_ident(), self.interval) if mode == "sample" else CallProfiler()
+        g.profile = {
+            "id": uuid.uuid4().hex[:12],
+            "mode": mode,
+            "profiler": profiler,
+            "started": time.perf_counter(),
+            "started_at": datetime.utcnow(),
+            "sql_ms": 0.0,
+            "sql_count": 0,
+            "sql": {}
+        }
+        try:
+            profiler.start()
+        except Exception as e:
+            # Another profiler already holds the interpreter's profiling hook
+            logger.warning(f"Could not start request profile: {str(e)}")
+            g.pop("profile")
+            self._active.release()
+
+    def finish(self, status_code):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+        try:
+            profile["profiler"].stop()
+            duration_ms = (time.perf_counter() - profile["started"]) * 1000
+            self._write(profile, duration_ms, status_code)
+        except Exception as e:
+            logger.warning(f"Could not write request profile: {str(e)}")
+        finally:
+            self._active.release()
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "profile" in g:
+            g.profile["sql_started"] = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or "profile" not in g:
+            return
+        profile = g.profile
+        elapsed = (time.perf_counter() - profile.pop("sql_started", time.perf_counter())) * 1000
+        profile["sql_ms"] += elapsed
+        profile["sql_count"] += 1
+        shape = profile["sql"].setdefault(statement_shape(statement), {"calls": 0, "ms": 0.0})
+        shape["calls"] += 1
+        shape["ms"] += elapsed
+
+    def _write(self, profile, duration_ms, status_code):
+        started_at = profile["started_at"]
+        endpoint = request.endpoint or "unknown"
+        base = os.path.join(self.directory, f"{started_at:%Y%m%dT%H%M%S}-{endpoint}-{profile['id']}")
+        profile_path = profile["profiler"].write(base)
+        summary = {
+            "id": profile["id"],
+            "mode": profile["mode"],
+            "endpoint": endpoint,
+            "method": request.method,
+            "path": request.path,
+            "status": status_code,
+            "started_at": started_at.isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "sql_ms": round(profile["sql_ms"], 2),
+            "sql_count": profile["sql_count"],
+            "sql": sorted(
+                ({"shape": shape, "calls": s["calls"], "ms": round(s["ms"], 2)} for shape, s in profile["sql"].items()),
+                key=lambda s: -s["ms"]
+            ),
+            "profile": os.path.basename(profile_path)
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        self._prune()
+
+    # Oldest profiles go first once the directory is over its size cap
+    def _prune(self):
+        with self._write_lock:
+            files = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.is_file()),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            total = sum(entry.stat().st_size for entry in files)
+            for entry in files:
+                if total <= self.max_bytes:
+                    break
+                total -= entry.stat().st_size
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def init_request_profiler(app):
+    if not app.config["PROFILING"]:
+        return
+    with app.app_context():
+        profiler = RequestProfiler(app, db.engine)
+    app.extensions["request_profiler"] = profiler
+
+    @app.before_request
+    def start_profile():
+        profiler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        if "profile" in g:
+            response.headers["X-Profile-Id"] = g.profile["id"]
+            profiler.finish(response.status_code)
+        return response
+
+    # Requests that raised never reach after_request
+    @app.teardown_request
+    def discard_profile(exc):
+        if "profile" in g:
+            profiler.finish(500)
+
+
+def load_profiles(directory, endpoint=None):
+    summaries = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if endpoint and summary.get("endpoint") != endpoint:
+            continue
+        summary["profile_path"] = os.path.join(directory, summary["profile"])
+        summaries.append(summary)
+    return summaries
+
+
+@click.command("profile-summary")
+@click.option("-e", "--endpoint", default=None, help="Only profiles of this endpoint, e.g. order.get_all_orders.")
+@click.option("--top", default=15, show_default=True, help="Functions and SQL statements to list.")
+@click.option("--sort", type=click.Choice(["cumulative", "tottime"]), default="cumulative", show_default=True,
+              help="Order of the merged cProfile listing.")
+@click.option("--collapsed", "collapsed_out", default=None, type=click.Path(dir_okay=False),
+              help="Also write the merged sampled stacks here, for flamegraph.pl or speedscope.")
+@with_appcontext
+def profile_summary_command(endpoint, top, sort, collapsed_out):
+    """Summarize the request profiles in PROFILE_DIR: time and SQL share per endpoint, top SQL and hot functions."""
+    summaries = load_profiles(profile_dir(current_app), endpoint)
+    if not summaries:
+        click.echo("No request profiles found")
+        return
+
+    by_endpoint = {}
+    for s in summaries:
+        by_endpoint.setdefault(s["endpoint"], []).append(s)
+    click.echo(f"{'endpoint':40} {'profiles':>8} {'avg ms':>9} {'max ms':>9} {'sql ms':>9} {'sql %':>6} {'queries':>8}")
+    for name, group in sorted(by_endpoint.items(), key=lambda item: -sum(s["duration_ms"] for s in item[1])):
+        avg_ms = sum(s["duration_ms"] for s in group) / len(group)
+        sql_ms = sum(s["sql_ms"] for s in group) / len(group)
+        queries = sum(s["sql_count"] for s in group) / len(group)
+        share = 100 * sql_ms / avg_ms if avg_ms else 0
+        click.echo(f"{name[:40]:40} {len(group):>8} {avg_ms:>9.1f} {max(s['duration_ms'] for s in group):>9.1f} "
+                   f"{sql_ms:>9.1f} {share:>5.0f}% {queries:>8.1f}")
+
+    shapes = {}
+    for s in summaries:
+        for stat in s["sql"]:
+            total = shapes.setdefault(stat["shape"], {"calls": 0, "ms": 0.0})
+            total["calls"] += stat["calls"]
+            total["ms"] += stat["ms"]
+    if shapes:
+        click.echo("\nTop SQL by total time:")
+        for shape, total in sorted(shapes.items(), key=lambda item: -item[1]["ms"])[:top]:
+            click.echo(f"{total['ms']:>9.1f} ms {total['calls']:>6} calls  {shape[:140]}")
+
+    pstats_paths = [s["profile_path"] for s in summaries if s["mode"] == "cprofile" and os.path.exists(s["profile_path"])]
+    if pstats_paths:
+        stream = io.StringIO()
+        stats = pstats.Stats(*pstats_paths, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        click.echo(f"\ncProfile, {len(pstats_paths)} profiles merged:")
+        click.echo(stream.getvalue())
+
+    stacks = Counter()
+    for s in summaries:
+        if s["mode"] != "sample" or not os.path.exists(s["profile_path"]):
+            continue
+        with open(s["profile_path"], encoding="utf-8") as f:
+            for line in f:
+                stack, _, samples = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    stacks[stack] += int(samples)
+    if stacks:
+        total = sum(stacks.values())
+        leaves = Counter()
+        for stack, samples in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += samples
+        click.echo(f"\nSampled stacks, {total} samples; hottest functions by self time:")
+        for frame, samples in leaves.most_common(top):
+            click.echo(f"{100 * samples / total:>6.1f}%  {frame}")
+        if collapsed_out:
+            with open(collapsed_out, "w", encoding="utf-8") as f:
+                for stack, samples in stacks.most_common():
+                    f.write(f"{stack} {samples}\n")
+            click.echo(f"Wrote merged stacks to {collapsed_out}")
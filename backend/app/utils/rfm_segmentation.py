@@ -0,0 +1,126 @@
+# app/utils/rfm_segmentation.py
+import logging
+from datetime import datetime
+
+import click
+import numpy as np
+from flask.cli import with_appcontext
+from sqlalchemy import select, func, delete
+
+from app.extensions import db
+from app.models.customer_model import Customer
+from app.models.order_model import Order
+from app.models.customer_segment_model import CustomerSegment
+from app.utils.bulk_upsert import bulk_upsert
+
+logger = logging.getLogger(__name__)
+
+QUINTILES = [0.2, 0.4, 0.6, 0.8]
+NO_ORDERS = "no_orders"
+
+
+# Scores 1..5 by quintile; ties share a score because the edges come from the data
+def _quintile_scores(values):
+    if values.size == 0:
+        return np.empty(0, dtype=np.int64)
+    edges = np.quantile(values, QUINTILES)
+    return np.searchsorted(edges, values, side="right") + 1
+
+
+# Classic RFM segment names from the recency and frequency scores
+def _segment_names(r, f):
+    conditions = [
+        (r >= 4) & (f >= 4),
+        (r <= 2) & (f >= 4),
+        f >= 4,
+        (r >= 4) & (f <= 1),
+        (r >= 4),
+        (r <= 2) & (f >= 3),
+        (r <= 2),
+    ]
+    names = ["champions", "cant_lose", "loyal", "new", "potential_loyalists", "at_risk", "hibernating"]
+    return np.select(conditions, names, default="need_attention")
+
+
+# One grouped pass over orders for every customer, then vectorized scoring
+def compute_segments(now=None):
+    # Whole seconds, as MySQL DATETIME stores computed_at
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    rows = db.session.execute(
+        select(
+            Customer.id,
+            func.max(Order.order_date),
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.total_amount), 0)
+        )
+        .select_from(Customer)
+        .outerjoin(Order, Order.customer_id == Customer.id)
+        .group_by(Customer.id)
+    ).all()
+    if not rows:
+        return {}
+
+    customer_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    last_order = np.array([row[1] for row in rows], dtype="datetime64[s]")
+    frequency = np.array([row[2] for row in rows], dtype=np.int64)
+    monetary = np.array([row[3] for row in rows], dtype=np.float64)
+
+    has_orders = frequency > 0
+    recency_days = np.full(len(rows), -1, dtype=np.int64)
+    recency_days[has_orders] = (
+        (np.datetime64(now, "s") - last_order[has_orders]) // np.timedelta64(1, "D")
+    ).astype(np.int64)
+
+    r_score = np.zeros(len(rows), dtype=np.int64)
+    f_score = np.zeros(len(rows), dtype=np.int64)
+    m_score = np.zeros(len(rows), dtype=np.int64)
+    # Fewer days since the last order is better, so recency is scored reversed
+    r_score[has_orders] = 6 - _quintile_scores(recency_days[has_orders])
+    f_score[has_orders] = _quintile_scores(frequency[has_orders])
+    m_score[has_orders] = _quintile_scores(monetary[has_orders])
+
+    segments = np.where(has_orders, _segment_names(r_score, f_score), NO_ORDERS)
+
+    records = [
+        {
+            "customer_id": int(customer_ids[i]),
+            "recency_days": int(recency_days[i]) if has_orders[i] else None,
+            "frequency": int(frequency[i]),
+            "monetary": round(float(monetary[i]), 2),
+            "r_score": int(r_score[i]),
+            "f_score": int(f_score[i]),
+            "m_score": int(m_score[i]),
+            "segment": str(segments[i]),
+            "computed_at": now
+        }
+        for i in range(len(rows))
+    ]
+
+    try:
+        bulk_upsert(CustomerSegment, records, ["customer_id"])
+        # Drop rows for customers that no longer exist. Keyed on the customer,
+        # not on computed_at, so a rounded timestamp can never match the rows
+        # just written
+        db.session.execute(
+            delete(CustomerSegment)
+            .where(CustomerSegment.customer_id.notin_(select(Customer.id)))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    names, counts = np.unique(segments, return_counts=True)
+    summary = {str(name): int(count) for name, count in zip(names, counts)}
+    logger.info(f"Computed RFM segments for {len(records)} customers: {summary}")
+    return summary
+
+
+@click.command("compute-segments")
+@with_appcontext
+def compute_segments_command():
+    """Recompute RFM scores and segments for every customer."""
+    summary = compute_segments()
+    for segment, count in sorted(summary.items()):
+        click.echo(f"{segment}: {count}")
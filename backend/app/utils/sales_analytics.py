@@ -0,0 +1,213 @@
+# app/utils/sales_analytics.py
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.order_model import Order
+from app.models.order_item_model import OrderItem
+from app.models.menu_item_model import MenuItem
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+UNKNOWN_CATEGORY = "OTHER"
+
+
+# Column-oriented extract of order items in a time window: one NumPy array per
+# column instead of one Python object per row
+class SalesExtract:
+    def __init__(self, start, end, timestamps, menu_item_ids, quantities, subtotals, category_codes, categories):
+        self.start = start
+        self.end = end
+        self.timestamps = timestamps        # int64 seconds since the epoch (UTC)
+        self.menu_item_ids = menu_item_ids  # int64
+        self.quantities = quantities        # float64
+        self.subtotals = subtotals          # float64
+        self.category_codes = category_codes  # int64 index into categories
+        self.categories = categories
+
+    @property
+    def days(self):
+        return max(int(np.ceil((self.end - self.start).total_seconds() / SECONDS_PER_DAY)), 1)
+
+
+def _epoch_seconds(value):
+    return int(np.datetime64(value, "s").astype(np.int64))
+
+
+# Streams the (order_date, menu_item_id, quantity, subtotal) columns in chunks
+# so the result set is never materialized as ORM objects
+def load_sales_extract(start, end, chunk_size=10000):
+    stmt = (
+        select(Order.order_date, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.subtotal)
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(Order.order_date >= start, Order.order_date < end)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    dates, item_ids, quantities, subtotals = [], [], [], []
+    for partition in db.session.execute(stmt).partitions():
+        columns = list(zip(*partition))
+        dates.append(np.array(columns[0], dtype="datetime64[s]"))
+        item_ids.append(np.array(columns[1], dtype=np.int64))
+        quantities.append(np.array(columns[2], dtype=np.float64))
+        subtotals.append(np.array(columns[3], dtype=np.float64))
+
+    if dates:
+        timestamps = np.concatenate(dates).astype(np.int64)
+        item_ids = np.concatenate(item_ids)
+        quantities = np.concatenate(quantities)
+        subtotals = np.concatenate(subtotals)
+    else:
+        timestamps = np.empty(0, dtype=np.int64)
+        item_ids = np.empty(0, dtype=np.int64)
+        quantities = np.empty(0, dtype=np.float64)
+        subtotals = np.empty(0, dtype=np.float64)
+
+    # Map menu_item_id -> category code with one lookup array
+    menu = db.session.execute(select(MenuItem.id, MenuItem.category)).all()
+    categories = sorted({category for _, category in menu}) + [UNKNOWN_CATEGORY]
+    code_of = {category: code for code, category in enumerate(categories)}
+    size = max([item_id for item_id, _ in menu] + [int(item_ids.max()) if item_ids.size else 0]) + 1
+    lookup = np.full(size, code_of[UNKNOWN_CATEGORY], dtype=np.int64)
+    for item_id, category in menu:
+        lookup[item_id] = code_of[category]
+    category_codes = lookup[item_ids]
+
+    return SalesExtract(start, end, timestamps, item_ids, quantities, subtotals, category_codes, categories)
+
+
+def _weekday(timestamps):
+    # 1970-01-01 was a Thursday; shift so Monday == 0 like datetime.weekday()
+    return (timestamps // SECONDS_PER_DAY + 3) % 7
+
+
+# Average portions and revenue per week for each of the 168 hours of the week
+def demand_profile(extract):
+    slots = _weekday(extract.timestamps) * 24 + (extract.timestamps // SECONDS_PER_HOUR) % 24
+    weeks = extract.days / 7
+    portions = np.bincount(slots, weights=extract.quantities, minlength=168) / weeks
+    revenue = np.bincount(slots, weights=extract.subtotals, minlength=168) / weeks
+
+    busiest = np.argsort(portions)[::-1][:5]
+    return {
+        "from": extract.start.isoformat(),
+        "to": extract.end.isoformat(),
+        "weekdays": WEEKDAYS,
+        "portions": np.round(portions.reshape(7, 24), 2).tolist(),
+        "revenue": np.round(revenue.reshape(7, 24), 2).tolist(),
+        "peak_hours": [
+            {"weekday": WEEKDAYS[slot // 24], "hour": int(slot % 24), "portions": round(float(portions[slot]), 2)}
+            for slot in busiest if portions[slot] > 0
+        ]
+    }
+
+
+# Daily portions per category, their moving average, and a forecast for the
+# next `horizon` days from a linear trend scaled by each weekday's share
+def category_trends(extract, window=7, horizon=7, fit_days=28):
+    n_categories, n_days = len(extract.categories), extract.days
+    start_seconds = _epoch_seconds(extract.start)
+    day_index = (extract.timestamps - start_seconds) // SECONDS_PER_DAY
+
+    daily = np.bincount(
+        extract.category_codes * n_days + day_index,
+        weights=extract.quantities,
+        minlength=n_categories * n_days
+    ).reshape(n_categories, n_days)
+
+    window = min(window, n_days)
+    cumulative = np.cumsum(np.pad(daily, ((0, 0), (1, 0))), axis=1)
+    moving_average = (cumulative[:, window:] - cumulative[:, :-window]) / window
+
+    # Least-squares line through the last fit_days for every category at once
+    fit_days = min(fit_days, n_days)
+    x = np.arange(fit_days, dtype=np.float64)
+    design = np.column_stack([x, np.ones(fit_days)])
+    (slope, intercept), *_ = np.linalg.lstsq(design, daily[:, -fit_days:].T, rcond=None)
+
+    # Weekday seasonality: mean portions on each weekday relative to the overall mean
+    day_weekdays = _weekday(start_seconds + np.arange(n_days) * SECONDS_PER_DAY)
+    weekday_counts = np.maximum(np.bincount(day_weekdays, minlength=7), 1)
+    weekday_totals = np.zeros((n_categories, 7))
+    np.add.at(weekday_totals, (slice(None), day_weekdays), daily)
+    weekday_means = weekday_totals / weekday_counts
+    overall = weekday_means.mean(axis=1, keepdims=True)
+    seasonality = np.divide(weekday_means, overall, out=np.ones_like(weekday_means), where=overall > 0)
+
+    future = np.arange(fit_days, fit_days + horizon, dtype=np.float64)
+    future_weekdays = _weekday(start_seconds + (n_days + np.arange(horizon)) * SECONDS_PER_DAY)
+    trend = np.maximum(np.outer(slope, future) + intercept[:, None], 0)
+    forecast = trend * seasonality[:, future_weekdays]
+
+    first_forecast_day = extract.start.date() + timedelta(days=n_days)
+    return {
+        "from": extract.start.isoformat(),
+        "to": extract.end.isoformat(),
+        "window": window,
+        "forecast_dates": [(first_forecast_day + timedelta(days=i)).isoformat() for i in range(horizon)],
+        "categories": [
+            {
+                "category": category,
+                "total_portions": round(float(daily[code].sum()), 2),
+                "daily": daily[code].round(2).tolist(),
+                "moving_average": moving_average[code].round(2).tolist(),
+                "forecast": forecast[code].round(2).tolist()
+            }
+            for code, category in enumerate(extract.categories)
+            if daily[code].any() or category != UNKNOWN_CATEGORY
+        ]
+    }
+
+
+# Portions and revenue per menu item for each price it had during the window,
+# attributing every sale to the price in effect at the order's time. Sales
+# are grouped by item once, then one searchsorted per item finds the periods.
+def price_points(extract, price_book):
+    order = np.argsort(extract.menu_item_ids, kind="stable")
+    item_ids, starts = np.unique(extract.menu_item_ids[order], return_index=True)
+    bounds = np.append(starts, order.size)
+    start_seconds, end_seconds = _epoch_seconds(extract.start), _epoch_seconds(extract.end)
+
+    items = []
+    for n, item_id in enumerate(item_ids.tolist()):
+        rows = order[bounds[n]:bounds[n + 1]]
+        timeline = price_book.timeline(item_id) or [(extract.start, price_book.list_prices.get(item_id, 0))]
+        since = np.array([_epoch_seconds(when) for when, _ in timeline], dtype=np.int64)
+        period = np.maximum(np.searchsorted(since, extract.timestamps[rows], side="right") - 1, 0)
+        portions = np.bincount(period, weights=extract.quantities[rows], minlength=len(timeline))
+        revenue = np.bincount(period, weights=extract.subtotals[rows], minlength=len(timeline))
+
+        points = []
+        for p, (effective_from, price) in enumerate(timeline):
+            period_start = start_seconds if p == 0 else max(since[p], start_seconds)
+            period_end = min(since[p + 1], end_seconds) if p + 1 < len(timeline) else end_seconds
+            if period_end <= period_start:
+                continue
+            days = max((period_end - period_start) / SECONDS_PER_DAY, 1)
+            points.append({
+                "price": float(price),
+                "effective_from": effective_from.isoformat(),
+                "portions": round(float(portions[p]), 2),
+                "revenue": round(float(revenue[p]), 2),
+                "portions_per_day": round(float(portions[p]) / days, 2)
+            })
+        items.append({
+            "menu_item_id": item_id,
+            "category": extract.categories[extract.category_codes[rows[0]]],
+            "prices": points
+        })
+
+    return {
+        "from": extract.start.isoformat(),
+        "to": extract.end.isoformat(),
+        "items": items
+    }
+
+
+def sales_window(days):
+    # Whole days, so each daily bucket covers a full calendar day (UTC)
+    end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return end - timedelta(days=days), end
@@ -0,0 +1,161 @@
+# app/utils/slow_query_log.py
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = r"(?:%s|\?|%\([^)]*\)s|:\w+)"
+IN_LIST_RE = re.compile(rf"\bIN\s*\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})*\s*\)", re.IGNORECASE)
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+WHITESPACE_RE = re.compile(r"\s+")
+
+EXPLAIN_PREFIX = {
+    "mysql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+
+
+# Statement shape: literals become ?, IN lists of any length collapse to IN (?...)
+# so the same query with different arguments is grouped together
+def statement_shape(statement):
+    shape = IN_LIST_RE.sub("IN (?...)", statement)
+    shape = LITERAL_RE.sub("?", shape)
+    return WHITESPACE_RE.sub(" ", shape).strip()
+
+
+# Appends every statement slower than SLOW_QUERY_THRESHOLD_MS to a JSON-lines
+# log with its shape and duration. The first time a worker sees a SELECT shape
+# it also stores the EXPLAIN plan, run on a raw DB-API cursor so it is not
+# timed or captured itself. Streamed reads (stream_results / yield_per) are
+# not explained, as their connection is still busy with the unbuffered result.
+# The log is moved to <log>.1 once it passes SLOW_QUERY_LOG_MAX_MB, replacing
+# the previous one. `flask suggest-indexes` reads both.
+class SlowQueryLog:
+    def __init__(self, app, engine):
+        self.path = app.config.get("SLOW_QUERY_LOG") or os.path.join(app.instance_path, "slow_queries.jsonl")
+        self.threshold = app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000.0
+        self.explain = app.config["SLOW_QUERY_EXPLAIN"]
+        self.max_bytes = app.config["SLOW_QUERY_LOG_MAX_MB"] * 1024 * 1024
+        self.dialect = engine.dialect.name
+        self._lock = threading.Lock()
+        self._explained = set()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        if duration < self.threshold:
+            return
+        try:
+            self._record(cursor, statement, parameters, duration, executemany, context)
+        except Exception as e:
+            # Capture must never break the query that triggered it
+            logger.warning(f"Could not record slow query: {str(e)}")
+
+    def _record(self, cursor, statement, parameters, duration, executemany, context):
+        shape = statement_shape(statement)
+        entry = {
+            "shape": shape,
+            "duration_ms": round(duration * 1000, 2),
+            "captured_at": datetime.utcnow().isoformat(),
+            "dialect": self.dialect,
+        }
+        options = context.execution_options
+        streamed = options.get("stream_results") or options.get("yield_per")
+        if (
+            self.explain
+            and not executemany
+            and not streamed
+            and shape not in self._explained
+            and shape.upper().startswith("SELECT")
+        ):
+            self._explained.add(shape)
+            entry["explain"] = self._explain(cursor, statement, parameters)
+
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            self._rotate()
+            with open(self.path, "a", encoding="utf-8") as log:
+                log.write(line)
+
+    def _rotate(self):
+        if self.max_bytes <= 0:
+            return
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+            os.replace(self.path, self.path + ".1")
+        except FileNotFoundError:
+            pass
+
+    def _explain(self, cursor, statement, parameters):
+        prefix = EXPLAIN_PREFIX.get(self.dialect)
+        if prefix is None:
+            return None
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            columns = [column[0] for column in explain_cursor.description]
+            return [dict(zip(columns, row)) for row in explain_cursor.fetchall()]
+        except Exception as e:
+            return [{"error": str(e)}]
+        finally:
+            explain_cursor.close()
+
+
+def init_slow_query_log(app):
+    if app.config["SLOW_QUERY_THRESHOLD_MS"] <= 0:
+        return
+    with app.app_context():
+        app.extensions["slow_query_log"] = SlowQueryLog(app, db.engine)
+
+
+# Captured entries grouped by shape, from the rotated log and the current
+# one: call count, total and max duration, and the first plan recorded for it
+def load_slow_queries(path):
+    shapes = {}
+    for log_path in (path + ".1", path):
+        if os.path.exists(log_path):
+            _load_log(log_path, shapes)
+    return shapes
+
+
+def _load_log(path, shapes):
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            stats = shapes.setdefault(entry["shape"], {
+                "shape": entry["shape"],
+                "calls": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "dialect": entry.get("dialect"),
+                "explain": None
+            })
+            stats["calls"] += 1
+            stats["total_ms"] += entry["duration_ms"]
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+            if stats["explain"] is None and entry.get("explain"):
+                stats["explain"] = entry["explain"]
@@ -0,0 +1,240 @@
+# app/utils/status_history.py
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import event, func, insert, inspect, select
+from sqlalchemy.orm import attributes
+
+from app.extensions import db
+from app.models.order_model import Order
+from app.models.delivery_model import Delivery
+from app.models.status_history_model import StatusHistory
+
+logger = logging.getLogger(__name__)
+
+# Model -> (entity name, status columns whose changes are logged)
+TRACKED = {
+    Order: ("order", ("delivery_status", "payment_status")),
+    Delivery: ("delivery", ("delivery_status",)),
+}
+
+PENDING_ATTR = "_pending_status_changes"
+SESSION_KEY = "status_history"
+
+
+def _normalize(status):
+    return status.strip().lower() if isinstance(status, str) else status
+
+
+# Buffers committed status changes in memory and inserts them from a
+# background thread with one executemany per batch, on its own connection so
+# request transactions never wait on the history table. Rows still buffered
+# when a worker is killed are lost; a clean shutdown flushes them.
+class StatusHistoryWriter:
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._buffer = []
+        self._pid = None
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config["STATUS_HISTORY_BATCH_SIZE"]
+        self.flush_interval = app.config["STATUS_HISTORY_FLUSH_SECONDS"]
+        self.max_buffer = app.config["STATUS_HISTORY_MAX_BUFFER"]
+        atexit.register(self._flush_quietly)
+
+    def enqueue(self, rows):
+        if self.app is None or not rows:
+            return
+        self._ensure_flusher()
+        with self._lock:
+            self._buffer.extend(rows)
+            # Bounded so an unreachable database cannot grow the worker forever
+            overflow = len(self._buffer) - self.max_buffer
+            if overflow > 0:
+                del self._buffer[:overflow]
+                logger.warning(f"Status history buffer full, dropped {overflow} oldest rows")
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    # Started lazily so the thread lives in the forked worker; rows copied from
+    # a preloading parent are discarded so they are not written twice
+    def _ensure_flusher(self):
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._buffer = []
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="status-history-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error writing status history: {str(e)}", exc_info=True)
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                for start in range(0, len(rows), self.batch_size):
+                    connection.execute(insert(StatusHistory), rows[start:start + self.batch_size])
+        except Exception:
+            # Put the batch back in front for the next attempt
+            with self._lock:
+                self._buffer[:0] = rows
+            raise
+        return len(rows)
+
+
+history_writer = StatusHistoryWriter()
+
+
+# Attribute "set" listener: remembers the first old value and the latest new
+# value per column on the instance until the next flush
+def _on_status_set(target, value, oldvalue, initiator):
+    if oldvalue is attributes.NO_VALUE or oldvalue is attributes.NEVER_SET:
+        oldvalue = None
+    pending = target.__dict__.setdefault(PENDING_ATTR, {})
+    field = initiator.key
+    first = pending[field][0] if field in pending else _normalize(oldvalue)
+    if _normalize(value) == first:
+        pending.pop(field, None)
+    else:
+        pending[field] = (first, _normalize(value))
+
+
+# After a flush the primary keys of new rows are known, so pending changes
+# move from the instances to the session until the transaction commits
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        pending = obj.__dict__.pop(PENDING_ATTR, None)
+        if not pending or type(obj) not in TRACKED:
+            continue
+        entity = TRACKED[type(obj)][0]
+        entity_id = inspect(obj).mapper.primary_key_from_instance(obj)[0]
+        record_status_changes(entity, entity_id, pending, session=session)
+
+
+def _after_commit(session):
+    rows = session.info.pop(SESSION_KEY, None)
+    if rows:
+        changed_at = datetime.utcnow()
+        for row in rows:
+            row["changed_at"] = changed_at
+        history_writer.enqueue(rows)
+
+
+def _after_rollback(session):
+    session.info.pop(SESSION_KEY, None)
+    for obj in list(session.identity_map.values()) + list(session.new):
+        obj.__dict__.pop(PENDING_ATTR, None)
+
+
+# Adds changes to the current transaction's history; they are handed to the
+# writer only if it commits. Used directly by set-based updates that bypass
+# ORM attribute events (bulk status transitions).
+def record_status_changes(entity, entity_id, changes, session=None):
+    session = session or db.session
+    rows = session.info.setdefault(SESSION_KEY, [])
+    for field, (from_status, to_status) in changes.items():
+        rows.append({
+            "entity": entity,
+            "entity_id": entity_id,
+            "field": field,
+            "from_status": from_status,
+            "to_status": to_status
+        })
+
+
+def init_status_history(app):
+    history_writer.init_app(app)
+    for model, (entity, fields) in TRACKED.items():
+        for field in fields:
+            column = getattr(model, field)
+            if not event.contains(column, "set", _on_status_set):
+                event.listen(column, "set", _on_status_set, active_history=True)
+    for name, listener in (("after_flush", _after_flush), ("after_commit", _after_commit),
+                           ("after_rollback", _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+
+def _percentiles(seconds):
+    p50, p90, p95 = np.percentile(seconds, [50, 90, 95])
+    return {
+        "count": int(seconds.size),
+        "mean_seconds": round(float(seconds.mean()), 1),
+        "p50_seconds": round(float(p50), 1),
+        "p90_seconds": round(float(p90), 1),
+        "p95_seconds": round(float(p95), 1),
+        "max_seconds": round(float(seconds.max()), 1)
+    }
+
+
+# Time spent in each status for changes since `since`: consecutive history
+# rows of the same entity give one completed stay. Reads only the covering
+# index; the current (still open) stay of each entity is not counted.
+def time_in_state(entity, field, since):
+    rows = db.session.execute(
+        select(StatusHistory.entity_id, StatusHistory.changed_at, StatusHistory.to_status)
+        .where(StatusHistory.entity == entity, StatusHistory.field == field, StatusHistory.changed_at >= since)
+    ).all()
+    if len(rows) < 2:
+        return {}
+
+    entity_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    changed_at = np.array([row[1] for row in rows], dtype="datetime64[ms]").astype(np.int64)
+    statuses = np.array([row[2] for row in rows])
+
+    order = np.lexsort((changed_at, entity_ids))
+    entity_ids, changed_at, statuses = entity_ids[order], changed_at[order], statuses[order]
+    same_entity = entity_ids[1:] == entity_ids[:-1]
+    stays = (changed_at[1:] - changed_at[:-1])[same_entity] / 1000.0
+    states = statuses[:-1][same_entity]
+
+    return {str(state): _percentiles(stays[states == state]) for state in np.unique(states)}
+
+
+# Lead time from first reaching `start` to first reaching `end` afterwards,
+# e.g. preparing -> delivered
+def transition_durations(entity, field, start, end, since):
+    rows = db.session.execute(
+        select(StatusHistory.entity_id, StatusHistory.to_status, func.min(StatusHistory.changed_at))
+        .where(
+            StatusHistory.entity == entity,
+            StatusHistory.field == field,
+            StatusHistory.changed_at >= since,
+            StatusHistory.to_status.in_([start, end])
+        )
+        .group_by(StatusHistory.entity_id, StatusHistory.to_status)
+    ).all()
+
+    started, ended = {}, {}
+    for entity_id, status, changed_at in rows:
+        (started if status == start else ended)[entity_id] = changed_at
+    seconds = np.array([
+        (ended[i] - started[i]).total_seconds()
+        for i in started.keys() & ended.keys() if ended[i] >= started[i]
+    ])
+    return _percentiles(seconds) if seconds.size else {"count": 0}
@@ -0,0 +1,96 @@
+# app/utils/status_transitions.py
+from sqlalchemy import select, update, func
+
+from app.extensions import db
+from app.utils.status_history import TRACKED, record_status_changes
+
+# Allowed moves per status column: target -> statuses it may be reached from.
+# Statuses are compared lower-cased since older rows were entered free-form.
+DELIVERY_TRANSITIONS = {
+    "preparing": {"pending"},
+    "dispatched": {"pending", "preparing"},
+    "out_for_delivery": {"preparing", "dispatched"},
+    "delivered": {"preparing", "dispatched", "out_for_delivery"},
+    "failed": {"dispatched", "out_for_delivery"},
+    "cancelled": {"pending", "preparing"},
+}
+
+PAYMENT_TRANSITIONS = {
+    "paid": {"pending", "failed"},
+    "failed": {"pending"},
+    "refunded": {"paid"},
+    "cancelled": {"pending", "failed"},
+}
+
+
+class InvalidTransition(Exception):
+    pass
+
+
+# Returns the ids de-duplicated in request order, or raises InvalidTransition
+def parse_ids(ids, limit):
+    if not isinstance(ids, list) or not ids:
+        raise InvalidTransition("ids must be a non-empty list")
+    if any(not isinstance(i, int) or isinstance(i, bool) for i in ids):
+        raise InvalidTransition("ids must be integers")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > limit:
+        raise InvalidTransition(f"At most {limit} ids per request")
+    return ids
+
+
+# Moves every row in `ids` whose current status allows it to `target` with one
+# UPDATE ... WHERE id IN (...) in the caller's transaction. The rows are read
+# with FOR UPDATE first so the per-id results cannot drift from what the UPDATE
+# touched. Bumps the model's version column so open optimistic-lock edits of
+# these rows get a 409, and logs the changes to the status history since the
+# set-based UPDATE bypasses the ORM attribute events. Returns {id: {"status": ..., ...}} for every id.
+def bulk_transition(model, id_column, status_column, transitions, ids, target):
+    target = target.strip().lower()
+    if target not in transitions:
+        raise InvalidTransition(f"Unknown status '{target}', expected one of {sorted(transitions)}")
+    sources = transitions[target]
+
+    current = dict(db.session.execute(
+        select(id_column, status_column).where(id_column.in_(ids)).with_for_update()
+    ).all())
+
+    results = {}
+    eligible = []
+    for row_id in ids:
+        if row_id not in current:
+            results[row_id] = {"status": "not_found"}
+            continue
+        status = (current[row_id] or "").lower()
+        if status == target:
+            results[row_id] = {"status": "unchanged", "from": current[row_id]}
+        elif status in sources:
+            eligible.append(row_id)
+            results[row_id] = {"status": "updated", "from": current[row_id], "to": target}
+        else:
+            results[row_id] = {
+                "status": "invalid_transition",
+                "from": current[row_id],
+                "message": f"Cannot move from '{current[row_id]}' to '{target}'"
+            }
+
+    if eligible:
+        values = {status_column.key: target}
+        version_column = getattr(model, "version", None)
+        if version_column is not None:
+            values[version_column.key] = version_column + 1
+        # The source guard repeats the check in SQL so the statement is safe
+        # even where the backend ignores FOR UPDATE (SQLite)
+        stmt = (
+            update(model)
+            .where(id_column.in_(eligible), func.lower(status_column).in_(sources))
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(stmt)
+        if model in TRACKED:
+            for row_id in eligible:
+                record_status_changes(TRACKED[model][0], row_id, {
+                    status_column.key: (current[row_id].strip().lower(), target)
+                })
+    return results
@@ -0,0 +1,112 @@
+# app/utils/stock.py
+from sqlalchemy import update, case, bindparam, true
+
+from app.extensions import db
+from app.models.menu_item_model import MenuItem
+
+# MenuItem.stock is NULL for items that are not stock-tracked; those are only
+# checked for `available`. All changes are single conditional UPDATE statements,
+# so concurrent orders never read-modify-write the counter and the row lock
+# lasts only until the caller's commit.
+
+menu_items = MenuItem.__table__
+
+
+class OutOfStock(Exception):
+    pass
+
+
+# Takes `quantity` portions if the item is available and has enough stock.
+# Reaching zero marks the item unavailable in the same statement.
+def reserve_stock(menu_item_id, quantity):
+    if quantity <= 0:
+        return
+    # `available` is assigned before `stock` so MySQL, which evaluates SET
+    # clauses left to right, sees the same pre-update stock as other backends
+    stmt = (
+        update(menu_items)
+        .where(
+            menu_items.c.id == menu_item_id,
+            menu_items.c.available == true(),
+            (menu_items.c.stock.is_(None)) | (menu_items.c.stock >= quantity)
+        )
+        .ordered_values(
+            (menu_items.c.available, case((menu_items.c.stock - quantity <= 0, False), else_=menu_items.c.available)),
+            (menu_items.c.stock, menu_items.c.stock - quantity)
+        )
+    )
+    if db.session.execute(stmt).rowcount != 1:
+        raise OutOfStock(f"Menu item {menu_item_id} is unavailable or has fewer than {quantity} portions left")
+
+
+# Gives portions back (cancelled or reduced order items). An item that was
+# switched off automatically at zero becomes available again.
+def release_stock(menu_item_id, quantity):
+    if quantity <= 0:
+        return
+    stmt = (
+        update(menu_items)
+        .where(menu_items.c.id == menu_item_id, menu_items.c.stock.isnot(None))
+        .ordered_values(
+            (menu_items.c.available, case((menu_items.c.stock <= 0, True), else_=menu_items.c.available)),
+            (menu_items.c.stock, menu_items.c.stock + quantity)
+        )
+    )
+    db.session.execute(stmt)
+
+
+# Applies a quantity change on one menu item, or moves the reservation when an
+# order item switches to another menu item
+def adjust_reservation(old_menu_item_id, old_quantity, new_menu_item_id, new_quantity):
+    if old_menu_item_id == new_menu_item_id:
+        delta = new_quantity - old_quantity
+        if delta > 0:
+            reserve_stock(new_menu_item_id, delta)
+        else:
+            release_stock(old_menu_item_id, -delta)
+    else:
+        reserve_stock(new_menu_item_id, new_quantity)
+        release_stock(old_menu_item_id, old_quantity)
+
+
+# Sets (`stock`) or increments (`add`) stock for many items in one transaction
+# with one executemany per kind. As in release_stock, only items that were at
+# zero (switched off automatically) become available again, and setting stock
+# to zero switches an item off; items switched off by hand stay off.
+# Returns the ids that do not exist.
+def restock(entries):
+    set_rows = [{"item_id": e["id"], "new_stock": e["stock"]} for e in entries if "stock" in e]
+    add_rows = [{"item_id": e["id"], "added": e["add"]} for e in entries if "add" in e]
+
+    ids = {e["id"] for e in entries}
+    existing = set(db.session.execute(
+        db.select(menu_items.c.id).where(menu_items.c.id.in_(ids))
+    ).scalars())
+
+    was_empty = menu_items.c.stock.isnot(None) & (menu_items.c.stock <= 0)
+    if set_rows:
+        db.session.execute(
+            update(menu_items)
+            .where(menu_items.c.id == bindparam("item_id"))
+            .ordered_values(
+                (menu_items.c.available, case(
+                    (bindparam("new_stock") <= 0, False),
+                    (was_empty, True),
+                    else_=menu_items.c.available
+                )),
+                (menu_items.c.stock, bindparam("new_stock"))
+            ),
+            set_rows
+        )
+    if add_rows:
+        new_stock = db.func.coalesce(menu_items.c.stock, 0) + bindparam("added")
+        db.session.execute(
+            update(menu_items)
+            .where(menu_items.c.id == bindparam("item_id"))
+            .ordered_values(
+                (menu_items.c.available, case((was_empty & (new_stock > 0), True), else_=menu_items.c.available)),
+                (menu_items.c.stock, new_stock)
+            ),
+            add_rows
+        )
+    return sorted(ids - existing)
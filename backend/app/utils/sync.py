@@ -0,0 +1,29 @@
+# app/utils/sync.py
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete
+
+from app.extensions import db
+from app.models.tombstone_model import Tombstone
+
+
+# Adds a tombstone to the current transaction; call it next to db.session.delete
+# so the row and its tombstone are committed together
+def record_tombstone(entity, entity_id):
+    db.session.add(Tombstone(entity=entity, entity_id=entity_id))
+
+
+def tombstone_horizon():
+    return datetime.utcnow() - timedelta(days=current_app.config["SYNC_TOMBSTONE_RETENTION_DAYS"])
+
+
+@click.command("purge-tombstones")
+@with_appcontext
+def purge_tombstones_command():
+    """Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."""
+    result = db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < tombstone_horizon()))
+    db.session.commit()
+    click.echo(f"{result.rowcount} tombstones purged")
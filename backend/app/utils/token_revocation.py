@@ -0,0 +1,192 @@
+# app/utils/token_revocation.py
+import calendar
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, delete
+
+from app.extensions import db, jwt
+from app.models.token_revocation_model import TokenRevocation
+from app.utils.bloom_filter import BloomFilter
+from app.utils.cache_bus import cache_bus
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REVOCATIONS = "token_revocations"
+
+# Re-reading a little before the last refresh catches rows whose transaction
+# committed late; adding a key twice is harmless
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def _epoch(value):
+    return calendar.timegm(value.utctimetuple())
+
+
+# Tokens carry either {"role": ..., "id": ...} or a bare id as their subject
+def subject_key(sub):
+    if isinstance(sub, dict):
+        return f"{sub.get('role')}:{sub.get('id')}"
+    return str(sub)
+
+
+# Per-worker view of the revocation table. A Bloom filter of revoked jtis
+# answers the common "not revoked" case without I/O; only a possible hit is
+# confirmed against the table. Subject-wide revocations are few, so their
+# cut-off times are simply held in a dict. New rows are merged incrementally
+# by created_at, right away when another worker publishes a revocation on the
+# cache bus and every REVOCATION_REFRESH_SECONDS otherwise. The filter is
+# rebuilt from unexpired rows periodically so expired entries and growth do
+# not raise the false-positive rate.
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._cutoffs = {}
+        self._loaded_until = None
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+        self._dirty = True
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    @staticmethod
+    def _load(rows, bloom, cutoffs):
+        for jti, subject, revoked_before in rows:
+            if jti:
+                bloom.add(jti)
+            elif revoked_before:
+                cutoffs[subject] = max(_epoch(revoked_before), cutoffs.get(subject, 0))
+
+    def _rebuild(self, config):
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            select(TokenRevocation.jti, TokenRevocation.subject, TokenRevocation.revoked_before)
+            .where(TokenRevocation.expires_at > now)
+        ).all()
+        # Filled before the swap so concurrent checks never see a partial filter
+        bloom = BloomFilter(max(config["REVOCATION_BLOOM_CAPACITY"], len(rows) * 2), config["REVOCATION_BLOOM_ERROR_RATE"])
+        cutoffs = {}
+        self._load(rows, bloom, cutoffs)
+        self._bloom, self._cutoffs = bloom, cutoffs
+        self._loaded_until = now
+        self._built_at = self._refreshed_at = time.monotonic()
+        logger.info(f"Rebuilt token revocation filter with {len(rows)} entries")
+
+    def _merge_new(self):
+        now = datetime.utcnow()
+        self._load(db.session.execute(
+            select(TokenRevocation.jti, TokenRevocation.subject, TokenRevocation.revoked_before)
+            .where(TokenRevocation.created_at >= self._loaded_until - REFRESH_OVERLAP)
+        ).all(), self._bloom, self._cutoffs)
+        self._loaded_until = now
+        self._refreshed_at = time.monotonic()
+
+    def _refresh(self):
+        config = current_app.config
+        now = time.monotonic()
+        stale = self._dirty or now - self._refreshed_at > config["REVOCATION_REFRESH_SECONDS"]
+        if self._bloom is not None and not stale:
+            return
+        with self._lock:
+            if (self._bloom is None or now - self._built_at > config["REVOCATION_REBUILD_SECONDS"]
+                    or self._bloom.count > self._bloom.capacity):
+                self._dirty = False
+                self._rebuild(config)
+            elif self._dirty or now - self._refreshed_at > config["REVOCATION_REFRESH_SECONDS"]:
+                self._dirty = False
+                self._merge_new()
+
+    # The add_* methods let this worker see its own revocations without
+    # waiting for a refresh
+    def add_jti(self, jti):
+        if self._bloom is not None:
+            self._bloom.add(jti)
+
+    def add_cutoff(self, subject, revoked_before):
+        self._load([(None, subject, revoked_before)], self._bloom, self._cutoffs)
+
+    def is_revoked(self, payload):
+        self._refresh()
+        cutoff = self._cutoffs.get(subject_key(payload.get("sub")))
+        if cutoff and payload.get("iat", 0) < cutoff:
+            return True
+
+        jti = payload.get("jti")
+        if jti and jti in self._bloom:
+            return db.session.execute(
+                select(TokenRevocation.id).where(TokenRevocation.jti == jti)
+            ).first() is not None
+        return False
+
+
+revocation_list = RevocationList()
+
+
+# Longest token lifetime; JWT_REFRESH_TOKEN_EXPIRES may be False (no expiry)
+def _max_token_lifetime():
+    lifetime = current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+    return lifetime if isinstance(lifetime, timedelta) else timedelta(days=365)
+
+
+# Revokes one decoded token (its jti) until the token itself would expire
+def revoke_token(payload, reason):
+    expires_at = datetime.utcfromtimestamp(payload["exp"]) if payload.get("exp") else (
+        datetime.utcnow() + _max_token_lifetime()
+    )
+    revocation = TokenRevocation(
+        jti=payload["jti"],
+        subject=subject_key(payload.get("sub")),
+        token_type=payload.get("type"),
+        reason=reason,
+        expires_at=expires_at
+    )
+    db.session.add(revocation)
+    return revocation
+
+
+# Revokes every token issued to the subjects up to now. Kept until the longest
+# lived token issued before now has expired.
+def revoke_subjects(subjects, reason):
+    # Whole seconds, to compare with the integer iat claim
+    now = datetime.utcnow().replace(microsecond=0)
+    expires_at = now + _max_token_lifetime()
+    revocations = [
+        TokenRevocation(subject=subject, revoked_before=now, reason=reason, expires_at=expires_at)
+        for subject in subjects
+    ]
+    db.session.add_all(revocations)
+    return revocations
+
+
+# Call with the rows from revoke_token/revoke_subjects once they are committed
+def announce_revocations(revocations):
+    for revocation in revocations:
+        if revocation.jti:
+            revocation_list.add_jti(revocation.jti)
+        else:
+            revocation_list.add_cutoff(revocation.subject, revocation.revoked_before)
+    cache_bus.publish(TOKEN_REVOCATIONS)
+
+
+def init_token_revocation(app):
+    cache_bus.subscribe(TOKEN_REVOCATIONS, revocation_list.mark_dirty)
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return revocation_list.is_revoked(jwt_payload)
+
+
+@click.command("purge-revocations")
+@with_appcontext
+def purge_revocations_command():
+    """Delete token revocations whose tokens have expired anyway."""
+    result = db.session.execute(delete(TokenRevocation).where(TokenRevocation.expires_at < datetime.utcnow()))
+    db.session.commit()
+    click.echo(f"{result.rowcount} expired revocations purged")
@@ -0,0 +1,52 @@
+# app/utils/ttl_cache.py
+import threading
+import time
+
+
+# Small per-worker cache: entries expire after `ttl` seconds and can be
+# dropped early with invalidate()
+class TTLCache:
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped by every invalidate(), so a value computed from rows read
+        # before an invalidation is not stored after it
+        self._generation = 0
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        # Computed outside the lock; two threads may race to fill the same key,
+        # which only costs a duplicate computation
+        value = compute()
+        with self._lock:
+            if self._generation != generation:
+                # Invalidated while computing: the value may predate the change
+                return value
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def _evict(self, now):
+        expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda key: self._entries[key][0])
+            del self._entries[oldest]
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,132 @@
+"""Add the columns and indexes later models added to existing tables
+
+Revision ID: 7c3e91a4d2f0
+Revises:
+Create Date: 2026-10-19 12:00:00
+
+db.create_all() at boot creates new tables but never alters existing ones,
+so a database created before these columns existed needs this revision:
+
+    flask db upgrade
+
+Columns and indexes that are already there (a database created by
+create_all after the models changed) are skipped, so it is safe to run on
+any database. Existing orders, deliveries and catering events get version 1.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e91a4d2f0'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# table -> columns added to it
+COLUMNS = {
+    'orders': [
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    ],
+    'deliveries': [
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('zone_id', sa.Integer(), nullable=True),
+        sa.Column('delivery_fee', sa.Numeric(10, 2), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    ],
+    'catering_events': [
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    ],
+    'menu_items': [
+        sa.Column('stock', sa.Integer(), nullable=True),
+    ],
+    'services': [
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ],
+    'contacts': [
+        sa.Column('submission_id', sa.String(32), nullable=True),
+    ],
+}
+
+# (index name, table, columns, unique)
+INDEXES = [
+    ('ix_orders_order_date', 'orders', ['order_date'], False),
+    ('ix_deliveries_order_id', 'deliveries', ['order_id'], False),
+    ('ix_deliveries_staff_id', 'deliveries', ['staff_id'], False),
+    ('ix_deliveries_zone_id', 'deliveries', ['zone_id'], False),
+    ('ix_menu_items_name', 'menu_items', ['name'], False),
+    ('ix_menu_items_category', 'menu_items', ['category'], False),
+    ('ix_menu_items_updated_at', 'menu_items', ['updated_at'], False),
+    ('ix_services_updated_at', 'services', ['updated_at'], False),
+    ('ix_contacts_email', 'contacts', ['email'], False),
+    ('ix_contacts_service_type', 'contacts', ['service_type'], False),
+    ('ix_contacts_created_at_id', 'contacts', ['created_at', 'id'], False),
+    ('uq_contacts_submission_id', 'contacts', ['submission_id'], True),
+    ('ix_customers_full_name', 'customers', ['full_name'], False),
+    ('ix_customers_contact', 'customers', ['contact'], False),
+    ('ix_customers_updated_at', 'customers', ['updated_at'], False),
+    ('ix_admin_users_contact', 'admin_users', ['contact'], False),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], False),
+    ('ix_order_items_menu_item_id', 'order_items', ['menu_item_id'], False),
+]
+
+
+def _existing_columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    added = set()
+    for table, columns in COLUMNS.items():
+        if table not in tables:
+            continue
+        existing = _existing_columns(inspector, table)
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column.copy())
+                added.add((table, column.name))
+
+    if ('services', 'updated_at') in added:
+        op.execute("UPDATE services SET created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP")
+    # SQLite cannot add a foreign key to an existing table
+    if ('deliveries', 'zone_id') in added and bind.dialect.name != 'sqlite' and 'delivery_zones' in tables:
+        op.create_foreign_key('fk_deliveries_zone_id', 'deliveries', 'delivery_zones', ['zone_id'], ['id'])
+
+    for name, table, columns, unique in INDEXES:
+        if table in tables and name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns, unique=unique)
+    if bind.dialect.name == 'mysql' and 'ix_contacts_fulltext' not in _existing_indexes(inspector, 'contacts'):
+        op.create_index('ix_contacts_fulltext', 'contacts', ['name', 'message'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if bind.dialect.name == 'mysql' and 'ix_contacts_fulltext' in _existing_indexes(inspector, 'contacts'):
+        op.drop_index('ix_contacts_fulltext', table_name='contacts')
+    if bind.dialect.name != 'sqlite':
+        foreign_keys = {fk['name'] for fk in inspector.get_foreign_keys('deliveries')}
+        if 'fk_deliveries_zone_id' in foreign_keys:
+            op.drop_constraint('fk_deliveries_zone_id', 'deliveries', type_='foreignkey')
+    for name, table, columns, unique in reversed(INDEXES):
+        if name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
+
+    for table, columns in COLUMNS.items():
+        existing = _existing_columns(inspector, table)
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                if column.name in existing:
+                    batch_op.drop_column(column.name)
@@ -8,15 +8,19 @@ const EditCateringEvent = () => {
   const [loading, setLoading] = useState(true);
   const [submitting, setSubmitting] = useState(false);
   const [error, setError] = useState(null);
+  // Version the form was loaded at; the PUT sends it back as If-Match
+  const [etag, setEtag] = useState(null);
 
   useEffect(() => {
     fetch(`${import.meta.env.VITE_API_BASE_URL}/catering-events/${id}`)
       .then((res) => {
         if (!res.ok) throw new Error('Failed to fetch event data');
+        setEtag(res.headers.get('ETag'));
         return res.json();
       })
       .then(data => {
         setFormData(data);
+        setEtag((current) => current || `"${data.version}"`);
         setLoading(false);
       })
       .catch(err => {
@@ -33,12 +37,22 @@ const EditCateringEvent = () => {
     e.preventDefault();
     setSubmitting(true);
     try {
+      // version and menu_lines are managed by the server, not this form
+      const { version, menu_lines, ...payload } = formData;
       const res = await fetch(`${import.meta.env.VITE_API_BASE_URL}/catering-events/${id}`, {
         method: 'PUT',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(formData),
+        headers: { 'Content-Type': 'application/json', 'If-Match': etag },
+        body: JSON.stringify(payload),
       });
 
+      if (res.status === 409) {
+        // Someone else saved first: show their version and let the user retry
+        const conflict = await res.json();
+        setFormData(conflict.current);
+        setEtag(res.headers.get('ETag') || `"${conflict.current.version}"`);
+        alert('This event was changed by someone else. The form now shows the latest version; please review and save again.');
+        return;
+      }
       if (!res.ok) throw new Error('Failed to update event');
       
       alert('Event updated successfully!');